@@ -1,12 +1,21 @@
+import threading
+
 from flask import Flask, abort, render_template
 from jinja2 import TemplateNotFound
 
-from app.extensions import db
+from app.extensions import (
+    aggregator,
+    coverage_matrix,
+    fragment_cache,
+    init_db,
+    job_queue,
+)
 from app.models.components import (  # noqa: F401
     CatalogFile,
     ComponentFile,
     component_catalog,
 )
+from app.models.jobs import Job  # noqa: F401
 from config import Config
 
 
@@ -14,9 +23,12 @@ def create_app(config_class=Config):
     app = Flask(__name__, instance_path=Config.INSTANCE_PATH)
     app.config.from_object(config_class)
 
-    with app.app_context():
-        db.init_app(app)
-        db.create_all()
+    # The schema is created and migrated with "flask db upgrade", not on every start.
+    init_db(app)
+    fragment_cache.init_app(app)
+    coverage_matrix.init_app(app)
+    aggregator.init_app(app)
+    job_queue.init_app(app)
 
     from app.main import bp as bp_main
 
@@ -30,6 +42,10 @@ def create_app(config_class=Config):
 
     app.register_blueprint(bp_components, url_prefix="/components")
 
+    from app.jobs import bp as bp_jobs
+
+    app.register_blueprint(bp_jobs, url_prefix="/jobs")
+
     @app.errorhandler(404)
     def page_not_found(error):
         try:
@@ -41,4 +57,13 @@ def create_app(config_class=Config):
     def internal_error(error):
         return render_template("500.html"), 500
 
+    from app.warmup import warm_imports, warmup, warmup_command
+
+    app.cli.add_command(warmup_command)
+    if app.config.get("PRELOAD_WARMUP"):
+        # Under gunicorn --preload this runs once in the master, before it forks.
+        warmup(app, freeze=True)
+    elif app.config.get("WARM_ON_STARTUP"):
+        threading.Thread(target=warm_imports, daemon=True).start()
+
     return app
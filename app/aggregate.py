@@ -0,0 +1,178 @@
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+from flask import Flask
+
+from app.coverage import file_key, get_field
+from app.oscal.control_ids import natural_sort_key
+from app.storage import open_blob
+
+if TYPE_CHECKING:
+    from app.models.components import CatalogFile, ComponentFile
+    from app.oscal.catalog import CatalogModel
+
+
+def prop_value(item: dict, name: str) -> Optional[str]:
+    return next(
+        (prop["value"] for prop in item.get("props") or [] if prop["name"] == name),
+        None,
+    )
+
+
+def read_requirements(filename: str) -> Dict[str, List[dict]]:
+    """
+    The implemented requirements of a component file, by the source of their
+    control implementation, with only the fields the aggregated view shows.
+    """
+    with open_blob(filename) as file:
+        document = json.load(file)
+    definition = get_field(document, "component-definition") or document
+    requirements: Dict[str, List[dict]] = {}
+    for component in get_field(definition, "components") or []:
+        for implementation in get_field(component, "control-implementations") or []:
+            requirements.setdefault(implementation["source"], []).extend(
+                {
+                    "control_id": get_field(requirement, "control-id"),
+                    "description": requirement.get("description", ""),
+                    "responsibility": prop_value(requirement, "security_control_type"),
+                    "provider": prop_value(requirement, "provider"),
+                    "statements": [
+                        {
+                            "statement_id": get_field(statement, "statement-id"),
+                            "description": statement.get("description", ""),
+                        }
+                        for statement in requirement.get("statements") or []
+                    ],
+                }
+                for requirement in get_field(
+                    implementation, "implemented-requirements", []
+                )
+            )
+    return requirements
+
+
+class Aggregator:
+    """
+    The implemented requirements of many components for one catalog, grouped by
+    control in catalog order. Component files are read in parallel and kept until
+    they change, and the aggregated result is cached for each set of component
+    files.
+    """
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.workers = 8
+        self.maxsize = 16
+        self._components: Dict[int, tuple] = {}
+        self._results: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        self.workers = app.config.get("AGGREGATE_WORKERS", 8)
+        self.maxsize = app.config.get("AGGREGATE_CACHE_SIZE", 16)
+        app.extensions["aggregator"] = self
+
+    @staticmethod
+    def read(component: "ComponentFile") -> Dict[str, List[dict]]:
+        try:
+            return read_requirements(component.filename)
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}
+
+    def requirements(
+        self, components: Sequence["ComponentFile"]
+    ) -> Dict[int, Dict[str, List[dict]]]:
+        """
+        The requirements of every component, reading only the files that changed.
+        """
+        keys = {component.id: file_key(component.filename) for component in components}
+        stale = [
+            component
+            for component in components
+            if self._components.get(component.id, (None, None))[:2]
+            != (component.filename, keys[component.id])
+        ]
+        if stale:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                read = executor.map(self.read, stale)
+                for component, requirements in zip(stale, read):
+                    with self._lock:
+                        self._components[component.id] = (
+                            component.filename,
+                            keys[component.id],
+                            requirements,
+                        )
+        return {
+            component.id: self._components[component.id][2] for component in components
+        }
+
+    def aggregate(
+        self,
+        catalog_file: "CatalogFile",
+        catalog: "CatalogModel",
+        components: Sequence["ComponentFile"],
+    ) -> List[dict]:
+        """
+        The controls implemented by the components, in catalog order, each with the
+        narratives of every component and their responsibilities and providers.
+        """
+        requirements = self.requirements(components)
+        key = (
+            catalog_file.source,
+            catalog_file.filename,
+            tuple(
+                (component.id, component.title, self._components[component.id][1])
+                for component in components
+            ),
+        )
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+
+        controls: Dict[str, dict] = {}
+        for component in components:
+            for requirement in requirements[component.id].get(catalog_file.source, []):
+                control_id = requirement["control_id"]
+                if control_id not in controls:
+                    control = catalog.get_control(control_id)
+                    controls[control_id] = {
+                        "control_id": control_id,
+                        "title": control.title if control else "",
+                        "implementations": [],
+                        "responsibilities": [],
+                        "providers": [],
+                    }
+                aggregated = controls[control_id]
+                aggregated["implementations"].append(
+                    {
+                        "component_id": component.id,
+                        "component": component.title,
+                        **requirement,
+                    }
+                )
+                for field, value in (
+                    ("responsibilities", requirement["responsibility"]),
+                    ("providers", requirement["provider"]),
+                ):
+                    if value and value not in aggregated[field]:
+                        aggregated[field].append(value)
+
+        # Controls that are not in the catalog go last, in natural order.
+        positions = catalog.positions
+        result = sorted(
+            controls.values(),
+            key=lambda control: (
+                positions.get(control["control_id"], len(positions)),
+                natural_sort_key(control["control_id"]),
+            ),
+        )
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+        return result
@@ -0,0 +1,138 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+
+from flask import Flask, current_app, render_template, stream_template
+from markupsafe import Markup
+
+
+class FragmentCache:
+    """
+    Cache of rendered HTML fragments. Fragments are kept in an in-process LRU and,
+    when FRAGMENT_CACHE_DIR is set, in an on-disk tier shared between workers.
+    Keys are prefixed with the catalog id so every fragment rendered from a catalog
+    can be invalidated when it is updated or deleted.
+    """
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.maxsize = 128
+        self.directory: Optional[Path] = None
+        self._fragments: OrderedDict = OrderedDict()
+        self._template_versions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        self.maxsize = app.config.get("FRAGMENT_CACHE_SIZE", 128)
+        if directory := app.config.get("FRAGMENT_CACHE_DIR"):
+            self.directory = Path(directory)
+            self.directory.mkdir(parents=True, exist_ok=True)
+        app.extensions["fragment_cache"] = self
+
+    @staticmethod
+    def key(catalog_id: int, *parts) -> str:
+        digest = hashlib.sha256(":".join(str(p) for p in parts).encode()).hexdigest()
+        return f"catalog-{catalog_id}-{digest[:40]}"
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._fragments:
+                self._fragments.move_to_end(key)
+                return self._fragments[key]
+
+        if self.directory:
+            path = self.directory.joinpath(f"{key}.html")
+            if path.is_file():
+                value = path.read_text()
+                self._set_memory(key, value)
+                return value
+        return None
+
+    def set(self, key: str, value: str):
+        self._set_memory(key, value)
+        if self.directory:
+            path = self.directory.joinpath(f"{key}.html")
+            tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp.write_text(value)
+            tmp.replace(path)
+
+    def _set_memory(self, key: str, value: str):
+        with self._lock:
+            self._fragments[key] = value
+            self._fragments.move_to_end(key)
+            while len(self._fragments) > self.maxsize:
+                self._fragments.popitem(last=False)
+
+    def invalidate(self, catalog_id: int):
+        prefix = f"catalog-{catalog_id}-"
+        with self._lock:
+            for key in [k for k in self._fragments if k.startswith(prefix)]:
+                del self._fragments[key]
+        if self.directory:
+            for path in self.directory.glob(f"{prefix}*.html"):
+                path.unlink(missing_ok=True)
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+        if self.directory:
+            for path in self.directory.glob("catalog-*.html"):
+                path.unlink(missing_ok=True)
+
+    def template_version(self, template: str) -> str:
+        if template not in self._template_versions:
+            env = current_app.jinja_env
+            source, _, _ = env.loader.get_source(env, template)  # type: ignore
+            self._template_versions[template] = hashlib.sha256(
+                source.encode()
+            ).hexdigest()[:12]
+        return self._template_versions[template]
+
+    def get_or_set(self, key: str, func: Callable[[], str]) -> str:
+        value = self.get(key)
+        if value is None:
+            value = func()
+            self.set(key, value)
+        return value
+
+    def render(
+        self,
+        template: str,
+        catalog_id: int,
+        parts: tuple,
+        context: Callable[[], dict],
+    ) -> Markup:
+        """
+        Return the cached fragment for template and key parts, rendering it with
+        the context returned by the context callable on a miss.
+        """
+        key = self.key(catalog_id, template, self.template_version(template), *parts)
+        return Markup(
+            self.get_or_set(key, lambda: render_template(template, **context()))
+        )
+
+    def stream(
+        self,
+        template: str,
+        catalog_id: int,
+        parts: tuple,
+        context: Callable[[], dict],
+    ) -> Iterator[Markup]:
+        """
+        Like render, but on a miss the fragment is yielded in chunks as it is
+        rendered and only stored once it is complete.
+        """
+        key = self.key(catalog_id, template, self.template_version(template), *parts)
+        value = self.get(key)
+        if value is not None:
+            yield Markup(value)
+            return
+
+        chunks = []
+        for chunk in stream_template(template, **context()):
+            chunks.append(chunk)
+            yield Markup(chunk)
+        self.set(key, "".join(chunks))
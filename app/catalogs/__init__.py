@@ -2,4 +2,4 @@ from flask import Blueprint
 
 bp = Blueprint("catalogs", __name__)
 
-from app.catalogs import routes  # noqa: E402, F401
+from app.catalogs import commands, routes  # noqa: E402, F401
@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import click
+from flask import current_app
+
+from app.catalogs import bp
+from app.catalogs.importer import import_catalogs
+from app.catalogs.profiles import resolve_profile
+from app.extensions import db
+from app.models.components import CatalogFile
+
+
+@bp.cli.command("import")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option("--workers", type=int, help="Processes, defaults to IMPORT_WORKERS.")
+def import_command(paths, workers):
+    """Import Catalog files, directories of them and zip archives."""
+    results = import_catalogs(
+        paths,
+        Path(current_app.config["UPLOAD_FOLDER"]).joinpath("catalogs"),
+        workers=workers or current_app.config.get("IMPORT_WORKERS"),
+        compression=current_app.config.get("STORAGE_COMPRESSION"),
+    )
+    for result in results:
+        message = result.get("title") or result.get("error")
+        if result["status"] == "skipped":
+            message = f"{result['title']}: {result['error']}"
+        click.echo(f"{result['status']:>8}  {result['filename']}  {message}")
+    if any(result["status"] == "failed" for result in results):
+        raise SystemExit(1)
+
+
+@bp.cli.command("resolve")
+@click.argument("profile", type=click.Path(exists=True, dir_okay=False))
+@click.option("--catalog", "catalog_id", type=int, required=True, help="Catalog id.")
+@click.option("--title", help="Catalog name, defaults to the profile title.")
+@click.option(
+    "--overwrite",
+    is_flag=True,
+    help="Replace a Catalog with the name that was not resolved from the profile.",
+)
+def resolve_command(profile, catalog_id, title, overwrite):
+    """Resolve an OSCAL profile against an imported Catalog."""
+    source = db.session.get(CatalogFile, catalog_id)
+    if source is None:
+        raise click.BadParameter(f"There is no Catalog {catalog_id}.")
+    try:
+        catalog, status = resolve_profile(
+            Path(profile),
+            source,
+            Path(current_app.config["UPLOAD_FOLDER"]).joinpath("catalogs"),
+            title=title,
+            compression=current_app.config.get("STORAGE_COMPRESSION"),
+            overwrite=overwrite,
+        )
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(f"{status:>9}  {catalog.id}  {catalog.title}")
@@ -0,0 +1,94 @@
+import json
+import os
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+from app.extensions import coverage_matrix
+from app.models.components import CatalogFile, ComponentFile
+from app.oscal.control_ids import natural_sort_key
+from app.oscal.diff import (
+    HASHES_VERSION,
+    CatalogDiff,
+    catalog_controls,
+    catalog_hashes,
+    diff_catalogs,
+)
+from app.storage import open_blob
+
+
+def hashes_path(filename: str) -> Path:
+    path = Path(filename)
+    return path.with_name(f"{path.name}.hashes.json")
+
+
+def read_catalog(filename: str) -> dict:
+    with open_blob(filename) as file:
+        return json.load(file)
+
+
+def write_hashes(filename: str) -> dict:
+    """
+    Hash the controls of a stored Catalog file, next to the file. Catalog files
+    are content-addressed, so the hashes are written once for each content.
+    """
+    hashes = catalog_hashes(read_catalog(filename))
+    target = hashes_path(filename)
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(hashes))
+    tmp.replace(target)
+    return hashes
+
+
+def read_hashes(filename: str) -> dict:
+    """
+    The control hashes of a Catalog file, computed at import time, or now for
+    the files imported before the hashes were.
+    """
+    try:
+        hashes = json.loads(hashes_path(filename).read_text())
+    except (OSError, ValueError):
+        hashes = None
+    if not hashes or hashes.get("version") != HASHES_VERSION:
+        hashes = write_hashes(filename)
+    return hashes
+
+
+def affected_components(
+    catalog: CatalogFile, diff: CatalogDiff, components: Iterable[ComponentFile]
+) -> List[dict]:
+    """
+    The Components whose implemented requirements of the old Catalog reference a
+    changed, withdrawn or removed control, with those controls.
+    """
+    affected = diff.affected
+    results = []
+    for component in components:
+        implemented = coverage_matrix.controls(component).get(catalog.source, set())
+        if control_ids := sorted(implemented & affected, key=natural_sort_key):
+            results.append(
+                {
+                    "id": component.id,
+                    "title": component.title,
+                    "controls": [
+                        {"control_id": control_id, "change": diff.change(control_id)}
+                        for control_id in control_ids
+                    ],
+                }
+            )
+    return results
+
+
+def diff_catalog_files(
+    old: CatalogFile, new: CatalogFile, components: Iterable[ComponentFile]
+) -> Tuple[CatalogDiff, List[dict]]:
+    """
+    The diff between two Catalogs, and the Components that implement controls
+    of the old Catalog that changed.
+    """
+    diff = diff_catalogs(
+        read_hashes(old.filename),
+        read_hashes(new.filename),
+        lambda: catalog_controls(read_catalog(old.filename)),
+        lambda: catalog_controls(read_catalog(new.filename)),
+    )
+    return diff, affected_components(old, diff, components)
@@ -1,5 +1,12 @@
 from flask_wtf import FlaskForm
-from wtforms import FileField, StringField, TextAreaField
+from wtforms import (
+    BooleanField,
+    FileField,
+    SelectField,
+    SelectMultipleField,
+    StringField,
+    TextAreaField,
+)
 from wtforms.validators import InputRequired, length
 
 from app.oscal.validator import OscalValidator
@@ -70,3 +77,50 @@ class UpdateCatalogForm(FlaskForm):
             "placeholder": "Enter the source URL for this catalog.",
         },
     )
+
+
+class CatalogArchiveForm(FlaskForm):
+    archive = FileField(
+        "Zip archive of Catalog files",
+        validators=[InputRequired()],
+        render_kw={
+            "type": "file",
+            "accept": ".zip",
+            "required": "required",
+        },
+    )
+
+
+class ProfileForm(FlaskForm):
+    catalog_id = SelectField("Source Catalog", coerce=int, validators=[InputRequired()])
+    title = StringField(
+        "Catalog Name",
+        validators=[length(max=150)],
+        render_kw={
+            "placeholder": "Defaults to the title of the profile.",
+        },
+    )
+    overwrite = BooleanField("Replace an existing Catalog with this name")
+    profile = FileField(
+        "OSCAL Profile JSON file",
+        validators=[InputRequired()],
+        render_kw={
+            "type": "file",
+            "accept": ".json",
+            "required": "required",
+        },
+    )
+
+
+class MigrateForm(FlaskForm):
+    target_id = SelectField("Target Catalog", coerce=int, validators=[InputRequired()])
+    component_ids = SelectMultipleField(
+        "Components", coerce=int, validators=[InputRequired()]
+    )
+    crosswalk = FileField(
+        "Crosswalk CSV, XLSX or JSON file",
+        render_kw={
+            "type": "file",
+            "accept": ".csv,.xlsx,.json",
+        },
+    )
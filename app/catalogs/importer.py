@@ -0,0 +1,209 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+from uuid import uuid4
+
+from werkzeug.utils import secure_filename
+
+from app.extensions import db
+from app.models.components import CatalogFile
+from app.storage import (
+    open_blob,
+    release_blob,
+    save_blob_file,
+    unpin_blob,
+    write_variants,
+)
+
+
+def check_catalog(filename: str) -> dict:
+    """
+    Validate and parse a Catalog file, and hash its controls. Runs in a worker
+    process, so it only returns what is needed to create the CatalogFile.
+    """
+    from app.catalogs.diff import write_hashes
+    from app.oscal.catalog import CatalogModel
+    from app.oscal.validator import OscalValidator
+
+    result = {"filename": filename, "status": "failed", "error": None}
+    try:
+        with open_blob(filename) as file:
+            OscalValidator(file, "oscal_catalog_schema.json").validate_file()
+        catalog = CatalogModel.from_json(filename)
+        write_hashes(filename)
+    except Exception as exc:
+        result["error"] = str(exc).splitlines()[0] if str(exc) else repr(exc)
+        return result
+
+    result.update(
+        status="valid",
+        title=catalog.metadata.title,
+        version=catalog.metadata.version,
+        uuid=str(catalog.uuid),
+        controls=len(catalog.controls_index),
+    )
+    return result
+
+
+def check_catalogs(filenames: List[str], workers: Optional[int] = None) -> List[dict]:
+    """
+    Check Catalog files in parallel on a pool of processes, one file per task.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(filenames))
+    if workers <= 1:
+        return [check_catalog(filename) for filename in filenames]
+    # Spawn rather than fork, the caller may be a threaded web worker.
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        return list(executor.map(check_catalog, filenames))
+
+
+def extract_archive(
+    archive: Path, directory: Path, max_size: Optional[int] = None
+) -> List[Path]:
+    """
+    Extract the JSON files of a zip archive, ignoring its directory structure.
+    """
+    with zipfile.ZipFile(archive) as zip_file:
+        members = [
+            member
+            for member in zip_file.infolist()
+            if not member.is_dir() and member.filename.lower().endswith(".json")
+        ]
+        if max_size and sum(member.file_size for member in members) > max_size:
+            raise ValueError(f"{archive.name} is larger than {max_size} bytes.")
+
+        filenames = []
+        for member in members:
+            name = secure_filename(Path(member.filename).name)
+            target = directory.joinpath(name)
+            if target in filenames:
+                target = directory.joinpath(f"{len(filenames)}-{name}")
+            with zip_file.open(member) as source, open(target, "wb") as f:
+                shutil.copyfileobj(source, f)
+            filenames.append(target)
+    return filenames
+
+
+def expand_paths(
+    paths: Iterable[Path], directory: Path, max_size: Optional[int] = None
+):
+    """
+    The Catalog files of paths to files, directories of JSON files and zip archives.
+    """
+    filenames: List[Path] = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            filenames.extend(sorted(path.rglob("*.json")))
+        elif zipfile.is_zipfile(path):
+            filenames.extend(extract_archive(path, directory, max_size))
+        else:
+            filenames.append(path)
+    return filenames
+
+
+def import_catalogs(
+    paths: Iterable[Path],
+    upload_directory: Path,
+    workers: Optional[int] = None,
+    max_size: Optional[int] = None,
+    report: Optional[Callable[[int, str], None]] = None,
+    compression: Optional[str] = None,
+) -> List[dict]:
+    """
+    Import Catalog files, directories and zip archives. The files are stored
+    content-addressed in the upload directory, compressed when compression is
+    gzip or zstd. The ones that are new are validated and parsed in parallel, and
+    the CatalogFiles are created in one transaction. Returns the result of every
+    file.
+    """
+    report = report or (lambda progress, message: None)
+
+    # The stored files are pinned until the import is done, they may be shared
+    # with concurrent uploads of the same content.
+    pin = uuid4().hex
+    blobs: List[Path] = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            filenames = expand_paths(paths, Path(tmp), max_size)
+            report(5, f"Storing {len(filenames)} catalog files")
+            for filename in filenames:
+                blobs.append(
+                    save_blob_file(filename, upload_directory, compression, pin)
+                )
+        return save_catalogs(filenames, blobs, workers, report)
+    finally:
+        for blob in blobs:
+            unpin_blob(blob, pin)
+        # Remove the stored files of the catalogs that were not imported.
+        for blob in {blob.as_posix() for blob in blobs}:
+            release_blob(blob, partial(CatalogFile.references, blob))
+
+
+def save_catalogs(
+    filenames: List[Path],
+    blobs: List[Path],
+    workers: Optional[int],
+    report: Callable[[int, str], None],
+) -> List[dict]:
+    """
+    Check the new stored Catalog files and create the CatalogFiles of the valid
+    ones, with the result of every file.
+    """
+    # Files that are already used by a Catalog were checked when first imported.
+    existing = dict(
+        db.session.query(CatalogFile.filename, CatalogFile.title).filter(
+            CatalogFile.filename.in_([blob.as_posix() for blob in blobs])
+        )
+    )
+    new_blobs = sorted({blob.as_posix() for blob in blobs} - set(existing))
+    report(10, f"Checking {len(new_blobs)} new catalog files")
+    checked = dict(zip(new_blobs, check_catalogs(new_blobs, workers)))
+    report(80, "Saving the catalogs")
+
+    titles = {title for (title,) in db.session.query(CatalogFile.title)}
+    sources = {source for (source,) in db.session.query(CatalogFile.source)}
+    results = []
+    try:
+        for filename, blob in zip(filenames, blobs):
+            if blob.as_posix() in existing:
+                title = existing[blob.as_posix()]
+                result = {
+                    "status": "skipped",
+                    "title": title,
+                    "error": f"Catalog already exists as {title}.",
+                }
+            else:
+                result = dict(checked[blob.as_posix()])
+            result["filename"] = filename.name
+            results.append(result)
+            if result["status"] != "valid":
+                continue
+            source = f"urn:uuid:{result['uuid']}"
+            if result["title"] in titles or source in sources:
+                result.update(status="skipped", error="Catalog already exists.")
+                continue
+            db.session.add(
+                CatalogFile(
+                    title=result["title"],
+                    description=f"{result['title']} version {result['version']}",
+                    source=source,
+                    filename=blob.as_posix(),
+                )
+            )
+            write_variants(blob)
+            titles.add(result["title"])
+            sources.add(source)
+            result["status"] = "imported"
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return results
@@ -0,0 +1,134 @@
+import hashlib
+import io
+import json
+from functools import partial
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+from uuid import uuid4
+
+from app.extensions import db
+from app.helpers import file_hash
+from app.models.components import CatalogFile
+from app.storage import (
+    open_blob,
+    release_blob,
+    save_blob,
+    unpin_blob,
+    write_variants,
+)
+
+
+def resolve_profile(
+    profile_path: Path,
+    catalog_file: CatalogFile,
+    upload_directory: Path,
+    title: Optional[str] = None,
+    compression: Optional[str] = None,
+    report: Optional[Callable[[int, str], None]] = None,
+    overwrite: bool = False,
+) -> Tuple[CatalogFile, str]:
+    """
+    Resolve an OSCAL profile against an imported Catalog and save the resolved
+    Catalog. Resolved files are cached by the hashes of the profile and the source
+    Catalog. A Catalog that already has the title and was resolved from a profile
+    with the same title is refreshed in place, keeping its source so the Components
+    that implement it are unchanged. Other Catalogs with the title are only
+    replaced with overwrite. Returns the Catalog and whether it was "created",
+    "refreshed" or "unchanged".
+    """
+    from app.catalogs.diff import write_hashes
+    from app.oscal.profile import ProfileResolver
+    from app.oscal.validator import compiled_validator
+
+    report = report or (lambda progress, message: None)
+    content = profile_path.read_bytes()
+    try:
+        profile = json.loads(content)
+    except ValueError as exc:
+        raise ValueError(f"{profile_path.name} is not a JSON file: {exc}") from exc
+    profile = profile.get("profile", profile)
+    profile_title = profile.get("metadata", {}).get("title")
+    if not profile_title:
+        raise ValueError("The profile has no title.")
+    title = title or profile_title
+    catalog = CatalogFile.query.filter_by(title=title).first()
+    if catalog and catalog.id == catalog_file.id:
+        raise ValueError(f"{title} is the source catalog, choose another title.")
+    if catalog and catalog.profile != profile_title and not overwrite:
+        raise ValueError(
+            f"{title} was not resolved from this profile, choose another title or "
+            "overwrite it."
+        )
+
+    catalog_hash = file_hash(catalog_file.filename)
+    cache = upload_directory.joinpath(
+        "profiles", f"{hashlib.sha256(content).hexdigest()}-{catalog_hash}"
+    )
+    # The resolved file may be shared with a concurrent resolution or upload of the
+    # same content, it is pinned until the Catalog is saved.
+    pin = uuid4().hex
+    blob = None
+    try:
+        blob = Path(cache.read_text()) if cache.is_file() else None
+        if blob is None or not blob.is_file():
+            report(10, f"Resolving the profile against {catalog_file.title}")
+            with open_blob(catalog_file.filename) as file:
+                resolver = ProfileResolver(json.load(file), catalog_hash)
+            resolved = resolver.resolve(profile)
+
+            report(60, "Validating the resolved catalog")
+            errors = compiled_validator("oscal_catalog_schema.json").iter_errors(
+                resolved
+            )
+            if error := next(errors, None):
+                raise ValueError(
+                    f"The resolved catalog is not valid OSCAL: {error.message}"
+                )
+            blob = save_blob(
+                io.BytesIO(json.dumps(resolved, indent=2).encode()),
+                upload_directory,
+                compression=compression,
+                pin=pin,
+            )
+            write_hashes(blob.as_posix())
+            cache.parent.mkdir(parents=True, exist_ok=True)
+            cache.write_text(blob.as_posix())
+        with open_blob(blob) as file:
+            uuid = json.load(file)["catalog"]["uuid"]
+
+        report(80, "Saving the catalog")
+        if catalog is None:
+            catalog = CatalogFile.query.filter_by(source=f"urn:uuid:{uuid}").first()
+            if catalog:
+                return catalog, "unchanged"
+            catalog = CatalogFile(
+                title=title,
+                description=f"{title} resolved from {catalog_file.title}",
+                source=f"urn:uuid:{uuid}",
+                filename=blob.as_posix(),
+                profile=profile_title,
+            )
+            db.session.add(catalog)
+            status = "created"
+        elif catalog.filename == blob.as_posix() and catalog.profile == profile_title:
+            return catalog, "unchanged"
+        else:
+            previous, catalog.filename = catalog.filename, blob.as_posix()
+            catalog.profile = profile_title
+            status = "refreshed"
+        try:
+            db.session.commit()
+        except db.exc.SQLAlchemyError:
+            db.session.rollback()
+            unpin_blob(blob, pin)
+            release_blob(
+                blob.as_posix(), partial(CatalogFile.references, blob.as_posix())
+            )
+            raise
+        write_variants(blob)
+        if status == "refreshed":
+            release_blob(previous, partial(CatalogFile.references, previous))
+        return catalog, status
+    finally:
+        if blob is not None:
+            unpin_blob(blob, pin)
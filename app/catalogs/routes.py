@@ -1,19 +1,74 @@
+import json
+import re
+import zipfile
+from functools import cache, partial
 from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+from uuid import uuid4
 
-from flask import abort, current_app, flash, redirect, render_template, request, url_for
+from flask import (
+    Response,
+    abort,
+    current_app,
+    flash,
+    redirect,
+    render_template,
+    request,
+    stream_template,
+    stream_with_context,
+    url_for,
+)
 from jinja2 import TemplateNotFound
 from werkzeug.utils import secure_filename
 
 from app.catalogs import bp
-from app.catalogs.forms import CatalogForm, UpdateCatalogForm
-from app.extensions import db
-from app.helpers import allowed_file
-from app.models.components import CatalogFile
-from app.oscal.catalog import CatalogModel
-from app.oscal.oscal import BackMatter
+from app.extensions import (
+    aggregator,
+    coverage_matrix,
+    db,
+    fragment_cache,
+    job_queue,
+    read_only,
+)
+from app.helpers import (
+    allowed_file,
+    conditional,
+    file_hash,
+    make_etag,
+    send_stored,
+    stream_page,
+)
+from app.models.components import CatalogFile, ComponentFile
+from app.models.jobs import Job
+from app.models.pagination import paginate
+from app.oscal.control_ids import normalize_control_ids
+from app.oscal.filters import FilterError
+from app.oscal.loader import load_catalog
+from app.storage import (
+    open_blob,
+    release_blob,
+    save_blob,
+    unpin_blob,
+    write_variants,
+)
 
+if TYPE_CHECKING:
+    from app.oscal.catalog import CatalogModel, Control
+    from app.oscal.oscal import BackMatter
 
-def get_control_links(links: list, backmatter: BackMatter) -> dict:
+ODP_PLACEHOLDER = re.compile(r"\{\{ insert: param, ([^\s}]+) \}\}")
+
+
+def get_control_links(links: list, backmatter: "BackMatter") -> dict:
     links_list: dict = {
         "reference": [],
         "related": [],
@@ -31,72 +86,386 @@ def get_control_links(links: list, backmatter: BackMatter) -> dict:
 
 
 def replace_odps(statements: list, parameters: dict) -> list:
+    """
+    Insert the parameters into the prose of the statements, with one substitution
+    per statement that looks each placeholder up, so the parameters of a whole
+    catalog can be passed once for many controls.
+    """
+
+    def insert(match: re.Match) -> str:
+        return parameters.get(match[1], match[0])
+
     for k, s in enumerate(statements):
-        text = s.get("prose")
-        for key, value in parameters.items():
-            placeholder = "{{ insert: param, " + key + " }}"
-            text = text.replace(placeholder, value)
-        statements[k]["prose"] = text
+        if text := s.get("prose"):
+            statements[k]["prose"] = ODP_PLACEHOLDER.sub(insert, text)
     return statements
 
 
+def resolve_control(control: "Control", catalog: "CatalogModel") -> dict:
+    """
+    Build a JSON serializable dict of a Control with its parameters inserted into
+    the statement and its links resolved against the catalog back-matter.
+    """
+    group = catalog.get_group(control.id)
+    statements = replace_odps(control.statement, catalog.parameters)
+    links = get_control_links(control.links, catalog.back_matter)
+    return {
+        "id": control.id,
+        "label": control.label,
+        "title": control.title,
+        "family": group.title if group else None,
+        "statement": [
+            {
+                "id": s["id"],
+                "label": getattr(s["label"], "value", None),
+                "prose": s["prose"],
+            }
+            for s in statements
+        ],
+        "parameters": control.parameters,
+        "guidance": control.guidance,
+        "links": {
+            "reference": [
+                json.loads(resource.json(exclude_none=True))
+                for resource in links["reference"]
+                if resource
+            ],
+            "related": links["related"],
+        },
+    }
+
+
+def select_controls(
+    catalog: "CatalogModel",
+    control_ids: List[str],
+    family: str = "",
+    baseline: "CatalogModel" = None,
+) -> List["Control"]:
+    if control_ids:
+        controls = [catalog.get_control(control_id) for control_id in control_ids]
+        controls = [control for control in controls if control]
+    else:
+        controls = catalog.controls
+    if family:
+        controls = [c for c in controls if c.id.split("-", 1)[0] == family.lower()]
+    if baseline:
+        controls = [c for c in controls if c.id in baseline.controls_index]
+    return catalog.sorted_controls(controls)
+
+
+def stream_controls(
+    controls: List["Control"], catalog: "CatalogModel"
+) -> Iterator[str]:
+    for control in controls:
+        yield json.dumps(resolve_control(control, catalog)) + "\n"
+
+
+def catalog_etag(catalog_id: int, **kwargs) -> str:
+    catalog = CatalogFile.query.get_or_404(catalog_id)
+    return make_etag(file_hash(catalog.filename), catalog.id, catalog.updated_on)
+
+
+def catalog_fragment_parts(catalog: CatalogFile) -> tuple:
+    return file_hash(catalog.filename), catalog.updated_on
+
+
+def lazy_tree() -> bool:
+    """
+    Whether catalog pages only render the groups and load their controls on expand.
+    """
+    if "lazy" in request.args:
+        return request.args.get("lazy") not in ("0", "false")
+    return current_app.config.get("CATALOG_LAZY_TREE", False)
+
+
+def group_tree(
+    catalog: "CatalogModel", lazy: bool, selected: Optional[Set[str]] = None
+) -> List:
+    if selected is not None:
+        return catalog.get_groups(selected)
+    return catalog.get_group_summaries() if lazy else catalog.get_groups()
+
+
+def baseline_controls(value: str) -> Iterable[str]:
+    """
+    The control ids of a Catalog, for baseline:<catalog id> filters.
+    """
+    baseline = db.session.get(CatalogFile, int(value)) if value.isdigit() else None
+    if baseline is None:
+        raise FilterError(f"baseline:{value} is not a Catalog id.")
+    return load_catalog(baseline.filename).controls_index
+
+
+def control_filter(get_catalog: Callable[[], "CatalogModel"]) -> Optional[Set[str]]:
+    """
+    The ids of the controls matching the ?filter= of the request, or None without
+    a filter. An invalid filter is flashed and ignored.
+    """
+    expression = request.args.get("filter", "").strip()
+    if not expression:
+        return None
+    try:
+        return set(get_catalog().filter_index.match(expression, baseline_controls))
+    except FilterError as exc:
+        flash(str(exc), "error")
+        return None
+
+
+def group_controls(catalog: "CatalogModel", group_id: str) -> dict:
+    group = catalog.get_group_by_id(group_id)
+    if not group:
+        abort(404)
+    return {
+        "group_id": group.id,
+        "title": group.title,
+        "controls": catalog.get_group_controls(group.controls or []),
+    }
+
+
+def import_catalog(
+    job: Job,
+    title: str,
+    description: str,
+    source: str,
+    filepath: str,
+    pin: Optional[str] = None,
+) -> dict:
+    """
+    Job that validates, parses and saves an uploaded Catalog file. A file that is
+    already used by a Catalog was checked when it was first uploaded. The pin of
+    the upload is dropped when the job is done, and the file released if the
+    Catalog was not saved.
+    """
+    from app.catalogs.diff import write_hashes
+    from app.oscal.validator import OscalValidator
+
+    try:
+        if CatalogFile.references(filepath):
+            job.report(80, "The catalog file was already uploaded, saving the catalog")
+        else:
+            job.report(10, "Validating the catalog file")
+            with open_blob(filepath) as file:
+                OscalValidator(file, "oscal_catalog_schema.json").validate_file()
+            job.report(50, "Loading the catalog")
+            load_catalog(filepath)
+            write_hashes(filepath)
+            job.report(80, "Saving the catalog")
+        catalog = CatalogFile(
+            title=title,
+            description=description,
+            source=source,
+            filename=filepath,
+        )
+        db.session.add(catalog)
+        try:
+            db.session.commit()
+        except db.exc.IntegrityError as exc:
+            db.session.rollback()
+            raise ValueError(f"Catalog {title} already exists.") from exc
+    finally:
+        unpin_blob(filepath, pin)
+        release_blob(filepath, partial(CatalogFile.references, filepath))
+    return {"endpoint": "catalogs.catalog_view", "values": {"catalog_id": catalog.id}}
+
+
+def export_catalog(job: Job, catalog_id: int):
+    """
+    Job that writes the resolved Controls of a Catalog to a JSON Lines file.
+    """
+    catalog_data = CatalogFile.query.get_or_404(catalog_id)
+    job.report(10, f"Loading {catalog_data.title}")
+    catalog = load_catalog(catalog_data.filename)
+    controls = catalog.sorted_controls()
+
+    export_directory = Path(current_app.config["UPLOAD_FOLDER"]).joinpath("exports")
+    export_directory.mkdir(parents=True, exist_ok=True)
+    filepath = export_directory.joinpath(
+        f"{secure_filename(catalog_data.title)}-{job.id}.jsonl"
+    )
+    with open(filepath, "w") as file:
+        for count, line in enumerate(stream_controls(controls, catalog), 1):
+            file.write(line)
+            if count % 100 == 0:
+                job.report(
+                    10 + count * 90 // len(controls),
+                    f"Exported {count} of {len(controls)} controls",
+                )
+    job.filename = filepath.as_posix()
+
+
+def import_catalog_archive(job: Job, archive: str) -> dict:
+    """
+    Job that imports the Catalog files of an uploaded zip archive.
+    """
+    from app.catalogs.importer import import_catalogs
+
+    try:
+        results = import_catalogs(
+            [archive],
+            Path(current_app.config["UPLOAD_FOLDER"]).joinpath("catalogs"),
+            workers=current_app.config.get("IMPORT_WORKERS"),
+            compression=current_app.config.get("STORAGE_COMPRESSION"),
+            max_size=current_app.config.get("IMPORT_MAX_SIZE"),
+            report=job.report,
+        )
+    finally:
+        Path(archive).unlink(missing_ok=True)
+    imported = sum(result["status"] == "imported" for result in results)
+    job.message = f"Imported {imported} of {len(results)} catalog files."
+    return {"endpoint": "catalogs.catalogs_list", "values": {}, "files": results}
+
+
+def resolve_catalog_profile(
+    job: Job,
+    catalog_id: int,
+    title: Optional[str],
+    profile_path: str,
+    overwrite: bool = False,
+) -> dict:
+    """
+    Job that resolves an uploaded OSCAL profile against a Catalog.
+    """
+    from app.catalogs.profiles import resolve_profile
+
+    source = CatalogFile.query.get_or_404(catalog_id)
+    try:
+        catalog, status = resolve_profile(
+            Path(profile_path),
+            source,
+            Path(current_app.config["UPLOAD_FOLDER"]).joinpath("catalogs"),
+            title=title,
+            compression=current_app.config.get("STORAGE_COMPRESSION"),
+            report=job.report,
+            overwrite=overwrite,
+        )
+    finally:
+        Path(profile_path).unlink(missing_ok=True)
+    job.message = f"Catalog {catalog.title} {status}."
+    return {"endpoint": "catalogs.catalog_view", "values": {"catalog_id": catalog.id}}
+
+
+def migrate_catalog_components(
+    job: Job,
+    catalog_id: int,
+    target_id: int,
+    component_ids: List[int],
+    crosswalk_path: Optional[str] = None,
+) -> dict:
+    """
+    Job that migrates the implementations of Components to another Catalog.
+    """
+    from app.components.migration import migrate_components
+
+    catalog_data = CatalogFile.query.get_or_404(catalog_id)
+    target = CatalogFile.query.get_or_404(target_id)
+    components = (
+        ComponentFile.query.filter(ComponentFile.id.in_(component_ids))
+        .order_by(ComponentFile.title)
+        .all()
+    )
+    try:
+        results = migrate_components(
+            components,
+            catalog_data,
+            target,
+            Path(crosswalk_path) if crosswalk_path else None,
+            workers=current_app.config.get("MIGRATE_WORKERS"),
+            report=job.report,
+        )
+    finally:
+        if crosswalk_path:
+            Path(crosswalk_path).unlink(missing_ok=True)
+    migrated = sum(result["status"] == "migrated" for result in results)
+    job.message = f"Migrated {migrated} of {len(results)} components to {target.title}."
+    return {
+        "endpoint": "catalogs.catalog_view",
+        "values": {"catalog_id": target.id},
+        "components": results,
+    }
+
+
 def catalog_block():
-    catalogs = CatalogFile.query.all()
+    catalogs = (
+        CatalogFile.query.options(db.load_only(CatalogFile.id, CatalogFile.title))
+        .order_by(CatalogFile.updated_on.desc(), CatalogFile.id.desc())
+        .limit(current_app.config.get("RECENT_SIZE", 10))
+        .all()
+    )
     return catalogs
 
 
 @bp.route("/")
+@read_only
 def catalogs_list():
-    catalogs = CatalogFile.query.all()
+    page = paginate(
+        CatalogFile.query.options(
+            db.load_only(
+                CatalogFile.id,
+                CatalogFile.title,
+                CatalogFile.description,
+                CatalogFile.created_on,
+                CatalogFile.updated_on,
+            )
+        ),
+        CatalogFile,
+        sort=request.args.get("sort", "title"),
+        after=request.args.get("after"),
+        per_page=current_app.config.get("PAGE_SIZE", 50),
+    )
+    catalogs = page.items
 
-    if not catalogs:
+    if not catalogs and not request.args.get("after"):
         flash(
             message="There are no Catalogs installed. Click the link below to upload one.",
             category="message",
         )
 
     try:
-        return render_template("catalogs/list.html", catalogs=catalogs)
+        return render_template("catalogs/list.html", catalogs=catalogs, page=page)
     except TemplateNotFound:
         abort(404)
 
 
 @bp.route("/create", methods=["GET", "POST"])
 def catalog_create():
+    from app.catalogs.forms import CatalogForm
+
     form = CatalogForm()
     if request.method == "POST":
-        error = None
         if form.validate_on_submit():
             title = form.title.data
             description = form.description.data
             source = form.source.data
             file = form.catalog_file.data
             if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
                 upload_directory = Path(current_app.config["UPLOAD_FOLDER"]).joinpath(
                     "catalogs"
                 )
-                if not upload_directory.is_dir():
-                    upload_directory.mkdir(parents=True, exist_ok=False)
-                filepath = upload_directory.joinpath(filename).as_posix()
-                request.files["catalog_file"].save(filepath)
-                try:
-                    catalog = CatalogFile(
-                        title=title,
-                        description=description,
-                        source=source,
-                        filename=filepath,
-                    )
-                    db.session.add(catalog)
-                    db.session.commit()
-                except db.SQLAlchemyError as exc:
-                    error = f"Catalog {title} already exists: {exc}"
-                else:
-                    flash(f"Catalog {title} created.", "message")
-                    return redirect(
-                        url_for("catalogs.catalog_view", catalog_id=catalog.id)
-                    )
-        flash(error)
+                # The file may be shared with a concurrent upload of the same
+                # content, the pin keeps it until this job is done.
+                pin = uuid4().hex
+                filepath = save_blob(
+                    file.stream,
+                    upload_directory,
+                    compression=current_app.config.get("STORAGE_COMPRESSION"),
+                    pin=pin,
+                )
+                write_variants(filepath)
+                filepath = filepath.as_posix()
+                # Validating and parsing a large catalog takes longer than a request
+                # should, the job page reports its progress.
+                job = job_queue.submit(
+                    "import_catalog",
+                    import_catalog,
+                    title,
+                    description,
+                    source,
+                    filepath,
+                    pin,
+                )
+                flash(f"Importing Catalog {title}.", "message")
+                return redirect(url_for("jobs.job_view", job_id=job.id))
+            flash(f"{file.filename} is not a JSON file.", "error")
     try:
         return render_template(
             "catalogs/create_form.html", form=form, title="Add Catalog"
@@ -105,19 +474,365 @@ def catalog_create():
         abort(404)
 
 
+@bp.route("/import", methods=["GET", "POST"])
+def catalog_import():
+    from app.catalogs.forms import CatalogArchiveForm
+
+    form = CatalogArchiveForm()
+    if request.method == "POST" and form.validate_on_submit():
+        file = form.archive.data
+        upload_directory = Path(current_app.config["UPLOAD_FOLDER"]).joinpath("imports")
+        upload_directory.mkdir(parents=True, exist_ok=True)
+        archive = upload_directory.joinpath(f"{uuid4()}.zip")
+        file.save(archive)
+        if not zipfile.is_zipfile(archive):
+            archive.unlink()
+            flash(f"{file.filename} is not a zip archive.", "error")
+        else:
+            job = job_queue.submit(
+                "import_catalogs", import_catalog_archive, archive.as_posix()
+            )
+            flash(f"Importing the Catalogs in {file.filename}.", "message")
+            return redirect(url_for("jobs.job_view", job_id=job.id))
+    return render_template(
+        "catalogs/import_form.html", form=form, title="Import Catalogs"
+    )
+
+
+@bp.route("/profile", methods=["GET", "POST"])
+def catalog_profile():
+    from app.catalogs.forms import ProfileForm
+
+    form = ProfileForm()
+    form.catalog_id.choices = [
+        (catalog.id, catalog.title)
+        for catalog in CatalogFile.query.options(
+            db.load_only(CatalogFile.id, CatalogFile.title)
+        ).order_by(CatalogFile.title)
+    ]
+    if request.method == "POST" and form.validate_on_submit():
+        file = form.profile.data
+        upload_directory = Path(current_app.config["UPLOAD_FOLDER"]).joinpath("imports")
+        upload_directory.mkdir(parents=True, exist_ok=True)
+        profile_path = upload_directory.joinpath(f"{uuid4()}.json")
+        file.save(profile_path)
+        job = job_queue.submit(
+            "resolve_profile",
+            resolve_catalog_profile,
+            form.catalog_id.data,
+            form.title.data or None,
+            profile_path.as_posix(),
+            form.overwrite.data,
+        )
+        flash(f"Resolving the profile {file.filename}.", "message")
+        return redirect(url_for("jobs.job_view", job_id=job.id))
+    return render_template(
+        "catalogs/profile_form.html", form=form, title="Resolve a Profile"
+    )
+
+
 @bp.route("/<int:catalog_id>", methods=["GET"])
+@read_only
+@conditional(catalog_etag)
 def catalog_view(catalog_id: int):
     catalog_data = CatalogFile.query.get_or_404(catalog_id)
-    catalog = CatalogModel.from_json(catalog_data.filename)
-    metadata = catalog.metadata
-    groups = catalog.get_groups()
+    lazy = lazy_tree()
+    parts = (*catalog_fragment_parts(catalog_data), lazy)
+
+    @cache
+    def get_catalog() -> "CatalogModel":
+        return load_catalog(catalog_data.filename)
+
+    page_title = fragment_cache.get_or_set(
+        fragment_cache.key(catalog_id, "title", *parts[:2]),
+        lambda: get_catalog().metadata.title,
+    )
+    # Filtered trees are not cached, there are as many as there are filters.
+    selected = control_filter(get_catalog)
+    lazy = lazy and selected is None
+
+    def context() -> dict:
+        return {
+            "metadata": get_catalog().metadata,
+            "groups": group_tree(get_catalog(), lazy, selected),
+            "catalog": catalog_data,
+            "lazy": lazy,
+        }
+
+    if selected is None:
+        catalog_body = fragment_cache.stream(
+            "catalogs/catalog_body.html", catalog_id, parts, context
+        )
+    else:
+        catalog_body = stream_template("catalogs/catalog_body.html", **context())
+    return stream_page(
+        "catalogs/catalog.html",
+        page_title=page_title,
+        catalog_body=catalog_body,
+        catalog=catalog_data,
+        lazy=lazy,
+    )
+
+
+@bp.route("/<int:catalog_id>/group/<string:group_id>", methods=["GET"])
+@read_only
+@conditional(catalog_etag)
+def catalog_group(catalog_id: int, group_id: str):
+    """
+    The controls of a single group, loaded when the group is expanded.
+    """
+    catalog_data = CatalogFile.query.get_or_404(catalog_id)
+    return fragment_cache.render(
+        "catalogs/group_controls.html",
+        catalog_id,
+        (*catalog_fragment_parts(catalog_data), group_id),
+        lambda: {
+            "group": group_controls(load_catalog(catalog_data.filename), group_id),
+            "catalog": catalog_data,
+        },
+    )
+
+
+@bp.route("/<int:catalog_id>/controls", methods=["GET"])
+@read_only
+def catalog_controls(catalog_id: int):
+    """
+    Stream the resolved Controls of a Catalog as JSON Lines. Controls can be
+    selected with ?ids=ac-1,ac-2, ?family=ac, ?baseline=<catalog_id> or a
+    ?filter= such as family:ac AND NOT prop:status=withdrawn.
+    """
+    catalog_data = CatalogFile.query.get_or_404(catalog_id)
+    # Ids may be typed as printed, such as AC-2(1) for ac-2.1.
+    control_ids = [
+        ids.control_id
+        for ids in normalize_control_ids(
+            control_id
+            for value in request.args.getlist("ids")
+            for control_id in value.split(",")
+            if control_id.strip()
+        )
+    ]
+    baseline = None
+    if baseline_id := request.args.get("baseline", type=int):
+        baseline_data = CatalogFile.query.get_or_404(baseline_id)
+        baseline = load_catalog(baseline_data.filename)
+    catalog = load_catalog(catalog_data.filename)
+    controls = select_controls(
+        catalog,
+        control_ids,
+        family=request.args.get("family", ""),
+        baseline=baseline,
+    )
+    if expression := request.args.get("filter", "").strip():
+        try:
+            selected = set(catalog.filter_index.match(expression, baseline_controls))
+        except FilterError as exc:
+            abort(400, str(exc))
+        controls = [control for control in controls if control.id in selected]
+    return Response(
+        stream_with_context(stream_controls(controls, catalog)),
+        mimetype="application/x-ndjson",
+    )
+
+
+@bp.route("/<int:catalog_id>/coverage", methods=["GET"])
+@read_only
+def catalog_coverage(catalog_id: int):
+    """
+    Which controls of a Catalog each Component implements, with the coverage of
+    every family and the controls no Component implements.
+    """
+    catalog_data = CatalogFile.query.get_or_404(catalog_id)
+    components = (
+        ComponentFile.query.options(
+            db.load_only(ComponentFile.id, ComponentFile.title, ComponentFile.filename)
+        )
+        .order_by(ComponentFile.title)
+        .all()
+    )
+    catalog = load_catalog(catalog_data.filename)
+    coverage = coverage_matrix.coverage(catalog_data, catalog, components)
+    return render_template(
+        "catalogs/coverage.html",
+        catalog=catalog_data,
+        coverage=coverage,
+        components=components,
+    )
+
+
+def aggregate_implementations(catalog_id: int) -> Tuple[CatalogFile, List, List]:
+    """
+    The Catalog, the Components selected with ?components=1,2 (all of them by
+    default) and their implementations of the Catalog's controls.
+    """
+    catalog_data = CatalogFile.query.get_or_404(catalog_id)
+    query = ComponentFile.query.options(
+        db.load_only(ComponentFile.id, ComponentFile.title, ComponentFile.filename)
+    )
+    component_ids = [
+        int(component_id)
+        for value in request.args.getlist("components")
+        for component_id in value.split(",")
+        if component_id.strip().isdigit()
+    ]
+    if component_ids:
+        query = query.filter(ComponentFile.id.in_(component_ids))
+    components = query.order_by(ComponentFile.title, ComponentFile.id).all()
+    controls = aggregator.aggregate(
+        catalog_data, load_catalog(catalog_data.filename), components
+    )
+    return catalog_data, components, controls
+
+
+@bp.route("/<int:catalog_id>/implementations", methods=["GET"])
+@read_only
+def catalog_implementations(catalog_id: int):
+    catalog_data, components, controls = aggregate_implementations(catalog_id)
     return render_template(
-        "catalogs/catalog.html", metadata=metadata, groups=groups, catalog=catalog_data
+        "catalogs/implementations.html",
+        catalog=catalog_data,
+        components=components,
+        controls=controls,
     )
 
 
+@bp.route("/<int:catalog_id>/implementations/export", methods=["GET"])
+@read_only
+def catalog_implementations_export(catalog_id: int):
+    """
+    The aggregated implementations as JSON Lines, one control per line.
+    """
+    catalog_data, _, controls = aggregate_implementations(catalog_id)
+    return Response(
+        (json.dumps(control) + "\n" for control in controls),
+        mimetype="application/x-ndjson",
+        headers={
+            "Content-Disposition": "attachment; filename="
+            f"{secure_filename(catalog_data.title)}-implementations.jsonl"
+        },
+    )
+
+
+@bp.route("/<int:catalog_id>/diff", methods=["GET"])
+@read_only
+def catalog_diff(catalog_id: int):
+    """
+    The controls added, removed, withdrawn and changed in the Catalog chosen with
+    ?to=<id>, such as a new revision, and the Components they affect.
+    """
+    from app.catalogs.diff import diff_catalog_files
+
+    catalog_data = CatalogFile.query.get_or_404(catalog_id)
+    catalogs = (
+        CatalogFile.query.options(db.load_only(CatalogFile.id, CatalogFile.title))
+        .filter(CatalogFile.id != catalog_id)
+        .order_by(CatalogFile.title)
+        .all()
+    )
+    target, diff, affected = None, None, []
+    if to := request.args.get("to", type=int):
+        target = CatalogFile.query.get_or_404(to)
+        components = ComponentFile.query.options(
+            db.load_only(ComponentFile.id, ComponentFile.title, ComponentFile.filename)
+        ).order_by(ComponentFile.title)
+        diff, affected = diff_catalog_files(catalog_data, target, components)
+    return render_template(
+        "catalogs/diff.html",
+        catalog=catalog_data,
+        catalogs=catalogs,
+        target=target,
+        diff=diff,
+        affected=affected,
+    )
+
+
+@bp.route("/<int:catalog_id>/migrate", methods=["GET", "POST"])
+def catalog_migrate(catalog_id: int):
+    """
+    Move the implementations of Components from this Catalog to another, such as
+    a new revision.
+    """
+    from app.catalogs.forms import MigrateForm
+
+    catalog_data = CatalogFile.query.get_or_404(catalog_id)
+    components = (
+        ComponentFile.query.options(
+            db.load_only(ComponentFile.id, ComponentFile.title, ComponentFile.filename)
+        )
+        .order_by(ComponentFile.title)
+        .all()
+    )
+    form = MigrateForm(target_id=request.args.get("to", type=int))
+    form.target_id.choices = [
+        (catalog.id, catalog.title)
+        for catalog in CatalogFile.query.options(
+            db.load_only(CatalogFile.id, CatalogFile.title)
+        )
+        .filter(CatalogFile.id != catalog_id)
+        .order_by(CatalogFile.title)
+    ]
+    form.component_ids.choices = [
+        (component.id, component.title) for component in components
+    ]
+    if request.method == "GET":
+        # The Components that implement controls of the Catalog.
+        form.component_ids.data = [
+            component.id
+            for component in components
+            if coverage_matrix.controls(component).get(catalog_data.source)
+        ]
+    if request.method == "POST" and form.validate_on_submit():
+        crosswalk_path = None
+        if file := form.crosswalk.data:
+            suffix = Path(file.filename).suffix.lower()
+            if suffix not in (".csv", ".xlsx", ".json"):
+                flash(f"{file.filename} is not a CSV, XLSX or JSON file.", "error")
+                return render_template(
+                    "catalogs/migrate_form.html", form=form, catalog=catalog_data
+                )
+            upload_directory = Path(current_app.config["UPLOAD_FOLDER"]).joinpath(
+                "imports"
+            )
+            upload_directory.mkdir(parents=True, exist_ok=True)
+            crosswalk_path = upload_directory.joinpath(f"{uuid4()}{suffix}")
+            file.save(crosswalk_path)
+            crosswalk_path = crosswalk_path.as_posix()
+        job = job_queue.submit(
+            "migrate_components",
+            migrate_catalog_components,
+            catalog_id,
+            form.target_id.data,
+            form.component_ids.data,
+            crosswalk_path,
+        )
+        flash(f"Migrating {len(form.component_ids.data)} Components.", "message")
+        return redirect(url_for("jobs.job_view", job_id=job.id))
+    return render_template(
+        "catalogs/migrate_form.html", form=form, catalog=catalog_data
+    )
+
+
+@bp.route("/<int:catalog_id>/export", methods=["GET"])
+def catalog_export(catalog_id: int):
+    catalog = CatalogFile.query.get_or_404(catalog_id)
+    job = job_queue.submit("export_catalog", export_catalog, catalog.id)
+    flash(f"Exporting the Controls of {catalog.title}.", "message")
+    return redirect(url_for("jobs.job_view", job_id=job.id))
+
+
+@bp.route("/<int:catalog_id>/download", methods=["GET"])
+def catalog_download(catalog_id: int):
+    catalog = CatalogFile.query.get_or_404(catalog_id)
+    path = Path(catalog.filename)
+    if not path.is_file():
+        abort(404)
+    return send_stored(path, f"{secure_filename(catalog.title)}.json")
+
+
 @bp.route("/<int:catalog_id>/update", methods=["GET", "POST"])
 def catalog_update(catalog_id: int):
+    from app.catalogs.forms import UpdateCatalogForm
+
     form = UpdateCatalogForm()
     catalog = CatalogFile.query.get_or_404(catalog_id)
 
@@ -130,9 +845,11 @@ def catalog_update(catalog_id: int):
             try:
                 db.session.add(catalog)
                 db.session.commit()
-            except db.IntegrityError:
+            except db.exc.IntegrityError:
+                db.session.rollback()
                 flash(f"Catalog {catalog_id} update failed.")
             else:
+                fragment_cache.invalidate(catalog_id)
                 flash(f"Catalog {catalog.title} has been updated.")
                 return redirect(url_for("catalogs.catalog_view", catalog_id=catalog_id))
     form.title.data = catalog.title
@@ -151,28 +868,51 @@ def catalog_delete(catalog_id: int):
     catalog = CatalogFile.query.get_or_404(catalog_id)
     db.session.delete(catalog)
     db.session.commit()
-    Path(catalog.filename).unlink()
+    release_blob(catalog.filename, partial(CatalogFile.references, catalog.filename))
+    fragment_cache.invalidate(catalog_id)
     flash(f"Catalog {catalog.title} has been deleted.")
     return redirect((url_for("catalogs.catalogs_list")))
 
 
 @bp.route("/<int:catalog_id>/control/<string:control_id>", methods=["GET"])
+@read_only
+@conditional(catalog_etag)
 def control_view(catalog_id: int, control_id: str):
     catalog_data = CatalogFile.query.get_or_404(catalog_id)
-    catalog = CatalogModel.from_json(catalog_data.filename)
-    group = catalog.get_group(control_id)
-    control = catalog.get_control(control_id)
-    guidance = control.guidance
-    parameters = control.parameters
-    statement = control.statement
-    statements = replace_odps(statement, parameters)
-    links = get_control_links(control.links, catalog.back_matter)
+    parts = (*catalog_fragment_parts(catalog_data), control_id)
+
+    @cache
+    def load_control() -> Tuple["Control", "CatalogModel"]:
+        catalog = load_catalog(catalog_data.filename)
+        control = catalog.get_control(control_id)
+        if not control:
+            abort(404)
+        return control, catalog
+
+    def control_context() -> dict:
+        control, catalog = load_control()
+        return {
+            "control": control,
+            "links": get_control_links(control.links, catalog.back_matter),
+            "statement": replace_odps(control.statement, control.parameters),
+            "catalog": catalog_data,
+            "guidance": control.guidance,
+            "group": catalog.get_group(control_id),
+        }
+
+    def title() -> str:
+        control, _ = load_control()
+        return f"{control.id.upper()}: {control.title}"
+
+    control_title = fragment_cache.get_or_set(
+        fragment_cache.key(catalog_id, "control_title", *parts), title
+    )
+    control_body = fragment_cache.render(
+        "catalogs/control_body.html", catalog_id, parts, control_context
+    )
     return render_template(
         "catalogs/control.html",
-        control=control,
-        links=links,
-        statement=statements,
+        control_title=control_title,
+        control_body=control_body,
         catalog=catalog_data,
-        guidance=guidance,
-        group=group,
     )
@@ -1,8 +1,16 @@
 from flask_wtf import FlaskForm
-from wtforms import FileField, HiddenField, SelectField, StringField, TextAreaField
+from wtforms import (
+    FileField,
+    HiddenField,
+    MultipleFileField,
+    SelectField,
+    SelectMultipleField,
+    StringField,
+    TextAreaField,
+)
 from wtforms.validators import InputRequired, length
 
-from app.oscal.component import ComponentTypeEnum
+from app.oscal.enums import ComponentTypeEnum, ConflictPolicyEnum
 from app.oscal.validator import OscalValidator
 
 
@@ -61,3 +69,37 @@ class ComponentAddForm(FlaskForm):
         validators=[InputRequired()],
         render_kw={"id": "add-component"},
     )
+
+
+class NarrativesForm(FlaskForm):
+    catalog_id = SelectField("Catalog", coerce=int, validators=[InputRequired()])
+    narratives = FileField(
+        "CSV or XLSX file of control narratives",
+        validators=[InputRequired()],
+        render_kw={
+            "type": "file",
+            "accept": ".csv,.xlsx",
+            "required": "required",
+        },
+    )
+
+
+class MergeForm(FlaskForm):
+    component_ids = SelectMultipleField("Components", coerce=int)
+    definitions = MultipleFileField(
+        "OSCAL component definition JSON files",
+        render_kw={
+            "type": "file",
+            "accept": ".json",
+        },
+    )
+    policy = SelectField(
+        "When values differ",
+        choices=[
+            (ConflictPolicyEnum.first.value, "Keep the values of this Component"),
+            (ConflictPolicyEnum.last.value, "Take the values merged last"),
+            (ConflictPolicyEnum.combine.value, "Combine the narratives"),
+            (ConflictPolicyEnum.error.value, "Stop and list the differences"),
+        ],
+        default=ConflictPolicyEnum.first.value,
+    )
@@ -0,0 +1,273 @@
+import codecs
+import csv
+import json
+import re
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import IO, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.oscal.control_ids import normalize_control_ids
+
+# Accepted spellings of the columns of a narratives spreadsheet.
+COLUMNS = {
+    "control_id": ("control_id", "control", "id"),
+    "statement": ("statement", "part", "statement_part", "statement_id"),
+    "narrative": ("narrative", "description", "implementation"),
+    "responsibility": ("responsibility", "security_control_type", "control_type"),
+    "provider": ("provider",),
+}
+BATCH_SIZE = 1000
+MAX_ERRORS = 500
+
+
+def column_index(header: Tuple) -> Dict[str, int]:
+    names = [re.sub(r"[\s-]+", "_", str(name or "").strip().lower()) for name in header]
+    index = {}
+    for column, spellings in COLUMNS.items():
+        for spelling in spellings:
+            if spelling in names:
+                index[column] = names.index(spelling)
+                break
+    if "control_id" not in index or "narrative" not in index:
+        raise ValueError(
+            "The first row must name a control_id and a narrative column, found: "
+            + ", ".join(name for name in names if name)
+        )
+    return index
+
+
+def read_csv(stream: IO[bytes]) -> Iterator[Tuple]:
+    reader = codecs.getreader("utf-8-sig")(stream)
+    yield from (tuple(row) for row in csv.reader(reader))
+
+
+def read_xlsx(stream: IO[bytes]) -> Iterator[Tuple]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise ValueError(
+            "Importing XLSX files needs the openpyxl package: pip install openpyxl"
+        ) from exc
+
+    # Read only mode streams the rows instead of loading the whole sheet.
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def read_rows(stream: IO[bytes], filename: str) -> Iterator[Tuple]:
+    if Path(filename).suffix.lower() == ".xlsx":
+        return read_xlsx(stream)
+    return read_csv(stream)
+
+
+def cell(row: Tuple, index: Dict[str, int], column: str) -> str:
+    position = index.get(column)
+    if position is None or position >= len(row) or row[position] is None:
+        return ""
+    return str(row[position]).strip()
+
+
+def row_statement_id(control_id: str, statement: str) -> str:
+    """
+    The statement id of a statement cell: a full OSCAL statement id such as
+    ac-2_smt.a is kept, a part label such as a, a.1 or (a)(1) is appended to the
+    statement id of the control.
+    """
+    statement = statement.strip().lower()
+    if "_smt" in statement:
+        return statement
+    part = ".".join(re.findall(r"[a-z0-9]+", statement))
+    return f"{control_id}_smt.{part}" if part else f"{control_id}_smt"
+
+
+@dataclass
+class Narratives:
+    """
+    Narratives read from the rows of a spreadsheet, keyed by control id and
+    statement id so later rows replace earlier ones. Only the keyed narratives are
+    kept, not the rows, and at most MAX_ERRORS row errors.
+    """
+
+    controls: Optional[Set[str]] = None
+    requirements: Dict[str, dict] = field(default_factory=dict)
+    errors: List[dict] = field(default_factory=list)
+    error_count: int = 0
+    rows: int = 0
+    duplicates: int = 0
+
+    def error(self, row: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def read(self, rows: Iterator[Tuple]):
+        try:
+            index = column_index(next(rows))
+        except StopIteration:
+            raise ValueError("The file is empty.")
+        number = 1
+        while batch := list(islice(rows, BATCH_SIZE)):
+            raw_ids = [cell(row, index, "control_id") for row in batch]
+            for row, raw_id, ids in zip(batch, raw_ids, normalize_control_ids(raw_ids)):
+                number += 1
+                if not any(row):
+                    continue
+                self.rows += 1
+                control_id, statement_id = ids
+                if statement := cell(row, index, "statement"):
+                    raw_id = f"{raw_id} {statement}"
+                    statement_id = row_statement_id(control_id, statement)
+                self.add(number, row, index, raw_id, control_id, statement_id)
+
+    def add(
+        self,
+        number: int,
+        row: Tuple,
+        index: Dict[str, int],
+        raw_id: str,
+        control_id: str,
+        statement_id: str,
+    ):
+        if not control_id:
+            return self.error(number, "The control id is empty.")
+        if self.controls is not None and control_id not in self.controls:
+            return self.error(number, f"{raw_id} is not a control of the catalog.")
+        narrative = cell(row, index, "narrative")
+        if not narrative:
+            return self.error(number, f"The narrative of {raw_id} is empty.")
+
+        requirement = self.requirements.setdefault(
+            control_id, {"description": None, "statements": {}, "props": {}}
+        )
+        if statement_id == f"{control_id}_smt":
+            if requirement["description"] is not None:
+                self.duplicates += 1
+            requirement["description"] = narrative
+        else:
+            if statement_id in requirement["statements"]:
+                self.duplicates += 1
+            requirement["statements"][statement_id] = narrative
+        for name, column in (
+            ("security_control_type", "responsibility"),
+            ("provider", "provider"),
+        ):
+            if value := cell(row, index, column):
+                requirement["props"][name] = value
+
+    def apply(self, implementation) -> int:
+        """
+        Merge the narratives into a ControlImplementation, updating the implemented
+        requirements that exist. Returns the number of requirements added.
+        """
+        from app.oscal.component import ImplementedRequirement, Statement
+        from app.oscal.oscal import Property
+
+        existing = {ir.control_id: ir for ir in implementation.implemented_requirements}
+        added = 0
+        for control_id, narratives in self.requirements.items():
+            requirement = existing.get(control_id)
+            if requirement is None:
+                requirement = ImplementedRequirement(
+                    control_id=control_id, description=narratives["description"] or ""
+                )
+                implementation.implemented_requirements.append(requirement)
+                added += 1
+            elif narratives["description"] is not None:
+                requirement.description = narratives["description"]
+
+            statements = {s.statement_id: s for s in requirement.statements or []}
+            for statement_id, narrative in narratives["statements"].items():
+                if statement_id in statements:
+                    statements[statement_id].description = narrative
+                else:
+                    statements[statement_id] = Statement(
+                        statement_id=statement_id, description=narrative
+                    )
+            if statements:
+                requirement.statements = list(statements.values())
+
+            props = {p.name: p for p in requirement.props or []}
+            for name, value in narratives["props"].items():
+                if name in props:
+                    props[name].value = value
+                else:
+                    props[name] = Property(name=name, value=value)
+            if props:
+                requirement.props = list(props.values())
+        return added
+
+
+def schema_errors(definition) -> List[str]:
+    from app.oscal.validator import compiled_validator
+
+    document = json.loads(definition.json(by_alias=True, exclude_none=True))
+    validator = compiled_validator("oscal_component_schema.json")
+    return [
+        f"{'/'.join(str(p) for p in error.absolute_path)}: {error.message}"
+        for error in islice(validator.iter_errors(document), MAX_ERRORS)
+    ]
+
+
+def import_narratives(
+    component_file,
+    catalog_file,
+    path: Path,
+    report: Optional[Callable[[int, str], None]] = None,
+) -> dict:
+    """
+    Import the control narratives of a CSV or XLSX file into the first component of
+    a Component, in the control implementation of the Catalog. The rows are read as
+    a stream, the merged Component is validated against the OSCAL schema and the
+    file is written once. Rows that cannot be imported are reported and skipped.
+    """
+    from app.oscal.component import ControlImplementation
+    from app.oscal.loader import load_catalog, load_component
+
+    report = report or (lambda progress, message: None)
+    report(5, f"Loading {catalog_file.title}")
+    narratives = Narratives(
+        controls=set(load_catalog(catalog_file.filename).controls_index)
+    )
+
+    report(10, f"Reading {path.name}")
+    with open(path, "rb") as stream:
+        narratives.read(read_rows(stream, path.name))
+
+    report(60, f"Adding {len(narratives.requirements)} controls")
+    definition = load_component(component_file.filename)
+    component = definition.component_definition.components[0]
+    implementation = next(
+        (
+            ci
+            for ci in component.control_implementations
+            if ci.source == catalog_file.source
+        ),
+        None,
+    )
+    if implementation is None:
+        implementation = ControlImplementation(
+            source=catalog_file.source,
+            description=catalog_file.title,
+            implemented_requirements=[],
+        )
+        component.control_implementations.append(implementation)
+    added = narratives.apply(implementation)
+
+    report(80, "Validating the component")
+    if errors := schema_errors(definition):
+        raise ValueError(
+            f"The imported component is not valid OSCAL: {'; '.join(errors[:5])}"
+        )
+    component_file.write_file(definition)
+    return {
+        "rows": narratives.rows,
+        "controls": len(narratives.requirements),
+        "added": added,
+        "duplicates": narratives.duplicates,
+        "error_count": narratives.error_count,
+        "errors": narratives.errors,
+    }
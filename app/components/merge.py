@@ -0,0 +1,79 @@
+import json
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+from app.extensions import db
+from app.models.components import CatalogFile, ComponentFile
+from app.oscal.enums import ConflictPolicyEnum
+
+
+def read_definition(path: Path):
+    """
+    Parse and validate an uploaded component definition. Files downloaded from the
+    app use the field names of the models and are only parsed.
+    """
+    from pydantic import ValidationError
+
+    from app.oscal.component import ComponentModel
+    from app.oscal.validator import compiled_validator
+
+    try:
+        document = json.loads(path.read_bytes())
+    except ValueError as exc:
+        raise ValueError(f"{path.name} is not a JSON file: {exc}") from exc
+    if isinstance(document, dict) and "component-definition" in document:
+        validator = compiled_validator("oscal_component_schema.json")
+        if error := next(validator.iter_errors(document), None):
+            raise ValueError(
+                f"{path.name} is not a valid OSCAL component: {error.message}"
+            )
+    try:
+        return ComponentModel(**document)
+    except (TypeError, ValidationError) as exc:
+        raise ValueError(f"{path.name} is not a component definition.") from exc
+
+
+def merge_components(
+    component_file: ComponentFile,
+    sources: Sequence[ComponentFile],
+    uploads: Sequence[Path] = (),
+    policy: ConflictPolicyEnum = ConflictPolicyEnum.first,
+    report: Optional[Callable[[int, str], None]] = None,
+) -> dict:
+    """
+    Merge other Components and uploaded component definitions into a Component.
+    The definitions are merged by key in one pass, and the merged definition is
+    serialized once when the file is written. The Component gets the Catalogs of
+    the control implementations it now has.
+    """
+    from app.oscal.loader import load_component
+    from app.oscal.merge import DefinitionMerger
+
+    report = report or (lambda progress, message: None)
+    merger = DefinitionMerger(policy)
+    merger.add(load_component(component_file.filename))
+    for source in sources:
+        report(10, f"Merging {source.title}")
+        merger.add(load_component(source.filename))
+    for path in uploads:
+        report(40, f"Merging {path.name}")
+        merger.add(read_definition(path))
+    merged = merger.result()
+
+    report(80, "Saving the component")
+    definition = merged.component_definition
+    catalog_sources = {
+        implementation.source
+        for item in [*(definition.components or []), *(definition.capabilities or [])]
+        for implementation in item.control_implementations or []
+    }
+    for catalog in CatalogFile.query.filter(CatalogFile.source.in_(catalog_sources)):
+        if catalog not in component_file.catalogs:
+            component_file.catalogs.append(catalog)
+    component_file.write_file(merged)
+    db.session.commit()
+    return {
+        "definitions": 1 + len(sources) + len(uploads),
+        "conflict_count": merger.conflict_count,
+        "conflicts": merger.conflicts,
+    }
@@ -0,0 +1,353 @@
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import IO, Callable, Dict, List, Optional, Sequence
+from uuid import uuid4
+
+from app.components.importer import cell, read_rows, schema_errors
+from app.oscal.control_ids import oscalize_control_id
+from app.oscal.diff import catalog_controls, is_withdrawn
+
+# Accepted spellings of the columns of a crosswalk spreadsheet.
+CROSSWALK_COLUMNS = {
+    "source": ("source", "from", "old", "rev4", "source_control_id"),
+    "target": ("target", "to", "new", "rev5", "target_control_id"),
+}
+# Links of a withdrawn control to the controls that replace it.
+REPLACED_BY = ("incorporated-into", "moved-to")
+
+
+def crosswalk_index(header) -> Dict[str, int]:
+    names = [str(name or "").strip().lower().replace(" ", "_") for name in header]
+    index = {}
+    for column, spellings in CROSSWALK_COLUMNS.items():
+        for spelling in spellings:
+            if spelling in names:
+                index[column] = names.index(spelling)
+                break
+    if len(index) < len(CROSSWALK_COLUMNS):
+        raise ValueError(
+            "The first row must name a source and a target column, found: "
+            + ", ".join(name for name in names if name)
+        )
+    return index
+
+
+def read_crosswalk(stream: IO[bytes], filename: str) -> Dict[str, List[str]]:
+    """
+    The control ids of a crosswalk file, by the control id they replace. A JSON
+    object maps an id to an id, a list of ids or null; a CSV or XLSX file has a row
+    per source and target, and a row without a target drops the control.
+    """
+    mapping: Dict[str, List[str]] = {}
+    if Path(filename).suffix.lower() == ".json":
+        try:
+            document = json.load(stream)
+        except ValueError as exc:
+            raise ValueError(f"{filename} is not a JSON file: {exc}") from exc
+        if not isinstance(document, dict):
+            raise ValueError(f"{filename} must be an object of control ids.")
+        for source, targets in document.items():
+            if isinstance(targets, str):
+                targets = [targets]
+            mapping[oscalize_control_id(source)] = [
+                oscalize_control_id(target) for target in targets or []
+            ]
+        return mapping
+
+    rows = read_rows(stream, filename)
+    try:
+        index = crosswalk_index(next(rows))
+    except StopIteration:
+        raise ValueError("The file is empty.")
+    for row in rows:
+        if not (source := cell(row, index, "source")):
+            continue
+        targets = mapping.setdefault(oscalize_control_id(source), [])
+        if (target := cell(row, index, "target")) and (
+            target := oscalize_control_id(target)
+        ) not in targets:
+            targets.append(target)
+    return mapping
+
+
+@dataclass
+class Crosswalk:
+    """
+    The control ids of a target catalog that replace each control id, built once
+    for a batch of components. Controls that are in the target catalog map to
+    themselves and withdrawn controls to the controls they were incorporated into
+    or moved to. Ids of a crosswalk file take precedence, and ids that are in
+    neither are dropped.
+    """
+
+    mapping: Dict[str, List[str]] = field(default_factory=dict)
+
+    @classmethod
+    def from_catalog(
+        cls, catalog: dict, overrides: Optional[Dict[str, List[str]]] = None
+    ) -> "Crosswalk":
+        controls = catalog_controls(catalog)
+        replaced_by: Dict[str, List[str]] = {}
+        for control_id, control in controls.items():
+            if is_withdrawn(control):
+                replaced_by[control_id] = [
+                    link["href"].lstrip("#")
+                    for link in control.get("links") or []
+                    if link.get("rel") in REPLACED_BY
+                    and link["href"].lstrip("#") in controls
+                ]
+
+        def resolve(control_id: str, seen: frozenset) -> List[str]:
+            if control_id not in replaced_by:
+                return [control_id]
+            targets: List[str] = []
+            for target in replaced_by[control_id]:
+                if target not in seen:
+                    for resolved in resolve(target, seen | {target}):
+                        if resolved not in targets:
+                            targets.append(resolved)
+            return targets
+
+        mapping = {
+            control_id: resolve(control_id, frozenset([control_id]))
+            for control_id in controls
+        }
+        if overrides:
+            unknown = sorted(
+                {t for targets in overrides.values() for t in targets} - set(controls)
+            )
+            if unknown:
+                raise ValueError(
+                    "The crosswalk maps to controls that are not in the catalog: "
+                    + ", ".join(unknown[:10])
+                )
+            mapping.update(overrides)
+        return cls(mapping)
+
+    def targets(self, control_id: str) -> List[str]:
+        return self.mapping.get(control_id, [])
+
+
+def rename_statement(statement_id: str, control_id: str, target: str) -> str:
+    if statement_id.startswith(f"{control_id}_"):
+        return f"{target}_{statement_id[len(control_id) + 1:]}"
+    return statement_id
+
+
+def copy_requirement(requirement):
+    migrated = requirement.copy(deep=True, update={"uuid": uuid4()})
+    for statement in migrated.statements or []:
+        statement.uuid = uuid4()
+    return migrated
+
+
+def merge_requirement(existing, requirement):
+    """
+    Merge a migrated requirement into the one already implementing its control,
+    as when several controls were incorporated into one.
+    """
+    if requirement.description and requirement.description not in (
+        existing.description or ""
+    ):
+        existing.description = "\n\n".join(
+            filter(None, [existing.description, requirement.description])
+        )
+    statements = {s.statement_id: s for s in existing.statements or []}
+    for statement in requirement.statements or []:
+        if (current := statements.get(statement.statement_id)) is None:
+            statements[statement.statement_id] = statement
+        elif statement.description not in current.description:
+            current.description = "\n\n".join(
+                filter(None, [current.description, statement.description])
+            )
+    if statements:
+        existing.statements = list(statements.values())
+    names = {p.name for p in existing.props or []}
+    if props := [p for p in requirement.props or [] if p.name not in names]:
+        existing.props = [*(existing.props or []), *props]
+
+
+def migrate_implementations(
+    item, source: str, target_source: str, target_title: str, crosswalk: Crosswalk
+) -> dict:
+    """
+    Move the implemented requirements of a component or capability from the
+    control implementation of source to the one of target_source, replacing the
+    control and statement ids with the crosswalk. Returns what was changed.
+    """
+    from app.oscal.component import ControlImplementation
+
+    result = {"requirements": 0, "remapped": 0, "merged": 0, "dropped": []}
+    implementations = item.control_implementations or []
+    old = [ci for ci in implementations if ci.source == source]
+    if not old:
+        return result
+    target = next((ci for ci in implementations if ci.source == target_source), None)
+    if target is None:
+        target = ControlImplementation(
+            source=target_source, description=target_title, implemented_requirements=[]
+        )
+    requirements = {ir.control_id: ir for ir in target.implemented_requirements}
+
+    for implementation in old:
+        for requirement in implementation.implemented_requirements:
+            result["requirements"] += 1
+            control_id = requirement.control_id
+            if not (targets := crosswalk.targets(control_id)):
+                result["dropped"].append(control_id)
+                continue
+            # A control split into several gets a copy of its requirement for each.
+            copies = [requirement] + [
+                copy_requirement(requirement) for _ in targets[1:]
+            ]
+            for target_id, migrated in zip(targets, copies):
+                migrated.control_id = target_id
+                for statement in migrated.statements or []:
+                    statement.statement_id = rename_statement(
+                        statement.statement_id, control_id, target_id
+                    )
+                if target_id != control_id:
+                    result["remapped"] += 1
+                if target_id in requirements:
+                    merge_requirement(requirements[target_id], migrated)
+                    result["merged"] += 1
+                else:
+                    requirements[target_id] = migrated
+
+    target.implemented_requirements = list(requirements.values())
+    item.control_implementations = [
+        ci for ci in implementations if ci.source not in (source, target_source)
+    ] + [target]
+    return result
+
+
+def migrate_file(
+    filename: str,
+    source: str,
+    target_source: str,
+    target_title: str,
+    crosswalk: Crosswalk,
+) -> dict:
+    """
+    Migrate the components and capabilities of a Component file. Runs in a worker
+    process, so it returns the migrated JSON rather than writing the file.
+    """
+    from app.oscal.loader import load_component
+
+    result = {"filename": filename, "status": "failed", "error": None}
+    try:
+        definition = load_component(filename)
+        items = [
+            *(definition.component_definition.components or []),
+            *(definition.component_definition.capabilities or []),
+        ]
+        changes = [
+            migrate_implementations(
+                item, source, target_source, target_title, crosswalk
+            )
+            for item in items
+        ]
+        if errors := schema_errors(definition):
+            raise ValueError(
+                f"The migrated component is not valid OSCAL: {'; '.join(errors[:5])}"
+            )
+    except Exception as exc:
+        result["error"] = str(exc).splitlines()[0] if str(exc) else repr(exc)
+        return result
+
+    result.update(
+        requirements=sum(change["requirements"] for change in changes),
+        remapped=sum(change["remapped"] for change in changes),
+        merged=sum(change["merged"] for change in changes),
+        dropped=sorted({c for change in changes for c in change["dropped"]}),
+    )
+    if result["requirements"]:
+        result.update(status="migrated", document=definition.json(indent=2))
+    else:
+        result["status"] = "skipped"
+    return result
+
+
+def migrate_files(
+    filenames: Sequence[str],
+    source: str,
+    target_source: str,
+    target_title: str,
+    crosswalk: Crosswalk,
+    workers: Optional[int] = None,
+) -> List[dict]:
+    """
+    Migrate Component files in parallel on a pool of processes, one file per task.
+    """
+    migrate = partial(
+        migrate_file,
+        source=source,
+        target_source=target_source,
+        target_title=target_title,
+        crosswalk=crosswalk,
+    )
+    workers = min(workers or os.cpu_count() or 1, len(filenames))
+    if workers <= 1:
+        return [migrate(filename) for filename in filenames]
+    # Spawn rather than fork, the caller may be a threaded web worker.
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        return list(executor.map(migrate, filenames))
+
+
+def migrate_components(
+    components: Sequence,
+    catalog_file,
+    target_file,
+    crosswalk_path: Optional[Path] = None,
+    workers: Optional[int] = None,
+    report: Optional[Callable[[int, str], None]] = None,
+) -> List[dict]:
+    """
+    Migrate the implementations of many Components from a Catalog to another, such
+    as a new revision. The crosswalk is built once, the files are migrated and
+    validated in parallel, and each file that changed is written once. Returns the
+    result of every Component.
+    """
+    from app.catalogs.diff import read_catalog
+    from app.extensions import coverage_matrix, db
+
+    if catalog_file.source == target_file.source:
+        raise ValueError(f"{target_file.title} has the same source as the Catalog.")
+    report = report or (lambda progress, message: None)
+    report(5, f"Building the crosswalk to {target_file.title}")
+    overrides = None
+    if crosswalk_path is not None:
+        with open(crosswalk_path, "rb") as stream:
+            overrides = read_crosswalk(stream, crosswalk_path.name)
+    crosswalk = Crosswalk.from_catalog(read_catalog(target_file.filename), overrides)
+
+    report(10, f"Migrating {len(components)} components")
+    results = migrate_files(
+        [component.filename for component in components],
+        catalog_file.source,
+        target_file.source,
+        target_file.title,
+        crosswalk,
+        workers,
+    )
+
+    report(80, "Saving the components")
+    for component, result in zip(components, results):
+        result["title"] = component.title
+        if (document := result.pop("document", None)) is None:
+            continue
+        component.write_json(document)
+        coverage_matrix.discard(component.id)
+        if catalog_file in component.catalogs:
+            component.catalogs.remove(catalog_file)
+        if target_file not in component.catalogs:
+            component.catalogs.append(target_file)
+    db.session.commit()
+    return results
@@ -1,37 +1,67 @@
+from collections import defaultdict
+from functools import cache
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from uuid import uuid4
 
 from flask import (
     Markup,
     abort,
     current_app,
     flash,
+    g,
     redirect,
     render_template,
     request,
-    send_from_directory,
+    stream_template,
     url_for,
 )
 from jinja2 import TemplateNotFound
+from sqlalchemy.orm.attributes import set_committed_value
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 
+from app.catalogs.routes import (
+    catalog_fragment_parts,
+    control_filter,
+    group_controls,
+    group_tree,
+    lazy_tree,
+)
 from app.components import bp
-from app.components.forms import ComponentForm
-from app.extensions import db
-from app.helpers import allowed_file
-from app.models.components import CatalogFile, ComponentFile
-from app.oscal.catalog import CatalogModel
-from app.oscal.component import (
-    Component,
-    ComponentDefinition,
-    ComponentModel,
-    ControlImplementation,
-    ImplementedRequirement,
-    Metadata,
+from app.extensions import db, fragment_cache, job_queue, read_only
+from app.helpers import (
+    allowed_file,
+    conditional,
+    file_hash,
+    make_etag,
+    send_stored,
+    stream_page,
 )
+from app.models.components import CatalogFile, ComponentFile, component_catalog
+from app.models.jobs import Job
+from app.models.pagination import paginate
+from app.oscal.control_ids import natural_sort_key
+from app.oscal.loader import load_catalog, load_component
+from app.storage import write_variants
+
+if TYPE_CHECKING:
+    from app.oscal.catalog import CatalogModel
+    from app.oscal.component import (
+        Component,
+        ComponentModel,
+        ImplementedRequirement,
+    )
 
 
 def component_create_file(component_file: ComponentFile):
+    from app.oscal.component import (
+        Component,
+        ComponentDefinition,
+        ComponentModel,
+        Metadata,
+    )
+
     components = Component(
         title=component_file.title,
         description=component_file.description,
@@ -47,7 +77,9 @@ def component_create_file(component_file: ComponentFile):
     component_file.write_file(component)
 
 
-def add_implemented_requirement(control_id: str) -> ImplementedRequirement:
+def add_implemented_requirement(control_id: str) -> "ImplementedRequirement":
+    from app.oscal.component import ImplementedRequirement
+
     return ImplementedRequirement(
         control_id=control_id,
         description="Add Control narrative",
@@ -55,29 +87,126 @@ def add_implemented_requirement(control_id: str) -> ImplementedRequirement:
 
 
 def add_implementations(
-    component_data: ComponentFile, catalog_id: int, control_id: str
+    component_data: ComponentFile, catalog_id: int, control_ids: List[str]
 ):
-    definition = ComponentModel.from_json(component_data.filename)
+    """
+    Add implemented requirements for the controls to the first component, in the
+    control implementation of the catalog. Controls already implemented are skipped.
+    """
+    definition = load_component(component_data.filename)
     catalog = CatalogFile.query.get_or_404(catalog_id)
 
     component = definition.component_definition.components[0]
-    implemented_index = check_existing_implementation(
-        catalog.source, component.control_implementations
-    )
-    if implemented_index and implemented_index >= 0:
-        ir = add_implemented_requirement(control_id)
-        component.control_implementations[
-            implemented_index
-        ].implemented_requirements.append(ir)
-    else:
-        component = add_control_implementation(component, catalog, control_id)
+    for control_id in control_ids:
+        implemented_index = check_existing_implementation(
+            catalog.source, component.control_implementations
+        )
+        if implemented_index is not None:
+            requirements = component.control_implementations[
+                implemented_index
+            ].implemented_requirements
+            if not check_existing_control(control_id, requirements):
+                requirements.append(add_implemented_requirement(control_id))
+        else:
+            component = add_control_implementation(component, catalog, control_id)
     definition.component_definition.components[0] = component
     component_data.write_file(definition)
 
 
+def add_group_implementations(
+    job: Job, component_id: int, catalog_id: int, group_id: str
+) -> dict:
+    """
+    Job that adds every control and enhancement of a catalog group to a component.
+    """
+    component_data = ComponentFile.query.get_or_404(component_id)
+    catalog_data = CatalogFile.query.get_or_404(catalog_id)
+    job.report(10, f"Loading {catalog_data.title}")
+    group = group_controls(load_catalog(catalog_data.filename), group_id)
+
+    control_ids = []
+    for control in group["controls"]:
+        control_ids.append(control["control_id"])
+        control_ids.extend(e["control_id"] for e in control.get("enhancements", []))
+    job.report(50, f"Adding {len(control_ids)} controls to {component_data.title}")
+    add_implementations(component_data, catalog_id, control_ids)
+    return {
+        "endpoint": "components.component_view",
+        "values": {"component_id": component_id},
+    }
+
+
+def import_component_narratives(
+    job: Job, component_id: int, catalog_id: int, filepath: str
+) -> dict:
+    """
+    Job that imports the control narratives of an uploaded CSV or XLSX file.
+    """
+    from app.components.importer import import_narratives
+
+    component_data = ComponentFile.query.get_or_404(component_id)
+    catalog_data = CatalogFile.query.get_or_404(catalog_id)
+    try:
+        result = import_narratives(
+            component_data, catalog_data, Path(filepath), report=job.report
+        )
+    finally:
+        Path(filepath).unlink(missing_ok=True)
+    job.message = (
+        f"Imported {result['rows'] - result['error_count']} of {result['rows']} rows"
+        f" into {result['controls']} controls, {result['error_count']} errors."
+    )
+    result.update(
+        endpoint="components.component_view", values={"component_id": component_id}
+    )
+    return result
+
+
+def merge_component_definitions(
+    job: Job,
+    component_id: int,
+    component_ids: List[int],
+    filepaths: List[str],
+    policy: str,
+) -> dict:
+    """
+    Job that merges other Components and uploaded definitions into a Component.
+    """
+    from app.components.merge import merge_components
+
+    component_data = ComponentFile.query.get_or_404(component_id)
+    sources = (
+        ComponentFile.query.filter(ComponentFile.id.in_(component_ids))
+        .filter(ComponentFile.id != component_id)
+        .order_by(ComponentFile.title)
+        .all()
+    )
+    try:
+        result = merge_components(
+            component_data,
+            sources,
+            [Path(filepath) for filepath in filepaths],
+            policy=policy,
+            report=job.report,
+        )
+    finally:
+        for filepath in filepaths:
+            Path(filepath).unlink(missing_ok=True)
+    job.message = (
+        f"Merged {result['definitions'] - 1} definitions into {component_data.title},"
+        f" {result['conflict_count']} conflicts."
+    )
+    result.update(
+        endpoint="components.component_view", values={"component_id": component_id}
+    )
+    return result
+
+
 def add_control_implementation(
-    component: Component, catalog: CatalogFile, control_id: str
-) -> Component:
+    component: "Component", catalog: CatalogFile, control_id: str
+) -> "Component":
+    from app.oscal.component import ControlImplementation
+
     requirement = add_implemented_requirement(control_id)
     component.control_implementations.append(
         ControlImplementation(
@@ -98,29 +227,133 @@ def check_existing_implementation(source: str, implementation: list) -> Optional
 
 def check_existing_control(control_id: str, requirement: list) -> bool:
     for ir in requirement:
-        if ir["control-id"] == control_id:
+        if ir.control_id == control_id:
             return True
     return False
 
 
+def get_component(component_id: int) -> Tuple[ComponentFile, List[CatalogFile]]:
+    """
+    Load a ComponentFile, and every Catalog with a flag for the ones the Component
+    has in a single query, once per request so the ETag check and the view share
+    them. The flagged Catalogs are set as the catalogs of the Component.
+    """
+    loaded = g.setdefault("components", {})
+    if component_id not in loaded:
+        component = db.session.get(ComponentFile, component_id)
+        if component is None:
+            abort(404)
+        rows = (
+            db.session.query(CatalogFile, component_catalog.c.component_id)
+            .outerjoin(
+                component_catalog,
+                db.and_(
+                    component_catalog.c.catalog_id == CatalogFile.id,
+                    component_catalog.c.component_id == component_id,
+                ),
+            )
+            .order_by(CatalogFile.id)
+            .all()
+        )
+        set_committed_value(
+            component, "catalogs", [catalog for catalog, added in rows if added]
+        )
+        loaded[component_id] = (component, [catalog for catalog, _ in rows])
+    return loaded[component_id]
+
+
+@bp.teardown_request
+def forget_components(exc: Optional[BaseException]):
+    # The app context, and g, may outlive the request, as in tests.
+    g.pop("components", None)
+
+
+def group_requirements(definition: "ComponentModel") -> Dict[str, List]:
+    """
+    Group the implemented requirements of every component by the source of
+    their control implementation in a single pass, in natural control id order.
+    """
+    requirements: Dict[str, List] = defaultdict(list)
+    for component in definition.component_definition.components or []:
+        for implementation in component.control_implementations:
+            requirements[implementation.source].extend(
+                implementation.implemented_requirements
+            )
+    for items in requirements.values():
+        items.sort(key=lambda ir: natural_sort_key(ir.control_id))
+    return requirements
+
+
+def component_etag(component_id: int) -> str:
+    component, catalogs = get_component(component_id)
+    return make_etag(
+        file_hash(component.filename),
+        component.id,
+        component.updated_on,
+        len(catalogs),
+        max((catalog.updated_on for catalog in catalogs), default=None),
+        *sorted(catalog.id for catalog in component.catalogs),
+    )
+
+
+def component_catalog_etag(component_id: int, catalog_id: int, **kwargs) -> str:
+    component = ComponentFile.query.get_or_404(component_id)
+    catalog = CatalogFile.query.get_or_404(catalog_id)
+    return make_etag(
+        file_hash(catalog.filename),
+        catalog.id,
+        catalog.updated_on,
+        component.id,
+        component.updated_on,
+    )
+
+
+def component_block():
+    components = (
+        ComponentFile.query.options(db.load_only(ComponentFile.id, ComponentFile.title))
+        .order_by(ComponentFile.updated_on.desc(), ComponentFile.id.desc())
+        .limit(current_app.config.get("RECENT_SIZE", 10))
+        .all()
+    )
+    return components
+
+
 @bp.route("/", methods=["GET"])
+@read_only
 def components_list():
-    components = ComponentFile.query.all()
+    page = paginate(
+        ComponentFile.query.options(
+            db.load_only(
+                ComponentFile.id,
+                ComponentFile.title,
+                ComponentFile.description,
+                ComponentFile.created_on,
+                ComponentFile.updated_on,
+            )
+        ),
+        ComponentFile,
+        sort=request.args.get("sort", "title"),
+        after=request.args.get("after"),
+        per_page=current_app.config.get("PAGE_SIZE", 50),
+    )
+    components = page.items
 
-    if not components:
+    if not components and not request.args.get("after"):
         flash(
             message="There are no Components installed. Click the link below to create or upload one.",
             category="message",
         )
 
     try:
-        return render_template("components/list.html", components=components)
+        return render_template("components/list.html", components=components, page=page)
     except TemplateNotFound:
         abort(404)
 
 
 @bp.route("/create", methods=["GET", "POST"])
 def component_create():
+    from app.components.forms import ComponentForm
+
     form = ComponentForm()
     if request.method == "POST":
         error = None
@@ -139,11 +372,21 @@ def component_create():
             if file and allowed_file(file.filename):
                 filename = secure_filename(file.filename)
                 filepath = base_path.joinpath(filename).as_posix()
-                request.files["component_file"].save(filepath)
             else:
                 filename = secure_filename(title)
                 filepath = base_path.joinpath(filename).with_suffix(".json").as_posix()
 
+            # Components are edited in place, each has its own file. Never overwrite
+            # the file of another Component.
+            if Path(filepath).exists():
+                flash(f"A Component file named {Path(filepath).name} already exists.")
+                return render_template(
+                    "components/create_form.html", form=form, title="Add Component"
+                )
+            if file and allowed_file(file.filename):
+                request.files["component_file"].save(filepath)
+                write_variants(Path(filepath))
+
             try:
                 component = ComponentFile(
                     title=title,
@@ -153,11 +396,15 @@ def component_create():
                 )
                 db.session.add(component)
                 db.session.commit()
-            except db.SQLAlchemyError as exc:
+            except db.exc.SQLAlchemyError as exc:
+                db.session.rollback()
                 error = f"Component {title} already exists: {exc}"
             else:
                 if not file:
-                    component_create_file(component)
+                    try:
+                        component_create_file(component)
+                    except IOError:
+                        flash("Error writing Component file.", "error")
                 flash(f"Component {title} created.", "message")
                 return redirect(
                     url_for("components.component_view", component_id=component.id)
@@ -169,9 +416,10 @@ def component_create():
 
 
 @bp.route("/<int:component_id>", methods=["GET"])
+@read_only
+@conditional(component_etag)
 def component_view(component_id: int):
-    component_data = ComponentFile.query.get_or_404(component_id)
-    catalogs = CatalogFile.query.all()
+    component_data, catalogs = get_component(component_id)
 
     if not catalogs:
         flash(
@@ -182,35 +430,40 @@ def component_view(component_id: int):
             category="warning",
         )
 
-    json = ComponentModel.from_json(component_data.filename)
+    definition = load_component(component_data.filename)
+    added = {catalog.id for catalog in component_data.catalogs}
 
     file = Path(component_data.filename)
 
-    return render_template(
+    return stream_page(
         "components/component.html",
         component=component_data,
-        json=json,
+        requirements=group_requirements(definition),
         filename=file.name,
-        catalogs=catalogs,
+        catalogs=[catalog for catalog in catalogs if catalog.id not in added],
     )
 
 
 @bp.route("/download/<path:filename>", methods=["GET"])
 def component_file_download(filename: str):
     upload_dir = Path(current_app.config["UPLOAD_FOLDER"]).joinpath("components")
-    return send_from_directory(directory=upload_dir, path=filename)
+    path = safe_join(upload_dir.as_posix(), filename)
+    if path is None or not Path(path).is_file():
+        abort(404)
+    return send_stored(Path(path), Path(filename).name)
 
 
 @bp.route("<int:component_id>/add/catalog/<int:catalog_id>", methods=["GET"])
 def component_add_catalog(component_id: int, catalog_id: int):
     component = ComponentFile.query.get_or_404(component_id)
     catalog = CatalogFile.query.get_or_404(catalog_id)
-    if catalog.id not in component.catalogs:
+    if catalog not in component.catalogs:
         try:
             component.catalogs.append(catalog)
             db.session.add(component)
             db.session.commit()
-        except db.SQLAlchemyError as exc:
+        except db.exc.SQLAlchemyError as exc:
+            db.session.rollback()
             flash(f"Unable to add Catalog: {catalog.title}: {exc}")
         else:
             flash(f"Catalog {catalog.title} added.", "message")
@@ -221,18 +474,78 @@ def component_add_catalog(component_id: int, catalog_id: int):
 
 
 @bp.route("<int:component_id>/catalog/<int:catalog_id>", methods=["GET"])
+@read_only
+@conditional(component_catalog_etag)
 def component_show_catalog(component_id: int, catalog_id: int):
     component = ComponentFile.query.get_or_404(component_id)
     catalog_data = CatalogFile.query.get_or_404(catalog_id)
-    catalog = CatalogModel.from_json(catalog_data.filename)
-    metadata = catalog.metadata
-    groups = catalog.get_groups()
-    return render_template(
+    lazy = lazy_tree()
+    parts = (
+        *catalog_fragment_parts(catalog_data),
+        component.id,
+        component.title,
+        component.updated_on,
+        lazy,
+    )
+
+    @cache
+    def get_catalog() -> "CatalogModel":
+        return load_catalog(catalog_data.filename)
+
+    selected = control_filter(get_catalog)
+    lazy = lazy and selected is None
+
+    def context() -> dict:
+        return {
+            "component": component,
+            "metadata": get_catalog().metadata,
+            "groups": group_tree(get_catalog(), lazy, selected),
+            "catalog": catalog_data,
+            "lazy": lazy,
+        }
+
+    if selected is None:
+        control_add_body = fragment_cache.stream(
+            "components/control_add_body.html", catalog_id, parts, context
+        )
+    else:
+        control_add_body = stream_template(
+            "components/control_add_body.html", **context()
+        )
+    return stream_page(
         "components/control_add_form.html",
         component=component,
-        metadata=metadata,
-        groups=groups,
+        control_add_body=control_add_body,
         catalog=catalog_data,
+        lazy=lazy,
+    )
+
+
+@bp.route(
+    "<int:component_id>/catalog/<int:catalog_id>/group/<string:group_id>",
+    methods=["GET"],
+)
+@read_only
+@conditional(component_catalog_etag)
+def component_catalog_group(component_id: int, catalog_id: int, group_id: str):
+    component = ComponentFile.query.get_or_404(component_id)
+    catalog_data = CatalogFile.query.get_or_404(catalog_id)
+    parts = (
+        *catalog_fragment_parts(catalog_data),
+        component.id,
+        component.title,
+        component.updated_on,
+        group_id,
+    )
+    return fragment_cache.render(
+        "components/group_controls.html",
+        catalog_id,
+        parts,
+        lambda: {
+            "group": group_controls(load_catalog(catalog_data.filename), group_id),
+            "component": component,
+            "catalog": catalog_data,
+        },
     )
 
 
@@ -241,6 +554,107 @@ def component_show_catalog(component_id: int, catalog_id: int):
 )
 def component_add_control(component_id: int, catalog_id: int, control_id: str):
     component_data = ComponentFile.query.get_or_404(component_id)
-    add_implementations(component_data, catalog_id, control_id)
+    try:
+        add_implementations(component_data, catalog_id, [control_id])
+    except IOError:
+        flash("Error writing Component file.", "error")
 
     return redirect(url_for("components.component_view", component_id=component_id))
+
+
+@bp.route(
+    "<int:component_id>/catalog/<int:catalog_id>/group/<string:group_id>/add",
+    methods=["GET"],
+)
+def component_add_group(component_id: int, catalog_id: int, group_id: str):
+    component = ComponentFile.query.get_or_404(component_id)
+    CatalogFile.query.get_or_404(catalog_id)
+    job = job_queue.submit(
+        "add_group_controls",
+        add_group_implementations,
+        component.id,
+        catalog_id,
+        group_id,
+    )
+    flash(f"Adding the {group_id.upper()} controls to {component.title}.", "message")
+    return redirect(url_for("jobs.job_view", job_id=job.id))
+
+
+@bp.route(
+    "<int:component_id>/catalog/<int:catalog_id>/narratives", methods=["GET", "POST"]
+)
+def component_import_narratives(component_id: int, catalog_id: int):
+    from app.components.forms import NarrativesForm
+
+    component = ComponentFile.query.get_or_404(component_id)
+    form = NarrativesForm(catalog_id=catalog_id)
+    form.catalog_id.choices = [
+        (catalog.id, catalog.title) for catalog in component.catalogs
+    ]
+    if request.method == "POST" and form.validate_on_submit():
+        file = form.narratives.data
+        suffix = Path(file.filename).suffix.lower()
+        if suffix not in (".csv", ".xlsx"):
+            flash(f"{file.filename} is not a CSV or XLSX file.", "error")
+        else:
+            upload_directory = Path(current_app.config["UPLOAD_FOLDER"]).joinpath(
+                "imports"
+            )
+            upload_directory.mkdir(parents=True, exist_ok=True)
+            filepath = upload_directory.joinpath(f"{uuid4()}{suffix}")
+            file.save(filepath)
+            job = job_queue.submit(
+                "import_narratives",
+                import_component_narratives,
+                component.id,
+                form.catalog_id.data,
+                filepath.as_posix(),
+            )
+            flash(f"Importing the narratives in {file.filename}.", "message")
+            return redirect(url_for("jobs.job_view", job_id=job.id))
+    return render_template(
+        "components/narratives_form.html", form=form, component=component
+    )
+
+
+@bp.route("<int:component_id>/merge", methods=["GET", "POST"])
+def component_merge(component_id: int):
+    from app.components.forms import MergeForm
+
+    component = ComponentFile.query.get_or_404(component_id)
+    form = MergeForm()
+    form.component_ids.choices = [
+        (other.id, other.title)
+        for other in ComponentFile.query.options(
+            db.load_only(ComponentFile.id, ComponentFile.title)
+        )
+        .filter(ComponentFile.id != component_id)
+        .order_by(ComponentFile.title)
+    ]
+    if request.method == "POST" and form.validate_on_submit():
+        files = [file for file in form.definitions.data or [] if file.filename]
+        if not files and not form.component_ids.data:
+            flash("Choose Components or upload definitions to merge.", "error")
+        elif not all(file.filename.lower().endswith(".json") for file in files):
+            flash("Component definitions must be JSON files.", "error")
+        else:
+            upload_directory = Path(current_app.config["UPLOAD_FOLDER"]).joinpath(
+                "imports"
+            )
+            upload_directory.mkdir(parents=True, exist_ok=True)
+            filepaths = []
+            for file in files:
+                filepath = upload_directory.joinpath(f"{uuid4()}.json")
+                file.save(filepath)
+                filepaths.append(filepath.as_posix())
+            job = job_queue.submit(
+                "merge_components",
+                merge_component_definitions,
+                component.id,
+                form.component_ids.data,
+                filepaths,
+                form.policy.data,
+            )
+            flash(f"Merging definitions into {component.title}.", "message")
+            return redirect(url_for("jobs.job_view", job_id=job.id))
+    return render_template("components/merge_form.html", form=form, component=component)
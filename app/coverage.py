@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import reduce
+from operator import or_
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+from flask import Flask
+
+from app.storage import open_blob
+
+if TYPE_CHECKING:
+    from app.models.components import CatalogFile, ComponentFile
+    from app.oscal.catalog import CatalogModel
+    from app.oscal.component import ComponentModel
+
+
+def file_key(filename: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_field(data: dict, name: str, default=None):
+    """
+    A field of an OSCAL JSON object. Component files written by the app use the
+    field names of the models, e.g. control_id rather than control-id.
+    """
+    return data.get(name, data.get(name.replace("-", "_"), default))
+
+
+def document_controls(document: dict) -> Dict[str, Set[str]]:
+    """
+    The implemented control ids of a component definition document, by the source
+    of their control implementation.
+    """
+    definition = get_field(document, "component-definition") or document
+    controls: Dict[str, Set[str]] = defaultdict(set)
+    for component in get_field(definition, "components") or []:
+        for implementation in get_field(component, "control-implementations") or []:
+            controls[implementation["source"]].update(
+                get_field(requirement, "control-id")
+                for requirement in get_field(
+                    implementation, "implemented-requirements", []
+                )
+            )
+    return dict(controls)
+
+
+def model_controls(definition: "ComponentModel") -> Dict[str, Set[str]]:
+    controls: Dict[str, Set[str]] = defaultdict(set)
+    for component in definition.component_definition.components or []:
+        for implementation in component.control_implementations:
+            controls[implementation.source].update(
+                requirement.control_id
+                for requirement in implementation.implemented_requirements
+            )
+    return dict(controls)
+
+
+def percent(part: int, whole: int) -> float:
+    total = whole.bit_count()
+    return round(100 * (part & whole).bit_count() / total, 1) if total else 0.0
+
+
+@dataclass
+class Coverage:
+    """
+    The controls of a catalog implemented by each component, as bitsets over the
+    catalog's FilterIndex.
+    """
+
+    catalog: "CatalogModel"
+    bits: Dict[int, int]
+
+    @property
+    def covered(self) -> int:
+        return reduce(or_, self.bits.values(), 0)
+
+    @property
+    def percent(self) -> float:
+        return percent(self.covered, self.catalog.filter_index.all)
+
+    def component_percent(self, component_id: int) -> float:
+        return percent(self.bits.get(component_id, 0), self.catalog.filter_index.all)
+
+    def component_count(self, component_id: int) -> int:
+        return self.bits.get(component_id, 0).bit_count()
+
+    @property
+    def gaps(self) -> List[str]:
+        """
+        The controls not implemented by any component, in sort order.
+        """
+        index = self.catalog.filter_index
+        return index.control_ids(index.all & ~self.covered)
+
+    def families(self) -> List[dict]:
+        index = self.catalog.filter_index
+        covered = self.covered
+        rollups = []
+        for (field, family), bits in index.bitsets.items():
+            if field != "family":
+                continue
+            group = self.catalog.get_group_by_id(family)
+            rollups.append(
+                {
+                    "family": family,
+                    "title": group.title if group else family,
+                    "controls": bits.bit_count(),
+                    "covered": (bits & covered).bit_count(),
+                    "percent": percent(covered, bits),
+                }
+            )
+        return sorted(rollups, key=lambda rollup: rollup["family"])
+
+    def implemented_by(self, control_id: str) -> List[int]:
+        position = self.catalog.filter_index.positions.get(control_id)
+        if position is None:
+            return []
+        return [
+            component_id
+            for component_id, bits in self.bits.items()
+            if bits >> position & 1
+        ]
+
+
+class CoverageMatrix:
+    """
+    The matrix of the controls implemented by every component, for every catalog.
+    The control ids of a component are read once and kept until its file changes,
+    and its bitset for a catalog is computed once from them. Components written by
+    the app are updated in place, without reading the file back.
+    """
+
+    def __init__(self, app: Optional[Flask] = None):
+        self._components: Dict[int, dict] = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.extensions["coverage_matrix"] = self
+
+    def _set(self, component: "ComponentFile", controls: Dict[str, Set[str]]) -> dict:
+        entry = {
+            "filename": component.filename,
+            "key": file_key(component.filename),
+            "controls": controls,
+            "bits": {},
+        }
+        with self._lock:
+            self._components[component.id] = entry
+        return entry
+
+    def update(self, component: "ComponentFile", definition: "ComponentModel"):
+        """
+        Record the controls of a component file that was just written.
+        """
+        if component.id is not None:
+            self._set(component, model_controls(definition))
+
+    def discard(self, component_id: int):
+        with self._lock:
+            self._components.pop(component_id, None)
+
+    def entry(self, component: "ComponentFile") -> dict:
+        entry = self._components.get(component.id)
+        if (
+            entry is None
+            or entry["filename"] != component.filename
+            or entry["key"] != file_key(component.filename)
+        ):
+            try:
+                with open_blob(component.filename) as file:
+                    controls = document_controls(json.load(file))
+            except (OSError, ValueError, KeyError, TypeError):
+                controls = {}
+            entry = self._set(component, controls)
+        return entry
+
+    def controls(self, component: "ComponentFile") -> Dict[str, Set[str]]:
+        return self.entry(component)["controls"]
+
+    def coverage(
+        self,
+        catalog_file: "CatalogFile",
+        catalog: "CatalogModel",
+        components: Iterable["ComponentFile"],
+    ) -> Coverage:
+        # Catalog files are content-addressed, the filename identifies the content.
+        key = (catalog_file.source, catalog_file.filename)
+        bits = {}
+        for component in components:
+            entry = self.entry(component)
+            if key not in entry["bits"]:
+                entry["bits"][key] = catalog.filter_index.select(
+                    entry["controls"].get(catalog_file.source, ())
+                )
+            bits[component.id] = entry["bits"][key]
+        return Coverage(catalog, bits)
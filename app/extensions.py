@@ -1,11 +1,161 @@
+from functools import wraps
+from typing import Optional
+
+import click
+from flask import Flask, g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import MetaData, event
+
+from app.aggregate import Aggregator
+from app.cache import FragmentCache
+from app.coverage import CoverageMatrix
+from app.queue import JobQueue
+
+
+class RoutingSession(Session):
+    """
+    Session that sends the queries of views marked read_only to the "replica"
+    bind when DATABASE_REPLICA_URI is configured. Flushes always use the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and has_app_context()
+            and g.get("read_only")
+            and "replica" in self._db.engines
+        ):
+            return self._db.engines["replica"]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(
+    metadata=MetaData(
+        naming_convention={
+            "ix": "ix_%(column_0_label)s",
+            "uq": "uq_%(table_name)s_%(column_0_name)s",
+            "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+            "pk": "pk_%(table_name)s",
+        }
+    ),
+    session_options={"class_": RoutingSession},
+)
+fragment_cache = FragmentCache()
+coverage_matrix = CoverageMatrix()
+aggregator = Aggregator()
+job_queue = JobQueue()
+
+
+def read_only(view):
+    """
+    Mark a view as only reading from the database, so it may use the replica. The
+    mark is cleared on teardown, after a streamed response is rendered.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_only = True
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def clear_read_only(exc: Optional[BaseException]):
+    # The app context, and g, may outlive the request, as in tests.
+    g.pop("read_only", None)
+
+
+def engine_options(config: dict) -> dict:
+    """
+    SQLAlchemy engine options for the configured DATABASE_PROFILE.
+    """
+    options = dict(config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    if config.get("DATABASE_PROFILE") == "pooled":
+        options.setdefault("pool_size", config.get("DATABASE_POOL_SIZE", 10))
+        options.setdefault("max_overflow", config.get("DATABASE_MAX_OVERFLOW", 10))
+        options.setdefault("pool_recycle", config.get("DATABASE_POOL_RECYCLE", 1800))
+        options.setdefault("pool_pre_ping", True)
+    return options
+
+
+def set_sqlite_pragmas(pragmas: dict):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return on_connect
+
+
+class LazyMigrateGroup(click.MultiCommand):
+    """
+    The flask db command group. Flask-Migrate is only registered when one of its
+    commands is looked up, so other commands such as flask run don't import it.
+    """
+
+    def group(self, ctx: click.Context) -> click.MultiCommand:
+        from flask.cli import ScriptInfo
+
+        app = ctx.ensure_object(ScriptInfo).load_app()
+        if "migrate" not in app.extensions:
+            init_migrate(app)
+        return app.cli.commands["db"]
+
+    def list_commands(self, ctx: click.Context):
+        return self.group(ctx).list_commands(ctx)
+
+    def get_command(self, ctx: click.Context, name: str):
+        return self.group(ctx).get_command(ctx, name)
+
+
+def init_migrate(app: Flask):
+    """
+    Register Flask-Migrate. It imports alembic, which takes longer than the rest of
+    the app, so with LAZY_STARTUP it is only registered for the flask db commands.
+    """
+    from flask_migrate import Migrate
+
+    Migrate(app, db, render_as_batch=True)
+
+
+def init_db(app: Flask):
+    """
+    Initialize the database with the engine options, replica bind and SQLite
+    pragmas of the configured DATABASE_PROFILE.
+    """
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
+    if replica := app.config.get("DATABASE_REPLICA_URI"):
+        binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+        binds.setdefault("replica", replica)
+        app.config["SQLALCHEMY_BINDS"] = binds
+    db.init_app(app)
+    app.teardown_request(clear_read_only)
+    if app.config.get("LAZY_STARTUP"):
+        app.cli.add_command(
+            LazyMigrateGroup("db", help="Perform database migrations."), "db"
+        )
+    else:
+        init_migrate(app)
 
-db = SQLAlchemy()
+    if app.config.get("DATABASE_PROFILE") == "sqlite":
+        with app.app_context():
+            for engine in db.engines.values():
+                if engine.dialect.name == "sqlite":
+                    event.listen(
+                        engine,
+                        "connect",
+                        set_sqlite_pragmas(app.config.get("SQLITE_PRAGMAS", {})),
+                    )
 
 
 class Base(db.Model):  # type: ignore
     __abstract__ = True
 
     id = db.Column(db.Integer, primary_key=True)
-    created_on = db.Column(db.DateTime, default=db.func.now())
-    updated_on = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
+    created_on = db.Column(db.DateTime, default=db.func.now(), index=True)
+    updated_on = db.Column(
+        db.DateTime, default=db.func.now(), onupdate=db.func.now(), index=True
+    )
@@ -1,5 +1,157 @@
+import hashlib
+import os
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+from flask import (
+    Response,
+    current_app,
+    get_flashed_messages,
+    make_response,
+    request,
+    send_file,
+    session,
+    stream_template,
+)
+from flask.globals import request_ctx
+
 ALLOWED_EXTENSIONS = {"json"}
 
+_file_hashes: Dict[str, Tuple[int, int, str]] = {}
+
 
 def allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def file_hash(filename: str) -> str:
+    """
+    SHA-256 of a file, memoized on the file's mtime and size so unchanged files
+    are only hashed once per process.
+    """
+    stat = os.stat(filename)
+    cached = _file_hashes.get(filename)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    sha = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    _file_hashes[filename] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+def stream_page(template: str, **context):
+    """
+    Stream a template so the layout is sent before the body is rendered. Flashed
+    messages are consumed first, the session is saved before the body streams.
+    """
+    get_flashed_messages()
+    return stream_template(template, **context)
+
+
+def app_version() -> str:
+    """
+    APP_VERSION and a hash of the templates, computed once per app, so a deploy or
+    a template change gives every page a new ETag.
+    """
+    templates = current_app.extensions.get("template_hash")
+    if templates is None:
+        env = current_app.jinja_env
+        sha = hashlib.sha256()
+        for name in sorted(env.list_templates()):
+            source, _, _ = env.loader.get_source(env, name)  # type: ignore
+            sha.update(name.encode())
+            sha.update(source.encode())
+        templates = current_app.extensions["template_hash"] = sha.hexdigest()[:12]
+    return f"{current_app.config.get('APP_VERSION')}-{templates}"
+
+
+def make_etag(*parts) -> str:
+    """
+    Build an ETag from file hashes, ids and updated_on timestamps.
+    """
+    value = ":".join(
+        part.isoformat() if isinstance(part, datetime) else str(part) for part in parts
+    )
+    return hashlib.sha256(value.encode()).hexdigest()[:32]
+
+
+def conditional(etag_func: Callable[..., str]):
+    """
+    Decorate a view with ETag based conditional GET. The etag_func receives the
+    view arguments and must be cheap, a 304 is returned without calling the view
+    when the client or a proxy already has the current version. Pages with
+    flashed messages, including those flashed by the view, are never cached.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if session.get("_flashes"):
+                response = make_response(view(*args, **kwargs))
+                response.cache_control.no_store = True
+                return response
+
+            etag = make_etag(app_version(), etag_func(*args, **kwargs))
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+            if response.status_code not in (200, 304):
+                return response
+            if session.get("_flashes") or request_ctx.flashes:
+                # Flashed by the view, such as an unknown filter.
+                response.cache_control.no_store = True
+                return response
+            response.set_etag(etag)
+            response.cache_control.public = True
+            response.cache_control.max_age = current_app.config.get("CACHE_MAX_AGE", 0)
+            response.cache_control.must_revalidate = True
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def send_stored(path: Path, download_name: str, mimetype: str = "application/json"):
+    """
+    Send a stored file as an attachment. A compressed copy is sent as is with
+    Content-Encoding when the client accepts it, so nothing is compressed per
+    request. Range requests are supported for files sent from disk.
+    """
+    from app.storage import download_variants, open_decompressed
+
+    variants = download_variants(path)
+    for encoding in ("zstd", "gzip"):
+        if encoding in variants and request.accept_encodings[encoding]:
+            response = send_file(
+                variants[encoding],
+                mimetype=mimetype,
+                as_attachment=True,
+                download_name=download_name,
+            )
+            response.headers["Content-Encoding"] = encoding
+            break
+    else:
+        if path in variants.values():
+            # Compressed at rest, but the client doesn't accept the compression.
+            response = send_file(
+                open_decompressed(path),
+                mimetype=mimetype,
+                as_attachment=True,
+                download_name=download_name,
+                etag=file_hash(path.as_posix()),
+                last_modified=path.stat().st_mtime,
+            )
+        else:
+            response = send_file(
+                path, mimetype=mimetype, as_attachment=True, download_name=download_name
+            )
+    response.vary.add("Accept-Encoding")
+    return response
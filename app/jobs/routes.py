@@ -0,0 +1,55 @@
+from pathlib import Path
+
+from flask import abort, jsonify, render_template, send_file, url_for
+
+from app.extensions import db, job_queue
+from app.jobs import bp
+from app.models.jobs import Job, JobStatusEnum
+
+
+def get_job(job_id: int) -> Job:
+    """
+    The Job, failed first if it was left unfinished by a process that stopped.
+    """
+    job = Job.query.get_or_404(job_id)
+    if not job.done and job_queue.expire():
+        db.session.refresh(job)
+    return job
+
+
+def result_url(job: Job):
+    if job.status != JobStatusEnum.finished:
+        return None
+    if job.filename:
+        return url_for("jobs.job_file", job_id=job.id)
+    if job.result:
+        return url_for(job.result["endpoint"], **job.result.get("values", {}))
+    return None
+
+
+@bp.route("/<int:job_id>", methods=["GET"])
+def job_view(job_id: int):
+    job = get_job(job_id)
+    return render_template("jobs/job.html", job=job, result_url=result_url(job))
+
+
+@bp.route("/<int:job_id>/status", methods=["GET"])
+def job_status(job_id: int):
+    """
+    The status, progress and errors of a Job as JSON, for polling.
+    """
+    job = get_job(job_id)
+    response = jsonify({**job.to_dict(), "result_url": result_url(job)})
+    response.cache_control.no_store = True
+    return response
+
+
+@bp.route("/<int:job_id>/file", methods=["GET"])
+def job_file(job_id: int):
+    job = Job.query.get_or_404(job_id)
+    if job.status != JobStatusEnum.finished or not job.filename:
+        abort(404)
+    path = Path(job.filename)
+    if not path.is_file():
+        abort(404)
+    return send_file(path, as_attachment=True, download_name=path.name)
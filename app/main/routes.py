@@ -3,17 +3,21 @@ import os
 from flask import current_app, render_template, send_from_directory
 
 from app.catalogs.routes import catalog_block
+from app.components.routes import component_block
+from app.extensions import read_only
 from app.main import bp
 
 
 @bp.route("/")
+@read_only
 def index():
     catalogs = catalog_block()
+    components = component_block()
     return render_template(
         "main/home.html",
         content="",
         catalogs=catalogs,
-        components={},
+        components=components,
     )
 
 
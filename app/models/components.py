@@ -1,7 +1,16 @@
-from flask import current_app, flash
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-from app.extensions import Base, db
-from app.oscal.component import ComponentModel, ComponentTypeEnum
+from flask import current_app
+
+from app.extensions import Base, coverage_matrix, db
+from app.oscal.enums import ComponentTypeEnum
+from app.storage import write_variants
+
+if TYPE_CHECKING:
+    from app.oscal.component import ComponentModel
 
 component_catalog = db.Table(
     "component_catalog",
@@ -9,32 +18,41 @@ component_catalog = db.Table(
         "component_id", db.Integer, db.ForeignKey("components.id"), primary_key=True
     ),
     db.Column("catalog_id", db.Integer, db.ForeignKey("catalogs.id"), primary_key=True),
+    db.Index("ix_component_catalog_catalog_id", "catalog_id"),
 )
 
 
 class CatalogFile(Base):
     __tablename__ = "catalogs"
 
-    title = db.Column(db.String(150), nullable=False)
+    title = db.Column(db.String(150), nullable=False, unique=True, index=True)
     description = db.Column(db.Text, nullable=False)
-    source = db.Column(db.String(264), nullable=False)
-    filename = db.Column(db.String(150), nullable=False)
+    source = db.Column(db.String(264), nullable=False, unique=True, index=True)
+    # Catalog files are stored content-addressed, rows with the same content share
+    # a file.
+    filename = db.Column(db.String(150), nullable=False, index=True)
+    # The title of the profile a Catalog was resolved from, which may refresh it.
+    profile = db.Column(db.String(150))
 
     def __repr__(self):
         return self.title
 
+    @classmethod
+    def references(cls, filename: str) -> int:
+        return cls.query.filter_by(filename=filename).count()
+
 
 class ComponentFile(Base):
     __tablename__ = "components"
 
-    title = db.Column(db.String(150), nullable=False)
+    title = db.Column(db.String(150), nullable=False, unique=True, index=True)
     description = db.Column(db.Text, nullable=False)
     type = db.Column(
         db.Enum(ComponentTypeEnum),
         nullable=False,
         default=ComponentTypeEnum.software.name,
     )
-    filename = db.Column(db.String(150), nullable=False)
+    filename = db.Column(db.String(150), nullable=False, unique=True, index=True)
     catalogs = db.relationship(
         "CatalogFile",
         secondary=component_catalog,
@@ -44,11 +62,28 @@ class ComponentFile(Base):
     def __repr__(self):
         return self.title
 
-    def write_file(self, component: ComponentModel):
-        json_file = component.json(indent=2)
+    def write_file(self, component: "ComponentModel"):
+        """
+        Write the Component file, and its precompressed copies for downloads. The
+        file itself stays plain JSON as it is edited in place. The coverage matrix
+        is updated from the written model.
+        """
+        self.write_json(component.json(indent=2))
+        coverage_matrix.update(self, component)
+
+    def write_json(self, document: str):
+        """
+        Replace the Component file with a serialized definition, through a
+        temporary file so an interrupted write never leaves it truncated.
+        """
+        path = Path(self.filename)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
         try:
-            with open(self.filename, "w+") as f:
-                f.write(json_file)
+            tmp.write_text(document)
+            tmp.replace(path)
+            write_variants(path)
         except IOError as exc:
-            flash("Error writing Component file.", "error")
-            current_app.logger(f"Error writing file {self.filename}: {exc}")
+            tmp.unlink(missing_ok=True)
+            # Also called from jobs, outside a request, so the caller reports it.
+            current_app.logger.error(f"Error writing file {self.filename}: {exc}")
+            raise
@@ -0,0 +1,56 @@
+from enum import Enum
+
+from app.extensions import Base, db
+
+
+class JobStatusEnum(str, Enum):
+    queued = "queued"
+    running = "running"
+    finished = "finished"
+    failed = "failed"
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    kind = db.Column(db.String(50), nullable=False, index=True)
+    status = db.Column(
+        db.Enum(JobStatusEnum),
+        nullable=False,
+        default=JobStatusEnum.queued.name,
+        index=True,
+    )
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.String(255))
+    error = db.Column(db.Text)
+    # The endpoint and view arguments of the page the job produced.
+    result = db.Column(db.JSON)
+    # A file the job produced, such as an export.
+    filename = db.Column(db.String(255))
+
+    def __repr__(self):
+        return f"{self.kind} {self.id}"
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JobStatusEnum.finished, JobStatusEnum.failed)
+
+    def report(self, progress: int, message: str):
+        """
+        Record the progress of a running job so the status endpoint can show it.
+        """
+        self.progress = progress
+        self.message = message
+        db.session.commit()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status.value,
+            "progress": self.progress,
+            "message": self.message,
+            "error": self.error,
+            "created_on": self.created_on.isoformat() if self.created_on else None,
+            "updated_on": self.updated_on.isoformat() if self.updated_on else None,
+        }
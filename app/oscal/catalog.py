@@ -2,15 +2,17 @@
 import json
 import logging
 from pathlib import Path
-from typing import List, Literal, Optional, Union
+from typing import TYPE_CHECKING, Dict, List, Literal, Optional, Set, Tuple, Union
 
 from pydantic import (  # pylint: disable=no-name-in-module
     UUID4,
     BaseModel,
+    PrivateAttr,
     ValidationError,
     validator,
 )
 
+from app.oscal.control_ids import natural_sort_key
 from app.oscal.oscal import (
     BackMatter,
     Link,
@@ -19,6 +21,10 @@ from app.oscal.oscal import (
     Parameter,
     Property,
 )
+from app.storage import open_blob
+
+if TYPE_CHECKING:
+    from app.oscal.filters import FilterIndex
 
 logger = logging.getLogger(__name__)
 
@@ -79,10 +85,15 @@ class Control(BaseControl, FilterMixin):
         prop = self._get_prop("sort-id")
 
         if not prop:
-            return self.title
+            return self.id
 
         return prop.value
 
+    @property
+    def sort_key(self) -> Tuple:
+        prop = self._get_prop("sort-id")
+        return natural_sort_key(prop.value if prop else self.id)
+
     @property
     def statement(self) -> List:
         statements_list: List = []
@@ -210,6 +221,14 @@ class CatalogModel(BaseModel):
     groups: Optional[List[Group]]
     controls: Optional[List[Control]]
     back_matter: Optional[BackMatter]
+    _controls_index: Dict[str, Control] = PrivateAttr(default_factory=dict)
+    _groups_index: Dict[str, Group] = PrivateAttr(default_factory=dict)
+    _groups_by_id: Dict[str, Group] = PrivateAttr(default_factory=dict)
+    _sort_keys: Dict[str, Tuple] = PrivateAttr(default_factory=dict)
+    _ordered_ids: List[str] = PrivateAttr(default_factory=list)
+    _positions: Dict[str, int] = PrivateAttr(default_factory=dict)
+    _filter_index: Optional["FilterIndex"] = PrivateAttr(default=None)
+    _parameters: dict = PrivateAttr(default_factory=dict)
 
     @property
     def controls(self) -> List[Control]:
@@ -222,18 +241,84 @@ class CatalogModel(BaseModel):
                         controls.append(ctrl)
         return controls
 
+    @property
+    def controls_index(self) -> Dict[str, Control]:
+        if not self._controls_index:
+            self._controls_index = {control.id: control for control in self.controls}
+        return self._controls_index
+
+    @property
+    def sort_keys(self) -> Dict[str, Tuple]:
+        """
+        The natural sort key of every control and enhancement, computed once from
+        its sort-id prop, or its id when it has none.
+        """
+        if not self._sort_keys:
+            self._sort_keys = {
+                control.id: control.sort_key for control in self.controls
+            }
+        return self._sort_keys
+
+    def sort_key(self, control_id: str) -> Tuple:
+        """
+        The sort key of a control id, for ids that are not in the catalog as well.
+        """
+        return self.sort_keys.get(control_id) or natural_sort_key(control_id)
+
+    @property
+    def ordered_ids(self) -> List[str]:
+        """
+        The ids of every control and enhancement in sort order.
+        """
+        if not self._ordered_ids:
+            self._ordered_ids = sorted(self.sort_keys, key=self.sort_keys.__getitem__)
+        return self._ordered_ids
+
+    @property
+    def positions(self) -> Dict[str, int]:
+        if not self._positions:
+            self._positions = {
+                control_id: i for i, control_id in enumerate(self.ordered_ids)
+            }
+        return self._positions
+
+    @property
+    def filter_index(self) -> "FilterIndex":
+        from app.oscal.filters import FilterIndex
+
+        if self._filter_index is None:
+            self._filter_index = FilterIndex(self)
+        return self._filter_index
+
+    def sorted_controls(
+        self, controls: Optional[List[Control]] = None
+    ) -> List[Control]:
+        if controls is None:
+            controls = self.controls
+        return sorted(controls, key=lambda control: self.sort_key(control.id))
+
+    @property
+    def parameters(self) -> dict:
+        """
+        All parameters defined in the catalog, keyed by parameter id.
+        """
+        if not self._parameters:
+            for control in self.controls:
+                self._parameters.update(control.parameters)
+        return self._parameters
+
     def get_control(self, control_id: str) -> Optional[Control]:
-        return next(
-            filter(lambda control: control.id == control_id, self.controls), None
-        )
+        return self.controls_index.get(control_id)
 
-    def get_groups(self) -> List:
+    def get_groups(self, selected: Optional[Set[str]] = None) -> List:
         groups_list: List = []
         groups = getattr(self, "groups")
         for group in groups:
             control_list = []
             if controls := getattr(group, "controls"):
-                control_list = self.get_group_controls(controls)
+                control_list = self.get_group_controls(controls, selected)
+            if selected is not None and not control_list:
+                continue
             groups_list.append(
                 {
                     "group_id": group.id,
@@ -244,34 +329,68 @@ class CatalogModel(BaseModel):
 
         return groups_list
 
-    def get_group_controls(self, controls: List) -> List:
+    def get_group_summaries(self) -> List:
+        """
+        The groups of the catalog with the number of controls and enhancements
+        in each, without building the control tree.
+        """
+        return [
+            {
+                "group_id": group.id,
+                "title": group.title,
+                "count": sum(
+                    1 + len(getattr(control, "controls", None) or [])
+                    for control in group.controls or []
+                ),
+            }
+            for group in self.groups
+        ]
+
+    def get_group_by_id(self, group_id: str) -> Optional[Group]:
+        if not self._groups_by_id:
+            self._groups_by_id = {group.id: group for group in self.groups}
+        return self._groups_by_id.get(group_id)
+
+    def get_group_controls(
+        self, controls: List, selected: Optional[Set[str]] = None
+    ) -> List:
+        """
+        The controls and enhancements of a group. With the ids of selected controls,
+        only those are listed, along with the controls of selected enhancements.
+        """
         control_list = []
-        for control in controls:
+        for control in self.sorted_controls(controls):
             temp_control = {
                 "control_id": control.id,
                 "title": control.title,
             }
             if enhancements := getattr(control, "controls"):
-                temp_control["enhancements"] = self.get_group_controls(enhancements)
+                temp_control["enhancements"] = self.get_group_controls(
+                    enhancements, selected
+                )
+            if (
+                selected is not None
+                and control.id not in selected
+                and not temp_control.get("enhancements")
+            ):
+                continue
             control_list.append(temp_control)
         return control_list
 
-    def get_group(self, control_id: str) -> List[Group]:
-        for group in self.groups:
-            for control in group.controls:
-                if control.id == control_id:
-                    return group
-                elif children := getattr(control, "controls", ""):
-                    for child in children:
-                        if child.id == control_id:
-                            return group
+    def get_group(self, control_id: str) -> Optional[Group]:
+        if not self._groups_index:
+            for group in self.groups:
+                for control in group.controls or []:
+                    self._groups_index[control.id] = group
+                    for child in getattr(control, "controls", None) or []:
+                        self._groups_index[child.id] = group
+        return self._groups_index.get(control_id)
 
     def get_next(self, control: Control) -> str:
-        try:
-            next_idx = self.controls.index(control) + 1
-            return self.controls[next_idx].id
-        except (ValueError, IndexError):
+        position = self.positions.get(control.id)
+        if position is None or position + 1 >= len(self.ordered_ids):
             return ""
+        return self.ordered_ids[position + 1]
 
     def control_summary(self, control_id: str) -> dict:
         control = self.get_control(control_id)
@@ -291,7 +410,7 @@ class CatalogModel(BaseModel):
 
     @classmethod
     def from_json(cls, json_file: Union[str, Path]):
-        with open(json_file, "rb") as file:
+        with open_blob(json_file) as file:
             data = json.load(file)
 
         try:
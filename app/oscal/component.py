@@ -1,11 +1,11 @@
 import json
-from enum import Enum
 from pathlib import Path
 from typing import List, Optional, Union
 from uuid import UUID, uuid4
 
 from pydantic import Field, ValidationError
 
+from app.oscal.enums import ComponentTypeEnum
 from app.oscal.oscal import (
     BackMatter,
     Link,
@@ -18,20 +18,7 @@ from app.oscal.oscal import (
     Property,
     ResponsibleRole,
 )
-
-
-class ComponentTypeEnum(str, Enum):
-    software = "software"
-    hardware = "hardware"
-    service = "service"
-    interconnection = "interconnection"
-    policy = "policy"
-    process = "process"
-    procedure = "procedure"
-    plan = "plan"
-    guidance = "guidance"
-    standard = "standard"
-    validation = "validation"
+from app.storage import open_blob
 
 
 class Statement(OSCALElement):
@@ -83,24 +70,24 @@ class ImplementedRequirement(OSCALElement):
 
     def add_statement(self, statement: Statement):
         key = statement.statement_id
-        if not hasattr(self, "statements"):
+        if not self.statements:
             self.statements = []
-        elif hasattr(self.statements, key):
+        elif any(s.statement_id == key for s in self.statements):
             raise KeyError(
                 f"Statement {key} already in ImplementedRequirement"
-                " for {self.control_id}"
+                f" for {self.control_id}"
             )
         self.statements.append(statement)  # type: ignore
         return self
 
     def add_parameter(self, set_parameter: Parameter):
-        key = set_parameter.param_id
+        key = set_parameter.id
         if not self.set_parameters:
             self.set_parameters = []
-        elif key in self.set_parameters:
+        elif any(p.id == key for p in self.set_parameters):
             raise KeyError(
                 f"SetParameter {key} already in ImplementedRequirement"
-                " for {self.control_id}"
+                f" for {self.control_id}"
             )
         self.set_parameters.append(set_parameter)
         return self
@@ -109,10 +96,10 @@ class ImplementedRequirement(OSCALElement):
         key = property.name
         if not self.props:
             self.props = []
-        elif key in self.props:
+        elif any(p.name == key for p in self.props):
             raise KeyError(
                 f"Property {key} already in ImplementedRequirement"
-                " for {self.control_id}"
+                f" for {self.control_id}"
             )
         self.props.append(property)
         return self
@@ -269,7 +256,7 @@ class ComponentDefinition(OSCALElement):
         # initialize optional component list
         if not self.components:
             self.components = []
-        elif key in self.components:
+        elif any(str(c.uuid) == key for c in self.components):
             raise KeyError(f"Component {key} already in ComponentDefinition")
         self.components.append(component)
         return self
@@ -279,7 +266,7 @@ class ComponentDefinition(OSCALElement):
         # initialize optional capability list
         if not self.capabilities:
             self.capabilities = []
-        elif key in self.capabilities:
+        elif any(str(c.uuid) == key for c in self.capabilities):
             raise KeyError(f"Capability {key} already in ComponentDefinition")
         self.capabilities.append(capability)
         return self
@@ -302,13 +289,13 @@ class ComponentModel(OSCALElement):
 
     @classmethod
     def from_json(cls, json_file: Union[str, Path]):
-        with open(json_file) as data:
+        with open_blob(json_file) as data:
             component = json.load(data)
 
         try:
             return cls(**component)
         except ValidationError:
-            return cls(**data["component"])  # type: ignore
+            return cls(**component["component"])
 
     @classmethod
     def list_components(cls):
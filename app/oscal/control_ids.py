@@ -0,0 +1,90 @@
+import re
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Tuple
+
+
+class ControlRegExps:
+    nist_800_171 = re.compile(r"^\d+\.\d+(\.\d+)*$")
+    nist_800_53_simple = re.compile(r"^([a-z]{2})-(\d+)$")
+    nist_800_53_extended = re.compile(r"^([a-z]{2})-(\d+)\s*\((\d+)\)$")
+    nist_800_53_part = re.compile(r"^([a-z]{2})-(\d+)\.([a-z]+)$")
+    nist_800_53_extended_part = re.compile(r"^([a-z]{2})-(\d+)\s*\((\d+)\)\.([a-z]+)$")
+    # All of the above in one pass: 1.2.3, AC-1, AC-2(1), AC-1.a and AC-2(1).b
+    control_id = re.compile(
+        r"""
+        ^(?:
+            (?P<nist_800_171>\d+(?:\.\d+)+)
+            |
+            (?P<family>[a-z]{2})-(?P<number>\d+)
+            (?:\s*\((?P<enhancement>\d+)\))?
+            (?:\.(?P<part>[a-z]+))?
+        )$
+        """,
+        re.VERBOSE,
+    )
+
+
+DIGITS = re.compile(r"(\d+)")
+
+
+class ControlId(NamedTuple):
+    control_id: str
+    statement_id: str
+
+
+@lru_cache(maxsize=65536)
+def normalize_control_id(control_id: str) -> ControlId:
+    """
+    The OSCAL control id and statement id of a control identifier in any of the
+    common 800-53 and 800-171 formats. Memoized, spreadsheets repeat the same ids.
+    """
+    control_id = control_id.strip().lower()
+    match = ControlRegExps.control_id.match(control_id)
+    if not match:
+        return ControlId(control_id, f"{control_id}_smt")
+    if match["nist_800_171"]:
+        return ControlId(control_id, f"{control_id}_smt")
+
+    oscal_id = f"{match['family']}-{int(match['number'])}"
+    if match["enhancement"]:
+        oscal_id = f"{oscal_id}.{int(match['enhancement'])}"
+    statement_id = f"{oscal_id}_smt"
+    if match["part"]:
+        statement_id = f"{statement_id}.{match['part']}"
+    return ControlId(oscal_id, statement_id)
+
+
+def normalize_control_ids(control_ids: Iterable) -> List[ControlId]:
+    """
+    Normalize a sequence or column of control identifiers in one call. Values that
+    are not strings, such as 800-171 ids read from a spreadsheet as numbers, are
+    converted first and empty cells give empty ids.
+    """
+    return [
+        normalize_control_id(value if isinstance(value, str) else str(value or ""))
+        for value in control_ids
+    ]
+
+
+def oscalize_control_id(control_id: str) -> str:
+    """
+    output an oscal standard control id from various common formats for control ids
+    """
+    return normalize_control_id(control_id).control_id
+
+
+def control_to_statement_id(control_id: str) -> str:
+    """
+    Construct an OSCAL style statement ID from a control identifier.
+    """
+    return normalize_control_id(control_id).statement_id
+
+
+@lru_cache(maxsize=65536)
+def natural_sort_key(control_id: str) -> Tuple:
+    """
+    A sort key that orders the numbers in a control or sort id by value, so ac-2
+    sorts before ac-10 and ac-2 before its enhancement ac-2.1.
+    """
+    parts = DIGITS.split(control_id.strip().lower())
+    return tuple(int(part) if i % 2 else part for i, part in enumerate(parts))
@@ -0,0 +1,206 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.oscal.control_ids import natural_sort_key
+from app.oscal.profile import walk_controls
+
+# The content of a control that is hashed and compared. Enhancements are controls
+# of their own, so a changed enhancement does not change its control.
+HASHED_FIELDS = ("title", "params", "props", "parts")
+# Bumped when the hash changes, so stored hashes are computed again.
+HASHES_VERSION = 1
+
+
+def control_hash(control: dict) -> str:
+    """
+    A structural hash of a control: the same title, params, props and parts give
+    the same hash, whatever the key order and whitespace of the file.
+    """
+    content = {name: control.get(name) for name in HASHED_FIELDS}
+    return hashlib.sha256(
+        json.dumps(content, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def is_withdrawn(control: dict) -> bool:
+    return any(
+        prop["name"] == "status" and prop["value"].lower() == "withdrawn"
+        for prop in control.get("props") or []
+    )
+
+
+def catalog_controls(catalog: dict) -> Dict[str, dict]:
+    """
+    The controls and enhancements of a catalog, parsed as JSON, by id.
+    """
+    catalog = catalog.get("catalog", catalog)
+    controls: Dict[str, dict] = {}
+    for group in catalog.get("groups") or []:
+        for control, _ in walk_controls(group.get("controls")):
+            controls[control["id"]] = control
+    for control, _ in walk_controls(catalog.get("controls")):
+        controls[control["id"]] = control
+    return controls
+
+
+def catalog_hashes(catalog: dict) -> dict:
+    controls = catalog_controls(catalog)
+    return {
+        "version": HASHES_VERSION,
+        "controls": {
+            control_id: control_hash(control)
+            for control_id, control in controls.items()
+        },
+        "withdrawn": sorted(
+            control_id
+            for control_id, control in controls.items()
+            if is_withdrawn(control)
+        ),
+    }
+
+
+def flatten_parts(
+    parts: Optional[List[dict]], path: str = ""
+) -> Iterator[Tuple[str, dict]]:
+    """
+    The parts of a control and of its parts, by id, or by their path of names
+    when they have none.
+    """
+    for part in parts or []:
+        key = part.get("id") or f"{path}{part['name']}"
+        yield key, part
+        yield from flatten_parts(part.get("parts"), f"{key}/")
+
+
+def describe(name: str, item: dict) -> str:
+    if name == "params":
+        values = item.get("values") or (item.get("select") or {}).get("choice") or []
+        return "; ".join(filter(None, [item.get("label"), ", ".join(values)]))
+    if name == "props":
+        return item.get("value", "")
+    return item.get("prose", "")
+
+
+def keyed_items(name: str, control: dict) -> Dict[str, dict]:
+    if name == "parts":
+        return dict(flatten_parts(control.get("parts")))
+    if name == "props":
+        # A prop name may repeat, e.g. the labels of SP 800-53 and 800-53A.
+        items: Dict[str, dict] = {}
+        counts: Dict[str, int] = {}
+        for prop in control.get("props") or []:
+            counts[prop["name"]] = counts.get(prop["name"], 0) + 1
+            count = counts[prop["name"]]
+            items[prop["name"] if count == 1 else f"{prop['name']}[{count}]"] = prop
+        return items
+    return {param["id"]: param for param in control.get("params") or []}
+
+
+def field_changes(old: dict, new: dict) -> List[dict]:
+    """
+    The changes between two versions of a control: its title, and the params,
+    props and parts that were added, removed or changed.
+    """
+    changes = []
+    if old.get("title") != new.get("title"):
+        changes.append(
+            {
+                "field": "title",
+                "key": "title",
+                "change": "changed",
+                "old": old.get("title"),
+                "new": new.get("title"),
+            }
+        )
+    for name in HASHED_FIELDS[1:]:
+        if old.get(name) == new.get(name):
+            continue
+        old_items, new_items = keyed_items(name, old), keyed_items(name, new)
+        for key in [*old_items, *(k for k in new_items if k not in old_items)]:
+            before, after = old_items.get(key), new_items.get(key)
+            if before is not None and after is not None:
+                if name == "parts":
+                    # Only the part itself, its subparts are compared on their own.
+                    before = {k: v for k, v in before.items() if k != "parts"}
+                    after = {k: v for k, v in after.items() if k != "parts"}
+                if before == after:
+                    continue
+            changes.append(
+                {
+                    "field": name,
+                    "key": key,
+                    "change": "changed"
+                    if before and after
+                    else ("removed" if before else "added"),
+                    "old": describe(name, before) if before else None,
+                    "new": describe(name, after) if after else None,
+                }
+            )
+    return changes
+
+
+@dataclass
+class CatalogDiff:
+    """
+    The controls added, removed, withdrawn and changed between two catalogs, with
+    the field changes of every changed control.
+    """
+
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    withdrawn: List[str] = field(default_factory=list)
+    changed: Dict[str, List[dict]] = field(default_factory=dict)
+    unchanged: int = 0
+
+    @property
+    def affected(self) -> Set[str]:
+        """
+        The controls of the old catalog that an implementation may need to revisit.
+        """
+        return {*self.removed, *self.withdrawn, *self.changed}
+
+    def change(self, control_id: str) -> str:
+        if control_id in self.changed:
+            return "changed"
+        return "withdrawn" if control_id in self.withdrawn else "removed"
+
+
+def diff_catalogs(
+    old_hashes: dict,
+    new_hashes: dict,
+    old_controls: Callable[[], Dict[str, dict]],
+    new_controls: Callable[[], Dict[str, dict]],
+) -> CatalogDiff:
+    """
+    Diff two catalogs by their control hashes, in one pass over each. The
+    controls are only loaded, with old_controls and new_controls, to compute the
+    field changes of the controls whose hashes differ.
+    """
+    old, new = old_hashes["controls"], new_hashes["controls"]
+    old_withdrawn = set(old_hashes["withdrawn"])
+    new_withdrawn = set(new_hashes["withdrawn"])
+    diff = CatalogDiff()
+    changed = []
+    for control_id, digest in old.items():
+        if control_id not in new:
+            diff.removed.append(control_id)
+        elif new[control_id] == digest:
+            diff.unchanged += 1
+        elif control_id in new_withdrawn and control_id not in old_withdrawn:
+            diff.withdrawn.append(control_id)
+        else:
+            changed.append(control_id)
+    diff.added = [control_id for control_id in new if control_id not in old]
+
+    if changed:
+        before, after = old_controls(), new_controls()
+        diff.changed = {
+            control_id: field_changes(before[control_id], after[control_id])
+            for control_id in sorted(changed, key=natural_sort_key)
+        }
+    diff.added.sort(key=natural_sort_key)
+    diff.removed.sort(key=natural_sort_key)
+    diff.withdrawn.sort(key=natural_sort_key)
+    return diff
@@ -0,0 +1,27 @@
+from enum import Enum
+
+
+class ComponentTypeEnum(str, Enum):
+    software = "software"
+    hardware = "hardware"
+    service = "service"
+    interconnection = "interconnection"
+    policy = "policy"
+    process = "process"
+    procedure = "procedure"
+    plan = "plan"
+    guidance = "guidance"
+    standard = "standard"
+    validation = "validation"
+
+
+class ConflictPolicyEnum(str, Enum):
+    """
+    How a merge resolves values that differ: keep the first definition's, take the
+    last one's, combine the narratives, or fail.
+    """
+
+    first = "first"
+    last = "last"
+    combine = "combine"
+    error = "error"
@@ -0,0 +1,174 @@
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.oscal.control_ids import oscalize_control_id
+
+if TYPE_CHECKING:
+    from app.oscal.catalog import CatalogModel
+
+# Terms may have parentheses in their value, as in id:ac-2(1).
+TOKENS = re.compile(r"[^\s():]+:(?:[^\s()]|\([^\s()]*\))+|\(|\)|[^\s()]+")
+FIELDS = ("family", "prop", "type", "id", "baseline")
+OPERATORS = ("AND", "OR", "NOT")
+
+
+class FilterError(ValueError):
+    pass
+
+
+def parse_term(token: str) -> tuple:
+    field, _, value = token.partition(":")
+    field = field.lower()
+    if field not in FIELDS or not value:
+        raise FilterError(
+            f"Unknown filter {token}, use one of "
+            + ", ".join(f"{name}:<value>" for name in FIELDS)
+        )
+    if field == "id":
+        value = oscalize_control_id(value)
+    elif field == "type" and value.lower() not in ("control", "enhancement"):
+        raise FilterError(f"{token} must be type:control or type:enhancement.")
+    return ("term", field, value if field == "baseline" else value.lower())
+
+
+@lru_cache(maxsize=1024)
+def parse_filter(expression: str) -> tuple:
+    """
+    Parse a filter such as ``family:ac AND NOT prop:status=withdrawn`` into a tree
+    of ("and", a, b), ("or", a, b), ("not", a) and ("term", field, value) nodes.
+    Terms next to each other are ANDed, NOT binds tighter than AND, AND than OR.
+    """
+    tokens = TOKENS.findall(expression)
+    position = 0
+
+    def peek() -> Optional[str]:
+        return tokens[position] if position < len(tokens) else None
+
+    def take() -> str:
+        nonlocal position
+        token = peek()
+        if token is None:
+            raise FilterError(f"The filter {expression} is incomplete.")
+        position += 1
+        return token
+
+    def any_of() -> tuple:
+        node = all_of()
+        while peek() and peek().upper() == "OR":
+            take()
+            node = ("or", node, all_of())
+        return node
+
+    def all_of() -> tuple:
+        node = negation()
+        while peek() not in (None, ")") and peek().upper() != "OR":
+            if peek().upper() == "AND":
+                take()
+            node = ("and", node, negation())
+        return node
+
+    def negation() -> tuple:
+        if peek() and peek().upper() == "NOT":
+            take()
+            return ("not", negation())
+        token = take()
+        if token == "(":
+            node = any_of()
+            if take() != ")":
+                raise FilterError(f"Missing ) in the filter {expression}.")
+            return node
+        if token == ")" or token.upper() in OPERATORS:
+            raise FilterError(f"Unexpected {token} in the filter {expression}.")
+        return parse_term(token)
+
+    if not tokens:
+        raise FilterError("The filter is empty.")
+    tree = any_of()
+    if peek() is not None:
+        raise FilterError(f"Unexpected {peek()} in the filter {expression}.")
+    return tree
+
+
+class FilterIndex:
+    """
+    Bitsets of the controls and enhancements of a catalog, one bit per control in
+    sort order, for every family, type, prop name and prop name=value. Filters are
+    evaluated with integer AND, OR and NOT on the bitsets.
+    """
+
+    def __init__(self, catalog: "CatalogModel"):
+        self.ids: List[str] = catalog.ordered_ids
+        self.positions: Dict[str, int] = catalog.positions
+        self.all = (1 << len(self.ids)) - 1
+        self.bitsets: Dict[Tuple[str, str], int] = defaultdict(int)
+
+        for group in catalog.groups or []:
+            for control in group.controls or []:
+                self.add(control, group.id, "control")
+                for enhancement in getattr(control, "controls", None) or []:
+                    self.add(enhancement, group.id, "enhancement")
+        self.bitsets = dict(self.bitsets)
+
+    def add(self, control, family: Optional[str], type_: str):
+        bit = 1 << self.positions[control.id]
+        self.bitsets[("family", (family or "").lower())] |= bit
+        self.bitsets[("type", type_)] |= bit
+        for prop in control.props or []:
+            name = prop.name.lower()
+            self.bitsets[("prop", name)] |= bit
+            self.bitsets[("prop", f"{name}={prop.value.lower()}")] |= bit
+
+    def select(self, control_ids: Iterable[str]) -> int:
+        bits = 0
+        for control_id in control_ids:
+            if (position := self.positions.get(control_id)) is not None:
+                bits |= 1 << position
+        return bits
+
+    def evaluate(
+        self,
+        expression: str,
+        baseline: Optional[Callable[[str], Iterable[str]]] = None,
+    ) -> int:
+        """
+        The bitset of the controls matching a filter. baseline:<value> terms select
+        the control ids returned by the baseline callable.
+        """
+
+        def evaluate_node(node: tuple) -> int:
+            operator = node[0]
+            if operator == "and":
+                return evaluate_node(node[1]) & evaluate_node(node[2])
+            if operator == "or":
+                return evaluate_node(node[1]) | evaluate_node(node[2])
+            if operator == "not":
+                return self.all & ~evaluate_node(node[1])
+            field, value = node[1:]
+            if field == "id":
+                return self.select([value])
+            if field == "baseline":
+                if baseline is None:
+                    raise FilterError("Baseline filters are not available here.")
+                return self.select(baseline(value))
+            return self.bitsets.get((field, value), 0)
+
+        return evaluate_node(parse_filter(expression))
+
+    def control_ids(self, bits: int) -> List[str]:
+        """
+        The ids of the controls of a bitset, in sort order.
+        """
+        return [
+            self.ids[position]
+            for position, bit in enumerate(reversed(bin(bits)[2:]))
+            if bit == "1"
+        ]
+
+    def match(
+        self,
+        expression: str,
+        baseline: Optional[Callable[[str], Iterable[str]]] = None,
+    ) -> List[str]:
+        return self.control_ids(self.evaluate(expression, baseline))
@@ -0,0 +1,50 @@
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Tuple, Union
+
+from flask import current_app, has_app_context
+
+if TYPE_CHECKING:
+    from app.oscal.catalog import CatalogModel
+    from app.oscal.component import ComponentModel
+
+
+# Building the pydantic OSCAL models is the slowest part of importing the app,
+# these load them on first use instead of at startup.
+
+_catalogs: "OrderedDict[str, Tuple[int, int, CatalogModel]]" = OrderedDict()
+
+
+def catalog_cache_size() -> int:
+    if has_app_context():
+        return current_app.config.get("CATALOG_CACHE_SIZE", 16)
+    return 16
+
+
+def load_catalog(json_file: Union[str, Path]) -> "CatalogModel":
+    """
+    Parse a Catalog file, memoized on the file's mtime and size. Catalogs are only
+    read by the app, so the parsed models are shared between requests, and with
+    workers forked after the warmup.
+    """
+    from app.oscal.catalog import CatalogModel
+
+    filename = str(json_file)
+    stat = os.stat(filename)
+    cached = _catalogs.get(filename)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        _catalogs.move_to_end(filename)
+        return cached[2]
+
+    catalog = CatalogModel.from_json(json_file)
+    _catalogs[filename] = (stat.st_mtime_ns, stat.st_size, catalog)
+    while len(_catalogs) > catalog_cache_size():
+        _catalogs.popitem(last=False)
+    return catalog
+
+
+def load_component(json_file: Union[str, Path]) -> "ComponentModel":
+    from app.oscal.component import ComponentModel
+
+    return ComponentModel.from_json(json_file)
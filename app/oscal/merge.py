@@ -0,0 +1,281 @@
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from app.oscal.enums import ConflictPolicyEnum
+
+# Fields whose values are appended to each other with the combine policy.
+COMBINED_FIELDS = ("description", "remarks", "values", "party_uuids")
+MAX_CONFLICTS = 500
+
+
+class MergeConflict(ValueError):
+    def __init__(self, conflicts: List[dict]):
+        self.conflicts = conflicts
+        paths = ", ".join(conflict["path"] for conflict in conflicts[:5])
+        super().__init__(f"{len(conflicts)} conflicts merging the definitions: {paths}")
+
+
+class DefinitionMerger:
+    """
+    Merge component definitions into the first one added. Components are matched
+    by uuid or title, capabilities by uuid or name, control implementations by
+    source, implemented requirements by control id and statements by statement
+    id. The items of every list are indexed once, when the list is first merged
+    into, so merging N definitions is linear in their total size. Values that
+    differ are resolved with the conflict policy: keep the first, take the last,
+    combine the narratives, or raise a MergeConflict with all of them.
+    """
+
+    def __init__(self, policy: ConflictPolicyEnum = ConflictPolicyEnum.first):
+        self.policy = ConflictPolicyEnum(policy)
+        self.model = None
+        self.conflicts: List[dict] = []
+        self.conflict_count = 0
+        self._indexes: Dict[Tuple[int, str], Dict[Hashable, Any]] = {}
+
+    def resolve(self, owner, name: str, incoming, path: str):
+        current = getattr(owner, name)
+        if incoming in (None, "", []) or incoming == current:
+            return
+        if current in (None, "", []):
+            setattr(owner, name, incoming)
+            return
+        combine = self.policy is ConflictPolicyEnum.combine and name in COMBINED_FIELDS
+        if combine and contains(current, incoming):
+            return
+        self.conflict_count += 1
+        if len(self.conflicts) < MAX_CONFLICTS:
+            self.conflicts.append(
+                {
+                    "path": f"{path}/{name}",
+                    "first": str(current),
+                    "other": str(incoming),
+                }
+            )
+        if self.policy is ConflictPolicyEnum.last:
+            setattr(owner, name, incoming)
+        elif combine:
+            if isinstance(current, list):
+                setattr(
+                    owner, name, current + [v for v in incoming if v not in current]
+                )
+            else:
+                setattr(owner, name, f"{current}\n\n{incoming}")
+
+    def index(
+        self, owner, name: str, keys: Callable[[Any], Sequence[Hashable]]
+    ) -> Dict[Hashable, Any]:
+        """
+        The items of a list field by each of their keys, built once per list.
+        """
+        index = self._indexes.get((id(owner), name))
+        if index is None:
+            index = {}
+            for item in getattr(owner, name) or []:
+                for key in keys(item):
+                    index.setdefault(key, item)
+            self._indexes[(id(owner), name)] = index
+        return index
+
+    def merge_list(
+        self,
+        owner,
+        name: str,
+        incoming: Optional[list],
+        keys: Callable[[Any], Sequence[Hashable]],
+        merge: Optional[Callable[[Any, Any, str], None]] = None,
+        path: str = "",
+    ):
+        """
+        Merge the items of incoming into a list field, merging the items that have
+        a key in common with merge, and adding the others.
+        """
+        if not incoming:
+            return
+        index = self.index(owner, name, keys)
+        if getattr(owner, name) is None:
+            setattr(owner, name, [])
+        items = getattr(owner, name)
+        for item in incoming:
+            item_keys = keys(item)
+            existing = next((index[k] for k in item_keys if k in index), None)
+            if existing is None:
+                items.append(item)
+                for key in item_keys:
+                    index.setdefault(key, item)
+            elif merge is not None:
+                merge(existing, item, f"{path}/{keys(existing)[0]}")
+
+    def merge_common(self, existing, incoming, path: str):
+        """
+        The description, remarks, props, links and responsible roles of an item.
+        """
+        for name in ("description", "remarks"):
+            if hasattr(existing, name):
+                self.resolve(existing, name, getattr(incoming, name), path)
+        self.merge_list(existing, "props", incoming.props, prop_keys, self.merge_prop)
+        self.merge_list(existing, "links", incoming.links, links_keys)
+        if hasattr(existing, "responsible_roles"):
+            self.merge_list(
+                existing,
+                "responsible_roles",
+                incoming.responsible_roles,
+                lambda role: [role.role_id],
+                self.merge_role,
+                path,
+            )
+
+    def merge_prop(self, existing, prop, path: str):
+        self.resolve(existing, "value", prop.value, path)
+
+    def merge_role(self, existing, role, path: str):
+        self.resolve(existing, "party_uuids", getattr(role, "party_uuids", None), path)
+
+    def merge_statement(self, existing, statement, path: str):
+        self.merge_common(existing, statement, path)
+
+    def merge_parameter(self, existing, parameter, path: str):
+        self.resolve(existing, "values", parameter.values, path)
+
+    def merge_requirement(self, existing, requirement, path: str):
+        self.merge_common(existing, requirement, path)
+        self.merge_list(
+            existing,
+            "set_parameters",
+            requirement.set_parameters,
+            lambda parameter: [parameter.id],
+            self.merge_parameter,
+            path,
+        )
+        self.merge_list(
+            existing,
+            "statements",
+            requirement.statements,
+            lambda statement: [statement.statement_id],
+            self.merge_statement,
+            path,
+        )
+
+    def merge_implementation(self, existing, implementation, path: str):
+        self.merge_common(existing, implementation, path)
+        self.merge_list(
+            existing,
+            "implemented_requirements",
+            implementation.implemented_requirements,
+            lambda requirement: [requirement.control_id],
+            self.merge_requirement,
+            path,
+        )
+
+    def merge_implementations(self, existing, item, path: str):
+        self.merge_list(
+            existing,
+            "control_implementations",
+            item.control_implementations,
+            lambda implementation: [implementation.source],
+            self.merge_implementation,
+            path,
+        )
+
+    def merge_component(self, existing, component, path: str):
+        self.merge_common(existing, component, path)
+        self.resolve(existing, "purpose", component.purpose, path)
+        self.merge_implementations(existing, component, path)
+
+    def merge_capability(self, existing, capability, path: str):
+        self.merge_common(existing, capability, path)
+        self.merge_implementations(existing, capability, path)
+        self.merge_list(
+            existing,
+            "incorporates_components",
+            capability.incorporates_components,
+            lambda incorporated: [incorporated.component_uuid],
+        )
+
+    def add(self, model):
+        """
+        Merge a ComponentModel into the result. The first one added is the result,
+        the items of the others are moved into it rather than copied.
+        """
+        if self.model is None:
+            self.model = model
+            return self
+        definition = self.model.component_definition
+        incoming = model.component_definition
+        self.merge_list(
+            definition,
+            "components",
+            incoming.components,
+            lambda component: [component.title.lower(), component.uuid],
+            self.merge_component,
+            "components",
+        )
+        self.merge_list(
+            definition,
+            "capabilities",
+            incoming.capabilities,
+            lambda capability: [capability.name.lower(), capability.uuid],
+            self.merge_capability,
+            "capabilities",
+        )
+        metadata = definition.metadata
+        self.merge_list(
+            metadata, "roles", incoming.metadata.roles, lambda role: [role.id]
+        )
+        self.merge_list(
+            metadata, "parties", incoming.metadata.parties, lambda party: [party.uuid]
+        )
+        if incoming.back_matter and incoming.back_matter.resources:
+            if definition.back_matter is None:
+                definition.back_matter = incoming.back_matter
+            else:
+                self.merge_list(
+                    definition.back_matter,
+                    "resources",
+                    incoming.back_matter.resources,
+                    lambda resource: [resource.uuid],
+                )
+        return self
+
+    def result(self):
+        """
+        The merged ComponentModel, ready to be serialized once.
+        """
+        if self.model is None:
+            raise ValueError("There are no definitions to merge.")
+        if self.conflicts and self.policy is ConflictPolicyEnum.error:
+            raise MergeConflict(self.conflicts)
+        self.model.component_definition.metadata.last_modified = datetime.now(
+            timezone.utc
+        )
+        return self.model
+
+
+def contains(current, incoming) -> bool:
+    """
+    Whether a combined value already has the incoming one.
+    """
+    if isinstance(current, list):
+        return all(value in current for value in incoming)
+    return incoming in str(current).split("\n\n")
+
+
+def prop_keys(prop) -> list:
+    return [(prop.name, prop.ns, prop.prop_class)]
+
+
+def links_keys(link) -> list:
+    return [(link.href, link.rel)]
+
+
+def merge_definitions(
+    models: Sequence, policy: ConflictPolicyEnum = ConflictPolicyEnum.first
+) -> Tuple[Any, List[dict]]:
+    """
+    Merge ComponentModels, in order, into the first. Returns the merged model and
+    the conflicts that were resolved with the policy.
+    """
+    merger = DefinitionMerger(policy)
+    for model in models:
+        merger.add(model)
+    return merger.result(), merger.conflicts
@@ -1,113 +1,17 @@
-import re
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 from uuid import UUID, uuid4
 
-from pydantic import BaseModel, Field
-
-OSCAL_VERSION = "1.0.0"
+from pydantic import BaseModel, Field, PrivateAttr
 
+from app.oscal.control_ids import (  # noqa: F401
+    ControlRegExps,
+    control_to_statement_id,
+    oscalize_control_id,
+)
 
-class ControlRegExps:
-    nist_800_171 = re.compile(r"^\d+\.\d+(\.\d+)*$")
-    nist_800_53_simple = re.compile(r"^([a-z]{2})-(\d+)$")
-    nist_800_53_extended = re.compile(r"^([a-z]{2})-(\d+)\s*\((\d+)\)$")
-    nist_800_53_part = re.compile(r"^([a-z]{2})-(\d+)\.([a-z]+)$")
-    nist_800_53_extended_part = re.compile(r"^([a-z]{2})-(\d+)\s*\((\d+)\)\.([a-z]+)$")
-
-
-def oscalize_control_id(control_id):
-    """
-    output an oscal standard control id from various common formats for control ids
-    """
-
-    control_id = control_id.strip()
-    control_id = control_id.lower()
-
-    # 1.2, 1.2.3, 1.2.3.4, etc.
-    if re.match(ControlRegExps.nist_800_171, control_id):
-        return control_id
-
-    # AC-1
-    match = re.match(ControlRegExps.nist_800_53_simple, control_id)
-    if match:
-        family = match.group(1)
-        number = int(match.group(2))
-        return f"{family}-{number}"
-
-    # AC-2(1)
-    match = re.match(ControlRegExps.nist_800_53_extended, control_id)
-    if match:
-        family = match.group(1)
-        number = int(match.group(2))
-        extension = int(match.group(3))
-        return f"{family}-{number}.{extension}"
-
-    # AC-1.a
-    match = re.match(ControlRegExps.nist_800_53_part, control_id)
-    if match:
-        family = match.group(1)
-        number = int(match.group(2))
-        return f"{family}-{number}"
-
-    # AC-2(1).b
-    match = re.match(ControlRegExps.nist_800_53_extended_part, control_id)
-    if match:
-        family = match.group(1)
-        number = int(match.group(2))
-        extension = int(match.group(3))
-        return f"{family}-{number}.{extension}"
-
-    return control_id
-
-
-def control_to_statement_id(control_id):
-    """
-    Construct an OSCAL style statement ID from a control identifier.
-    """
-
-    control_id = control_id.strip()
-    control_id = control_id.lower()
-
-    # 1.2, 1.2.3, 1.2.3.4, etc.
-    if re.match(ControlRegExps.nist_800_171, control_id):
-        return f"{control_id}_smt"
-
-    # AC-1
-    match = re.match(ControlRegExps.nist_800_53_simple, control_id)
-    if match:
-        family = match.group(1)
-        number = int(match.group(2))
-        return f"{family}-{number}_smt"
-
-    # AC-2(1)
-    match = re.match(ControlRegExps.nist_800_53_extended, control_id)
-    if match:
-        family = match.group(1)
-        number = int(match.group(2))
-        extension = int(match.group(3))
-        return f"{family}-{number}.{extension}_smt"
-
-    # AC-1.a
-    match = re.match(ControlRegExps.nist_800_53_part, control_id)
-    if match:
-        family = match.group(1)
-        number = int(match.group(2))
-        part = match.group(3)
-        return f"{family}-{number}_smt.{part}"
-
-    # AC-2(1).b
-    match = re.match(ControlRegExps.nist_800_53_extended_part, control_id)
-    if match:
-        family = match.group(1)
-        number = int(match.group(2))
-        extension = int(match.group(3))
-        part = match.group(4)
-        return f"{family}-{number}.{extension}_smt.{part}"
-
-    # nothing matched ...
-    return f"{control_id}_smt"
+OSCAL_VERSION = "1.0.0"
 
 
 class NCName(str):
@@ -233,19 +137,14 @@ class Annotation(OSCALElement):
 
 class BackMatter(OSCALElement):
     resources: Optional[List[Resource]]
+    _resources_index: Dict[str, Resource] = PrivateAttr(default_factory=dict)
 
     def get_resource_by_uuid(self, uuid: UUID) -> Union[Resource, Any, None]:
-        result = None
-        if hasattr(self, "resources"):
-            result = next(
-                (
-                    r
-                    for r in self.resources  # type: ignore
-                    if hasattr(r, "uuid") and str(r.uuid) == uuid
-                ),
-                None,
-            )
-        return result
+        if not self._resources_index and self.resources:
+            self._resources_index = {
+                str(r.uuid): r for r in self.resources if hasattr(r, "uuid")
+            }
+        return self._resources_index.get(str(uuid))
 
 
 class EmailAddress(str):
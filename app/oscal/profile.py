@@ -0,0 +1,306 @@
+import copy
+import hashlib
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from fnmatch import fnmatchcase
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# Resolved controls, keyed by the source catalog hash, the control id and the hash
+# of the profile modifications of the control. Resolving a changed profile against
+# the same catalog only copies and alters the controls whose modifications changed.
+_resolved: "OrderedDict[Tuple[str, str, str], dict]" = OrderedDict()
+_lock = threading.Lock()
+RESOLVED_CACHE_SIZE = 20000
+
+
+def digest(value) -> str:
+    return hashlib.sha256(
+        json.dumps(value, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def walk_controls(
+    controls: List[dict], parent: Optional[str] = None
+) -> Iterator[Tuple[dict, Optional[str]]]:
+    for control in controls or []:
+        yield control, parent
+        yield from walk_controls(control.get("controls"), control["id"])
+
+
+class ProfileResolver:
+    """
+    Resolve an OSCAL profile against a catalog, both as parsed JSON. Controls and
+    parameters are indexed by id in one pass over the catalog, so the selection,
+    parameter settings and alterations are lookups and resolution is linear in the
+    size of the catalog.
+    """
+
+    def __init__(self, catalog: dict, catalog_hash: str = ""):
+        self.catalog = catalog.get("catalog", catalog)
+        self.catalog_hash = catalog_hash or digest(self.catalog)
+        self.controls: Dict[str, dict] = {}
+        self.parents: Dict[str, Optional[str]] = {}
+        self.children: Dict[str, List[str]] = {}
+        self.params: Dict[str, str] = {}
+        for group in self.catalog.get("groups") or []:
+            self.index(group.get("controls"))
+        self.index(self.catalog.get("controls"))
+
+    def index(self, controls: List[dict]):
+        for control, parent in walk_controls(controls):
+            self.controls[control["id"]] = control
+            self.parents[control["id"]] = parent
+            self.children.setdefault(control["id"], [])
+            if parent:
+                self.children[parent].append(control["id"])
+            for param in control.get("params") or []:
+                self.params[param["id"]] = control["id"]
+
+    def matching(self, selection: dict) -> Set[str]:
+        """
+        The control ids of an include-controls or exclude-controls selection.
+        """
+        selected: Set[str] = set()
+        for control_id in selection.get("with-ids") or []:
+            if control_id not in self.controls:
+                raise ValueError(
+                    f"The profile selects {control_id}, not in the catalog."
+                )
+            selected.add(control_id)
+        for matching in selection.get("matching") or []:
+            pattern = matching["pattern"]
+            selected.update(c for c in self.controls if fnmatchcase(c, pattern))
+        if selection.get("with-child-controls") == "yes":
+            pending = list(selected)
+            while pending:
+                children = self.children[pending.pop()]
+                selected.update(children)
+                pending.extend(children)
+        return selected
+
+    def select(self, imports: List[dict]) -> Set[str]:
+        selected: Set[str] = set()
+        for import_ in imports:
+            included: Set[str] = set()
+            if "include-all" in import_ or not import_.get("include-controls"):
+                included.update(self.controls)
+            for selection in import_.get("include-controls") or []:
+                included |= self.matching(selection)
+            for selection in import_.get("exclude-controls") or []:
+                included -= self.matching(selection)
+            selected |= included
+        # Keep the controls of selected enhancements so the structure is intact.
+        for control_id in list(selected):
+            while (
+                control_id := self.parents[control_id]
+            ) and control_id not in selected:
+                selected.add(control_id)
+        return selected
+
+    def modifications(self, modify: dict) -> Dict[str, dict]:
+        """
+        The set-parameters and alters of the profile, by the control they apply to.
+        """
+        by_control: Dict[str, dict] = {}
+        for setting in modify.get("set-parameters") or []:
+            control_id = self.params.get(setting["param-id"])
+            if control_id is None:
+                raise ValueError(
+                    f"The profile sets {setting['param-id']}, not in the catalog."
+                )
+            by_control.setdefault(control_id, {"params": [], "alters": []})
+            by_control[control_id]["params"].append(setting)
+        for alter in modify.get("alters") or []:
+            control_id = alter["control-id"]
+            if control_id not in self.controls:
+                raise ValueError(
+                    f"The profile alters {control_id}, not in the catalog."
+                )
+            by_control.setdefault(control_id, {"params": [], "alters": []})
+            by_control[control_id]["alters"].append(alter)
+        return by_control
+
+    def resolve_control(self, control_id: str, modifications: Optional[dict]) -> dict:
+        """
+        A copy of a control, without its enhancements, with the modifications of
+        the profile applied.
+        """
+        key = (self.catalog_hash, control_id, digest(modifications))
+        with _lock:
+            if key in _resolved:
+                _resolved.move_to_end(key)
+                return _resolved[key]
+
+        control = {
+            k: v for k, v in self.controls[control_id].items() if k != "controls"
+        }
+        if modifications:
+            control = copy.deepcopy(control)
+            for setting in modifications["params"]:
+                set_parameter(control, setting)
+            for alter in modifications["alters"]:
+                for remove in alter.get("removes") or []:
+                    remove_items(control, remove)
+                for add in alter.get("adds") or []:
+                    add_items(control, add)
+        with _lock:
+            _resolved[key] = control
+            while len(_resolved) > RESOLVED_CACHE_SIZE:
+                _resolved.popitem(last=False)
+        return control
+
+    def resolve_controls(
+        self, controls: List[dict], selected: Set[str], modifications: Dict[str, dict]
+    ) -> List[dict]:
+        resolved = []
+        for control in controls or []:
+            if control["id"] not in selected:
+                continue
+            # Shallow copies, the resolved controls are shared between resolutions.
+            item = dict(
+                self.resolve_control(control["id"], modifications.get(control["id"]))
+            )
+            if children := self.resolve_controls(
+                control.get("controls"), selected, modifications
+            ):
+                item["controls"] = children
+            resolved.append(item)
+        return resolved
+
+    def resolve(self, profile: dict) -> dict:
+        """
+        The resolved catalog of a profile. The result is deterministic, the same
+        profile and catalog always give the same document.
+        """
+        profile = profile.get("profile", profile)
+        if not profile.get("imports"):
+            raise ValueError("The profile has no imports.")
+        selected = self.select(profile["imports"])
+        modifications = self.modifications(profile.get("modify") or {})
+
+        groups = []
+        for group in self.catalog.get("groups") or []:
+            controls = self.resolve_controls(
+                group.get("controls"), selected, modifications
+            )
+            if controls:
+                groups.append(
+                    {
+                        **{k: v for k, v in group.items() if k != "controls"},
+                        "controls": controls,
+                    }
+                )
+
+        metadata = dict(profile["metadata"])
+        # The later of the inputs, not the time of resolution, so resolving again
+        # gives the same document.
+        metadata["last-modified"] = latest(
+            metadata.get("last-modified"),
+            self.catalog["metadata"].get("last-modified"),
+        )
+        metadata["oscal-version"] = self.catalog["metadata"]["oscal-version"]
+        resolved = {
+            # A version 4 uuid, as OSCAL requires, derived from the inputs.
+            "uuid": str(
+                uuid.UUID(
+                    bytes=hashlib.sha256(
+                        f"{digest(profile)}:{self.catalog_hash}".encode()
+                    ).digest()[:16],
+                    version=4,
+                )
+            ),
+            "metadata": metadata,
+            "groups": groups,
+        }
+        if controls := self.resolve_controls(
+            self.catalog.get("controls"), selected, modifications
+        ):
+            resolved["controls"] = controls
+        if back_matter := self.catalog.get("back-matter"):
+            resolved["back-matter"] = back_matter
+        return {"catalog": resolved}
+
+
+def latest(*timestamps: Optional[str]) -> str:
+    """
+    The latest of OSCAL date-times with a timezone, as written in the input.
+    """
+
+    def parse(timestamp: str) -> datetime:
+        return datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+
+    values = [timestamp for timestamp in timestamps if timestamp]
+    if not values:
+        return datetime.fromtimestamp(0, timezone.utc).isoformat()
+    return max(values, key=parse)
+
+
+def set_parameter(control: dict, setting: dict):
+    for param in control.get("params") or []:
+        if param["id"] == setting["param-id"]:
+            param.update({k: v for k, v in setting.items() if k != "param-id"})
+
+
+def matches(item: dict, remove: dict) -> bool:
+    return (
+        ("by-name" not in remove or item.get("name") == remove["by-name"])
+        and ("by-class" not in remove or item.get("class") == remove["by-class"])
+        and ("by-id" not in remove or item.get("id") == remove["by-id"])
+        and ("by-ns" not in remove or item.get("ns") == remove["by-ns"])
+    )
+
+
+def remove_items(item: dict, remove: dict):
+    """
+    Remove the parts, props, links and params of an item, and of its parts, that
+    match the by-name, by-class, by-id and by-ns of a remove.
+    """
+    names = ("parts", "props", "links", "params")
+    if item_name := remove.get("by-item-name"):
+        names = (item_name if item_name.endswith("s") else f"{item_name}s",)
+    for name in names:
+        if name in item:
+            item[name] = [child for child in item[name] if not matches(child, remove)]
+    for part in item.get("parts") or []:
+        remove_items(part, remove)
+
+
+def find_part(parts: List[dict], part_id: str) -> Optional[Tuple[List[dict], int]]:
+    for i, part in enumerate(parts or []):
+        if part.get("id") == part_id:
+            return parts, i
+        if found := find_part(part.get("parts"), part_id):
+            return found
+    return None
+
+
+def add_items(control: dict, add: dict):
+    """
+    Add the title, params, props, links and parts of an add to a control, or
+    before, after or inside one of its parts with by-id.
+    """
+    position = add.get("position", "ending")
+    target = control
+    if by_id := add.get("by-id"):
+        if by_id != control["id"]:
+            found = find_part(control.get("parts"), by_id)
+            if found is None:
+                raise ValueError(f"{by_id} is not a part of {control['id']}.")
+            siblings, index = found
+            if position in ("before", "after"):
+                at = index if position == "before" else index + 1
+                siblings[at:at] = add.get("parts") or []
+                return
+            target = siblings[index]
+    if "title" in add:
+        target["title"] = add["title"]
+    for name in ("params", "props", "links", "parts"):
+        if items := add.get(name):
+            existing = target.setdefault(name, [])
+            if position == "starting":
+                target[name] = items + existing
+            else:
+                existing.extend(items)
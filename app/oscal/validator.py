@@ -2,10 +2,33 @@ import json
 from dataclasses import dataclass, field
 from io import BufferedReader
 from pathlib import Path
+from typing import Any, Dict
 
-import jsonschema
-import jsonschema.exceptions as exceptions
-from flask import current_app
+SCHEMAS = Path(__file__).parent.joinpath("schemas")
+
+_validators: Dict[str, Any] = {}
+
+
+def schema_path(validator: str) -> Path:
+    return SCHEMAS.joinpath(validator)
+
+
+def compiled_validator(validator: str):
+    """
+    The jsonschema validator of an OSCAL schema, loaded and checked once per
+    process.
+    """
+    path = schema_path(validator).as_posix()
+    if path not in _validators:
+        # jsonschema is slow to import, only load it when a schema is needed.
+        from jsonschema.validators import validator_for
+
+        with open(path, "r") as f:
+            schema = json.load(f)
+        cls = validator_for(schema)
+        cls.check_schema(schema)
+        _validators[path] = cls(schema)
+    return _validators[path]
 
 
 @dataclass
@@ -15,27 +38,27 @@ class OscalValidator:
     oscal_schema: dict = field(default_factory=dict)
 
     def validate_file(self) -> bool:
+        import jsonschema.exceptions as exceptions
+
         try:
             json_file = json.load(self.file)
         except FileNotFoundError:
             raise FileNotFoundError(f"Unable to load file: {self.file}")
 
-        self.get_validator()
         try:
-            jsonschema.validate(instance=json_file, schema=self.oscal_schema)
+            self.get_validator().validate(json_file)
         except exceptions.ValidationError as exc:
             raise exceptions.ValidationError(
-                f"{json_file} is not a valid OSCAL."
+                f"{getattr(self.file, 'name', 'The file')} is not a valid OSCAL "
+                f"document: {exc.message}"
             ) from exc
         except exceptions.SchemaError as exc:
             raise exceptions.ValidationError(
-                f"{self.oscal_schema} schema is not a valid OSCAL schema."
+                f"{self.validator} is not a valid OSCAL schema."
             ) from exc
         return True
 
     def get_validator(self):
-        schema = Path(current_app.config["BASEPATH"]).joinpath(
-            "oscal", "schemas", self.validator
-        )
-        with open(schema, "r") as f:
-            self.oscal_schema = json.load(f)
+        validator = compiled_validator(self.validator)
+        self.oscal_schema = validator.schema
+        return validator
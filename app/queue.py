@@ -0,0 +1,156 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable, Dict, Optional
+
+from flask import Flask, current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+
+class JobQueue:
+    """
+    Run slow work such as catalog imports and exports on a thread pool, outside
+    the request that asked for it. The state of every job is kept in the jobs table,
+    so its status can be reported by any worker and no broker is needed.
+
+    A task is called as task(job, *args, **kwargs) in an app context, it may
+    report its progress with job.report() and returns the result of the job.
+
+    Each process renews the lease of its jobs while they are queued or running.
+    A job whose lease ran out was left by a process that stopped, it is failed when
+    an app starts or when its status is read.
+    """
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.max_workers = 2
+        self.lease = 300
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._futures: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        self.max_workers = app.config.get("JOB_WORKERS", 2)
+        self.lease = app.config.get("JOB_LEASE", 300)
+        app.extensions["job_queue"] = self
+        with app.app_context():
+            try:
+                self.expire()
+            except SQLAlchemyError:
+                # The jobs table is created by "flask db upgrade".
+                app.logger.debug("Stale jobs not checked, the schema is not ready")
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # Threads don't survive a fork, so each worker starts its own pool on the
+        # first job rather than inheriting one from a preloaded master.
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="job"
+                )
+                self._pid = os.getpid()
+                self._futures.clear()
+                self._stop = threading.Event()
+                threading.Thread(
+                    target=self._heartbeat,
+                    args=(current_app._get_current_object(), self._stop),
+                    name="job-heartbeat",
+                    daemon=True,
+                ).start()
+            return self._executor
+
+    def _heartbeat(self, app: Flask, stop: threading.Event):
+        """
+        Renew the lease of the jobs of this process until it stops.
+        """
+        from app.extensions import db
+        from app.models.jobs import Job
+
+        while not stop.wait(self.lease / 3):
+            if not (job_ids := list(self._futures)):
+                continue
+            with app.app_context():
+                try:
+                    Job.query.filter(Job.id.in_(job_ids)).update(
+                        {Job.updated_on: db.func.now()}, synchronize_session=False
+                    )
+                    db.session.commit()
+                except SQLAlchemyError:
+                    app.logger.exception("Error renewing the lease of the jobs")
+                    db.session.rollback()
+
+    def expire(self) -> int:
+        """
+        Fail the queued and running jobs whose lease ran out, nothing will finish
+        them. Returns the number of jobs failed.
+        """
+        from app.extensions import db
+        from app.models.jobs import Job, JobStatusEnum
+
+        # The clock of the database, which sets updated_on.
+        now = db.session.scalar(db.select(db.func.now()))
+        cutoff = now - timedelta(seconds=self.lease)
+        count = Job.query.filter(
+            Job.status.in_([JobStatusEnum.queued, JobStatusEnum.running]),
+            Job.updated_on < cutoff,
+        ).update(
+            {
+                Job.status: JobStatusEnum.failed,
+                Job.error: "The job was stopped before it finished, run it again.",
+            },
+            synchronize_session=False,
+        )
+        db.session.commit()
+        return count
+
+    def submit(self, kind: str, task: Callable, *args, **kwargs):
+        """
+        Save a queued Job and run the task in the background.
+        """
+        from app.extensions import db
+        from app.models.jobs import Job
+
+        job = Job(kind=kind)
+        db.session.add(job)
+        db.session.commit()
+
+        app = current_app._get_current_object()
+        future = self.executor.submit(self._run, app, job.id, task, args, kwargs)
+        self._futures[job.id] = future
+        future.add_done_callback(lambda _: self._futures.pop(job.id, None))
+        return job
+
+    def wait(self, job_id: int, timeout: Optional[float] = None):
+        """
+        Block until a job submitted by this process is done.
+        """
+        if future := self._futures.get(job_id):
+            future.result(timeout=timeout)
+
+    @staticmethod
+    def _run(app: Flask, job_id: int, task: Callable, args: tuple, kwargs: dict):
+        from app.extensions import db
+        from app.models.jobs import Job, JobStatusEnum
+
+        with app.app_context():
+            job = db.session.get(Job, job_id)
+            job.status = JobStatusEnum.running
+            db.session.commit()
+            try:
+                result = task(job, *args, **kwargs)
+            except Exception as exc:
+                app.logger.exception(f"Job {job_id} failed")
+                db.session.rollback()
+                job = db.session.get(Job, job_id)
+                job.status = JobStatusEnum.failed
+                job.error = str(exc)
+            else:
+                job.status = JobStatusEnum.finished
+                job.progress = 100
+                job.result = result
+            db.session.commit()
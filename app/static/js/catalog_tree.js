@@ -0,0 +1,20 @@
+const loadedGroups = new Map()
+
+function loadGroup(details) {
+    const src = details.dataset.src
+    if (!loadedGroups.has(src)) {
+        loadedGroups.set(src, fetch(src).then(response => response.text()))
+    }
+    return loadedGroups.get(src)
+}
+
+document.querySelectorAll("details[data-src]").forEach(details => {
+    const summary = details.querySelector("summary")
+    summary.addEventListener("mouseenter", () => loadGroup(details), {once: true})
+    details.addEventListener("toggle", () => {
+        if (details.open && !details.dataset.loaded) {
+            details.dataset.loaded = "true"
+            loadGroup(details).then(html => summary.insertAdjacentHTML("afterend", html))
+        }
+    })
+})
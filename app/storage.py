@@ -0,0 +1,238 @@
+import gzip
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Callable, Dict, Iterator, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows, where only the threads of a process are serialized
+    fcntl = None  # type: ignore
+
+CHUNK_SIZE = 1024 * 1024
+
+# Suffix and magic number of the compressed formats files may be stored in.
+ENCODINGS = {
+    "zstd": (".zst", b"\x28\xb5\x2f\xfd"),
+    "gzip": (".gz", b"\x1f\x8b"),
+}
+_blob_lock = threading.Lock()
+
+
+def zstandard():
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise RuntimeError(
+            "zstd compression needs the zstandard package: pip install zstandard"
+        ) from exc
+    return zstandard
+
+
+def zstd_available() -> bool:
+    try:
+        zstandard()
+    except RuntimeError:
+        return False
+    return True
+
+
+def compressor(encoding: str, f: IO[bytes]) -> IO[bytes]:
+    """
+    A file object that compresses what is written to it into f. Gzip output has no
+    timestamp, so the same content always compresses to the same bytes.
+    """
+    if encoding == "gzip":
+        return gzip.GzipFile(fileobj=f, mode="wb", mtime=0)
+    if encoding == "zstd":
+        return zstandard().ZstdCompressor().stream_writer(f, closefd=False)
+    raise ValueError(f"Unknown compression {encoding}")
+
+
+def stored_encoding(path: Path) -> Optional[str]:
+    """
+    The compression of a stored file, from its magic number.
+    """
+    with open(path, "rb") as f:
+        head = f.read(4)
+    for encoding, (_, magic) in ENCODINGS.items():
+        if head.startswith(magic):
+            return encoding
+    return None
+
+
+def open_blob(path) -> IO[bytes]:
+    """
+    Open a stored file for reading, decompressing it if it is compressed.
+    """
+    encoding = stored_encoding(path)
+    if encoding == "gzip":
+        return gzip.open(path, "rb")
+    if encoding == "zstd":
+        return zstandard().ZstdDecompressor().stream_reader(open(path, "rb"))
+    return open(path, "rb")
+
+
+def read_blob(path) -> bytes:
+    with open_blob(path) as f:
+        return f.read()
+
+
+@contextmanager
+def blob_lock(shard: Path) -> Iterator[None]:
+    """
+    Serialize saving and releasing the files of a directory/ab shard, across the
+    threads and processes of the app.
+    """
+    if fcntl is None:
+        with _blob_lock:
+            yield
+        return
+    # In the temporary directory, so no lock files are left next to stored files.
+    name = hashlib.sha256(str(shard.resolve()).encode()).hexdigest()[:16]
+    with open(Path(tempfile.gettempdir(), f"blob-{name}.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def pin_path(path: Path, pin: str) -> Path:
+    return path.with_name(f"{path.name.split('.')[0]}.{pin}.pin")
+
+
+def unpin_blob(path, pin: Optional[str]):
+    """
+    Drop the reference of an upload that is done, committed or not.
+    """
+    if pin is not None:
+        pin_path(Path(path), pin).unlink(missing_ok=True)
+
+
+def save_blob(
+    stream: IO[bytes],
+    directory: Path,
+    suffix: str = ".json",
+    compression: Optional[str] = None,
+    pin: Optional[str] = None,
+) -> Path:
+    """
+    Save a stream content-addressed by the SHA-256 of its content, as
+    directory/ab/abcd....json, compressed at rest with gzip or zstd when asked.
+    Saving content that is already stored, compressed or not, returns the existing
+    file, so rows with the same content share one file. A pin references the file
+    until unpin_blob, so it is not released while the upload is still pending.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    sha = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            out = compressor(compression, f) if compression else f
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                sha.update(chunk)
+                out.write(chunk)
+            if out is not f:
+                out.close()
+        digest = sha.hexdigest()
+        path = directory.joinpath(digest[:2], f"{digest}{suffix}")
+        path.parent.mkdir(exist_ok=True)
+        with blob_lock(path.parent):
+            if pin is not None:
+                pin_path(path, pin).touch()
+            for existing in (path, *(variant(path, e) for e in ENCODINGS)):
+                if existing.exists():
+                    os.unlink(tmp)
+                    return existing
+            if compression:
+                path = variant(path, compression)
+            os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return path
+
+
+def save_blob_file(
+    filename: Path,
+    directory: Path,
+    compression: Optional[str] = None,
+    pin: Optional[str] = None,
+) -> Path:
+    with open_blob(filename) as f:
+        return save_blob(
+            f, directory, Path(filename).suffix or ".json", compression, pin
+        )
+
+
+def release_blob(path: str, references: Union[int, Callable[[], int]]) -> bool:
+    """
+    Remove a stored file, its compressed variants and the files derived from it,
+    such as its control hashes, once no rows and no pending uploads reference it.
+    references is the number of rows, or a function that counts them once the file
+    is locked, so a row committed meanwhile is counted. Returns whether it was
+    removed.
+    """
+    path = Path(path)
+    # Stored files are named by their hash, the name has no glob characters.
+    digest = path.name.split(".")[0]
+    with blob_lock(path.parent):
+        if next(path.parent.glob(f"{digest}.*.pin"), None):
+            return False
+        if references() if callable(references) else references:
+            return False
+        path.unlink(missing_ok=True)
+        for derived in path.parent.glob(f"{path.name}.*"):
+            derived.unlink(missing_ok=True)
+    return True
+
+
+def variant(path: Path, encoding: str) -> Path:
+    return path.with_name(path.name + ENCODINGS[encoding][0])
+
+
+def write_variants(path: Path):
+    """
+    Precompress a file for downloads, gzip always and zstd when it is installed.
+    Files compressed at rest are sent as they are.
+    """
+    if stored_encoding(path):
+        return
+    encodings = ["gzip", "zstd"] if zstd_available() else ["gzip"]
+    data = read_blob(path)
+    for encoding in encodings:
+        target = variant(path, encoding)
+        tmp = target.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f, compressor(encoding, f) as out:
+            out.write(data)
+        tmp.replace(target)
+
+
+def download_variants(path: Path) -> Dict[str, Path]:
+    """
+    The encodings a stored file can be sent in without compressing it per request:
+    the file itself when it is compressed at rest, and precompressed variants that
+    are not older than the file.
+    """
+    variants = {}
+    if encoding := stored_encoding(path):
+        variants[encoding] = path
+    mtime = path.stat().st_mtime_ns
+    for encoding in ENCODINGS:
+        candidate = variant(path, encoding)
+        if candidate.exists() and candidate.stat().st_mtime_ns >= mtime:
+            variants.setdefault(encoding, candidate)
+    return variants
+
+
+def open_decompressed(path: Path) -> IO[bytes]:
+    """
+    An in-memory decompressed copy of a file, for clients that don't accept its
+    compression.
+    """
+    return io.BytesIO(read_blob(path))
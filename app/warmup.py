@@ -0,0 +1,128 @@
+import gc
+import importlib
+import logging
+import time
+
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+
+logger = logging.getLogger(__name__)
+
+HEAVY_MODULES = (
+    "app.oscal.oscal",
+    "app.oscal.catalog",
+    "app.oscal.component",
+    "app.catalogs.forms",
+    "app.components.forms",
+    "jsonschema",
+)
+
+
+def warm_imports() -> int:
+    """
+    Import the modules that are deferred at startup.
+    """
+    imported = 0
+    for module in HEAVY_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError as exc:
+            logger.warning(f"Unable to warm {module}: {exc}")
+        else:
+            imported += 1
+    return imported
+
+
+def precompile_templates(app: Flask) -> int:
+    """
+    Compile every template into the Jinja cache.
+    """
+    templates = app.jinja_env.list_templates(extensions=["html"])
+    for name in templates:
+        app.jinja_env.get_template(name)
+    return len(templates)
+
+
+def load_validators() -> int:
+    """
+    Load and check the OSCAL schemas used to validate uploads.
+    """
+    from app.oscal.validator import SCHEMAS, compiled_validator
+
+    schemas = sorted(SCHEMAS.glob("*.json"))
+    for schema in schemas:
+        compiled_validator(schema.name)
+    return len(schemas)
+
+
+def load_catalogs() -> int:
+    """
+    Parse and index every Catalog file, and hash it for the ETags.
+    """
+    from app.extensions import db
+    from app.helpers import file_hash
+    from app.models.components import CatalogFile
+    from app.oscal.loader import load_catalog
+
+    # The most recently updated catalogs, as many as the catalog cache holds.
+    filenames = (
+        CatalogFile.query.with_entities(CatalogFile.filename)
+        .group_by(CatalogFile.filename)
+        .order_by(db.func.max(CatalogFile.updated_on).desc())
+        .limit(current_app.config.get("CATALOG_CACHE_SIZE", 16))
+    )
+    try:
+        filenames = filenames.all()
+    except db.exc.SQLAlchemyError as exc:
+        logger.warning(f"Unable to warm catalogs, run flask db upgrade: {exc}")
+        return 0
+
+    loaded = 0
+    for (filename,) in filenames:
+        try:
+            catalog = load_catalog(filename)
+            file_hash(filename)
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Unable to warm catalog {filename}: {exc}")
+            continue
+        catalog.controls_index
+        catalog.positions
+        catalog.parameters
+        catalog.get_group_summaries()
+        loaded += 1
+    return loaded
+
+
+def warmup(app: Flask, freeze: bool = False) -> dict:
+    """
+    Do the work of a worker's first requests up front. Run it before forking, e.g.
+    under gunicorn --preload, so the workers share the loaded objects copy-on-write.
+    With freeze they are moved out of the garbage collector, which would otherwise
+    write to, and so copy, their pages.
+    """
+    timings = {}
+    steps = (
+        ("imports", warm_imports),
+        ("templates", lambda: precompile_templates(app)),
+        ("validators", load_validators),
+        ("catalogs", load_catalogs),
+    )
+    with app.app_context():
+        for name, step in steps:
+            start = time.perf_counter()
+            count = step()
+            timings[name] = (count, time.perf_counter() - start)
+            logger.info(f"Warmed {count} {name} in {timings[name][1]:.2f}s")
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    return timings
+
+
+@click.command("warmup")
+@with_appcontext
+def warmup_command():
+    """Load the templates, validators and catalogs."""
+    for name, (count, seconds) in warmup(current_app._get_current_object()).items():
+        click.echo(f"{name}: {count} in {seconds:.2f}s")
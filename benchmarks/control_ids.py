@@ -0,0 +1,136 @@
+"""
+Control id normalization throughput, the sequential regexps it replaced against the
+combined pattern, per call and in batches.
+
+    python benchmarks/control_ids.py --rows 100000
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, ROOT.as_posix())
+
+from app.oscal.control_ids import (  # noqa: E402
+    ControlRegExps,
+    control_to_statement_id,
+    normalize_control_id,
+    normalize_control_ids,
+    oscalize_control_id,
+)
+
+CATALOG = ROOT.joinpath("tests", "data", "NIST_SP_800-53_rev5_TEST.json")
+
+
+def legacy_oscalize_control_id(control_id):
+    control_id = control_id.strip().lower()
+    if re.match(ControlRegExps.nist_800_171, control_id):
+        return control_id
+    for pattern in (
+        ControlRegExps.nist_800_53_simple,
+        ControlRegExps.nist_800_53_extended,
+        ControlRegExps.nist_800_53_part,
+        ControlRegExps.nist_800_53_extended_part,
+    ):
+        if match := re.match(pattern, control_id):
+            groups = match.groups()
+            if pattern in (
+                ControlRegExps.nist_800_53_simple,
+                ControlRegExps.nist_800_53_part,
+            ):
+                return f"{groups[0]}-{int(groups[1])}"
+            return f"{groups[0]}-{int(groups[1])}.{int(groups[2])}"
+    return control_id
+
+
+def legacy_control_to_statement_id(control_id):
+    control_id = control_id.strip().lower()
+    if re.match(ControlRegExps.nist_800_171, control_id):
+        return f"{control_id}_smt"
+    if match := re.match(ControlRegExps.nist_800_53_simple, control_id):
+        return f"{match.group(1)}-{int(match.group(2))}_smt"
+    if match := re.match(ControlRegExps.nist_800_53_extended, control_id):
+        return f"{match.group(1)}-{int(match.group(2))}.{int(match.group(3))}_smt"
+    if match := re.match(ControlRegExps.nist_800_53_part, control_id):
+        return f"{match.group(1)}-{int(match.group(2))}_smt.{match.group(3)}"
+    if match := re.match(ControlRegExps.nist_800_53_extended_part, control_id):
+        return (
+            f"{match.group(1)}-{int(match.group(2))}.{int(match.group(3))}"
+            f"_smt.{match.group(4)}"
+        )
+    return f"{control_id}_smt"
+
+
+def control_ids() -> list:
+    """
+    Every control and enhancement of the test catalog in the 800-53 formats found in
+    spreadsheets, and the 800-171 requirement ids.
+    """
+    catalog = json.loads(CATALOG.read_text())["catalog"]
+    ids = []
+    for group in catalog["groups"]:
+        for control in group.get("controls", []):
+            family, number = control["id"].split("-")
+            ids += [f"{family.upper()}-{number}", f"{family}-{int(number):02d}"]
+            ids += [f"{family.upper()}-{number}.{part}" for part in "abc"]
+            for enhancement in control.get("controls", []):
+                extension = enhancement["id"].rsplit(".", 1)[1]
+                ids += [
+                    f"{family.upper()}-{number}({extension})",
+                    f"{family.upper()}-{number} ({extension})",
+                    f"{family}-{number}({extension}).a",
+                ]
+    # 800-171 rev2 families 3.1 to 3.14.
+    ids += [f"3.{family}.{n}" for family in range(1, 15) for n in range(1, 23)]
+    return ids
+
+
+def timed(label: str, func, rows: list):
+    start = time.perf_counter()
+    func(rows)
+    seconds = time.perf_counter() - start
+    print(
+        f"  {label:<28} {seconds * 1000:8.1f} ms  {len(rows) / seconds:>12,.0f} ids/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    ids = control_ids()
+    rows = random.Random(0).choices(ids, k=args.rows)
+    for control_id in ids:
+        assert legacy_oscalize_control_id(control_id) == oscalize_control_id(control_id)
+        assert legacy_control_to_statement_id(control_id) == control_to_statement_id(
+            control_id
+        )
+    print(f"{len(ids)} distinct ids, {len(rows)} rows")
+
+    timed(
+        "sequential regexps",
+        lambda rows: [
+            (legacy_oscalize_control_id(r), legacy_control_to_statement_id(r))
+            for r in rows
+        ],
+        rows,
+    )
+    normalize_control_id.cache_clear()
+    timed(
+        "combined pattern, cold",
+        lambda rows: [normalize_control_id.__wrapped__(r) for r in rows],
+        rows,
+    )
+    timed(
+        "memoized, per call", lambda rows: [normalize_control_id(r) for r in rows], rows
+    )
+    timed("memoized, batch", normalize_control_ids, rows)
+
+
+if __name__ == "__main__":
+    main()
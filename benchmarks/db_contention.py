@@ -0,0 +1,95 @@
+"""
+Mixed read/write load against SQLite from several worker processes, with and
+without the "sqlite" DATABASE_PROFILE (WAL, synchronous=NORMAL, busy_timeout).
+
+    python benchmarks/db_contention.py --workers 8 --operations 500
+"""
+import argparse
+import multiprocessing
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.components import CatalogFile  # noqa: E402
+from config import Config  # noqa: E402
+
+
+def make_config(uri: str, profile: str):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = uri
+        DATABASE_PROFILE = profile
+
+    return BenchConfig
+
+
+def worker(uri: str, profile: str, operations: int, write_ratio: float, seed: int):
+    app = create_app(make_config(uri, profile))
+    rand = random.Random(seed)
+    errors = 0
+    with app.app_context():
+        for i in range(operations):
+            try:
+                if rand.random() < write_ratio:
+                    db.session.add(
+                        CatalogFile(
+                            title=f"Catalog {seed}-{i}",
+                            description="Benchmark catalog",
+                            source=f"https://example.com/{seed}-{i}",
+                            filename=f"{seed}-{i}.json",
+                        )
+                    )
+                    db.session.commit()
+                else:
+                    CatalogFile.query.order_by(CatalogFile.updated_on.desc()).limit(
+                        10
+                    ).all()
+            except OperationalError:
+                db.session.rollback()
+                errors += 1
+    return errors
+
+
+def run(profile: str, workers: int, operations: int, write_ratio: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = f"sqlite:///{Path(tmp).joinpath('bench.db')}"
+        with create_app(make_config(uri, profile)).app_context():
+            db.create_all()
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(workers) as pool:
+            errors = pool.starmap(
+                worker,
+                [(uri, profile, operations, write_ratio, n) for n in range(workers)],
+            )
+        elapsed = time.perf_counter() - start
+
+    total = workers * operations
+    return {
+        "profile": profile,
+        "seconds": round(elapsed, 2),
+        "ops_per_second": round(total / elapsed),
+        "locked_errors": sum(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--operations", type=int, default=500)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    for profile in ("default", "sqlite"):
+        print(run(profile, args.workers, args.operations, args.write_ratio))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Import time and time to first request of a fresh process, with and without
+LAZY_STARTUP.
+
+    python benchmarks/startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+FIRST_REQUEST = """
+import json, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+response = app.test_client().get("/")
+assert response.status_code == 200, response.status_code
+done = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "create_app": created - imported,
+    "first_request": done - created,
+    "total": done - start,
+}))
+"""
+
+
+def run_python(args: list, env: dict) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def import_times(env: dict, top: int) -> list:
+    """
+    The slowest modules imported by "from app import create_app", by cumulative
+    time in microseconds, as reported by python -X importtime.
+    """
+    result = run_python(["-X", "importtime", "-c", "from app import create_app"], env)
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split(":", 1)[1].split("|")
+        times.append((int(cumulative), module.strip()))
+    return sorted(times, reverse=True)[:top]
+
+
+def first_request(env: dict, runs: int) -> dict:
+    samples = [
+        json.loads(run_python(["-c", FIRST_REQUEST], env).stdout) for _ in range(runs)
+    ]
+    return {
+        key: round(statistics.median(s[key] for s in samples) * 1000, 1)
+        for key in samples[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            SECRET_KEY="benchmark",
+            DATABASE_URI=f"sqlite:///{Path(tmp).joinpath('startup.db')}",
+        )
+        run_python(
+            [
+                "-c",
+                "from app import create_app\n"
+                "from app.extensions import db\n"
+                "with create_app().app_context(): db.create_all()",
+            ],
+            env,
+        )
+
+        for lazy in ("false", "true"):
+            env["LAZY_STARTUP"] = lazy
+            print(f"LAZY_STARTUP={lazy}")
+            print("  slowest imports (ms):")
+            for cumulative, module in import_times(env, args.top):
+                print(f"    {cumulative / 1000:8.1f}  {module}")
+            print(f"  first request (median ms): {first_request(env, args.runs)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,12 +14,64 @@ class Config:
         INSTANCE_PATH, "app.db"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # "sqlite" applies SQLITE_PRAGMAS on connect so workers don't serialize on the
+    # writer lock, "pooled" sizes the connection pool for server databases.
+    DATABASE_PROFILE = os.getenv("DATABASE_PROFILE", "sqlite")
+    DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", 10))
+    DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", 10))
+    DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", 1800))
+    # Read only views use this database when it is set.
+    DATABASE_REPLICA_URI = os.getenv("DATABASE_REPLICA_URI")
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "busy_timeout": 5000,
+    }
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024
+    # Defer Flask-Migrate to flask commands, and optionally import the OSCAL models
+    # in a background thread so the first request doesn't pay for them.
+    LAZY_STARTUP = os.getenv("LAZY_STARTUP", "true").lower() == "true"
+    WARM_ON_STARTUP = os.getenv("WARM_ON_STARTUP", "false").lower() == "true"
+    # Load the templates, validators and catalogs in create_app, before gunicorn
+    # --preload forks the workers.
+    PRELOAD_WARMUP = os.getenv("PRELOAD_WARMUP", "false").lower() == "true"
+    # Parsed catalogs kept in memory by each process.
+    CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", 16))
+    # Threads per process running background jobs such as catalog imports.
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+    # Seconds after which a queued or running job that was not renewed is failed,
+    # as the process running it stopped.
+    JOB_LEASE = int(os.getenv("JOB_LEASE", 300))
+    # Threads reading component files for the aggregated implementations view, and
+    # the number of aggregated results kept in memory by each process.
+    AGGREGATE_WORKERS = int(os.getenv("AGGREGATE_WORKERS", 8))
+    AGGREGATE_CACHE_SIZE = int(os.getenv("AGGREGATE_CACHE_SIZE", 16))
+    # Processes validating the files of a bulk catalog import, defaults to the CPU
+    # count, and the largest uncompressed size of an imported zip archive.
+    IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", 0)) or None
+    IMPORT_MAX_SIZE = int(os.getenv("IMPORT_MAX_SIZE", 512 * 1024 * 1024))
+    # Processes migrating the Component files of a batch, defaults to the CPU count.
+    MIGRATE_WORKERS = int(os.getenv("MIGRATE_WORKERS", 0)) or None
+    # Store uploaded Catalog files compressed with "gzip" or "zstd" (needs zstandard).
+    STORAGE_COMPRESSION = os.getenv("STORAGE_COMPRESSION") or None
     BASEPATH = basedir
     UPLOAD_FOLDER = os.path.join(basedir, "app/files")
     FLASK_ENV = "development"
     WTF_CSRF_ENABLED = True
     CSRF_SESSION_KEY = os.getenv("CSRF_SESSION_KEY")
+    # Part of the page ETags with the templates, set it on deploy to invalidate pages.
+    APP_VERSION = os.getenv("APP_VERSION", "0.1.0")
+    # Seconds a client or reverse proxy may reuse a page before revalidating its ETag.
+    CACHE_MAX_AGE = int(os.getenv("CACHE_MAX_AGE", 0))
+    # Rendered catalog fragments kept in memory, and an optional directory to share them.
+    FRAGMENT_CACHE_SIZE = int(os.getenv("FRAGMENT_CACHE_SIZE", 128))
+    FRAGMENT_CACHE_DIR = os.getenv("FRAGMENT_CACHE_DIR")
+    # Rows per page on the Catalog and Component lists, and in the home page blocks.
+    PAGE_SIZE = int(os.getenv("PAGE_SIZE", 50))
+    RECENT_SIZE = int(os.getenv("RECENT_SIZE", 10))
+    # Only render catalog groups up front and load their controls on expand.
+    CATALOG_LAZY_TREE = os.getenv("CATALOG_LAZY_TREE", "false").lower() == "true"
 
 
 class TestConfig:
@@ -29,6 +81,8 @@ class TestConfig:
         INSTANCE_PATH, "testing.db"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    DATABASE_PROFILE = "sqlite"
+    SQLITE_PRAGMAS = Config.SQLITE_PRAGMAS
     UPLOAD_FOLDER = os.path.join(basedir, "tests/data")
     # Enable the TESTING flag to disable the error catching during request handling
     # so that you get better error reports when performing test requests against the application.
@@ -0,0 +1,78 @@
+"""initial schema
+
+Revision ID: 3f1c2a9e4b10
+Revises:
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9e4b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created by db.create_all() before migrations existed already
+    # have these tables, only create the ones that are missing.
+    tables = sa.inspect(op.get_bind()).get_table_names()
+
+    if 'catalogs' not in tables:
+        op.create_table(
+            'catalogs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('created_on', sa.DateTime(), nullable=True),
+            sa.Column('updated_on', sa.DateTime(), nullable=True),
+            sa.Column('title', sa.String(length=150), nullable=False),
+            sa.Column('description', sa.Text(), nullable=False),
+            sa.Column('source', sa.String(length=264), nullable=False),
+            sa.Column('filename', sa.String(length=150), nullable=False),
+            sa.PrimaryKeyConstraint('id', name=op.f('pk_catalogs')),
+        )
+    if 'components' not in tables:
+        op.create_table(
+            'components',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('created_on', sa.DateTime(), nullable=True),
+            sa.Column('updated_on', sa.DateTime(), nullable=True),
+            sa.Column('title', sa.String(length=150), nullable=False),
+            sa.Column('description', sa.Text(), nullable=False),
+            sa.Column(
+                'type',
+                sa.Enum(
+                    'software', 'hardware', 'service', 'interconnection',
+                    'policy', 'process', 'procedure', 'plan', 'guidance',
+                    'standard', 'validation', name='componenttypeenum',
+                ),
+                nullable=False,
+            ),
+            sa.Column('filename', sa.String(length=150), nullable=False),
+            sa.PrimaryKeyConstraint('id', name=op.f('pk_components')),
+        )
+    if 'component_catalog' not in tables:
+        op.create_table(
+            'component_catalog',
+            sa.Column('component_id', sa.Integer(), nullable=False),
+            sa.Column('catalog_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(
+                ['catalog_id'], ['catalogs.id'],
+                name=op.f('fk_component_catalog_catalog_id_catalogs'),
+            ),
+            sa.ForeignKeyConstraint(
+                ['component_id'], ['components.id'],
+                name=op.f('fk_component_catalog_component_id_components'),
+            ),
+            sa.PrimaryKeyConstraint(
+                'component_id', 'catalog_id', name=op.f('pk_component_catalog')
+            ),
+        )
+
+
+def downgrade():
+    op.drop_table('component_catalog')
+    op.drop_table('components')
+    op.drop_table('catalogs')
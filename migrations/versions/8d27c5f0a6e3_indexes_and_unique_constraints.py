@@ -0,0 +1,77 @@
+"""indexes and unique constraints
+
+Revision ID: 8d27c5f0a6e3
+Revises: 3f1c2a9e4b10
+Create Date: 2026-10-19 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d27c5f0a6e3'
+down_revision = '3f1c2a9e4b10'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    'catalogs': [
+        ('ix_catalogs_title', ['title'], True),
+        ('ix_catalogs_source', ['source'], True),
+        ('ix_catalogs_filename', ['filename'], False),
+        ('ix_catalogs_created_on', ['created_on'], False),
+        ('ix_catalogs_updated_on', ['updated_on'], False),
+    ],
+    'components': [
+        ('ix_components_title', ['title'], True),
+        ('ix_components_filename', ['filename'], True),
+        ('ix_components_created_on', ['created_on'], False),
+        ('ix_components_updated_on', ['updated_on'], False),
+    ],
+    'component_catalog': [
+        ('ix_component_catalog_catalog_id', ['catalog_id'], False),
+    ],
+}
+
+
+def duplicates(bind, table, column):
+    """Values of a column that more than one row has."""
+    rows = bind.execute(
+        sa.text(
+            f'SELECT "{column}", COUNT(*) FROM "{table}" '
+            f'GROUP BY "{column}" HAVING COUNT(*) > 1'
+        )
+    )
+    return [f'{table}.{column} {value!r} ({count} rows)' for value, count in rows]
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # Refuse before changing anything, the baseline schema allowed duplicates.
+    found = [
+        duplicate
+        for table, indexes in INDEXES.items()
+        for _, columns, unique in indexes
+        if unique
+        for duplicate in duplicates(bind, table, columns[0])
+    ]
+    if found:
+        raise RuntimeError(
+            'Rename or delete the duplicate rows before upgrading, they break '
+            'the new unique indexes: ' + '; '.join(found)
+        )
+    for table, indexes in INDEXES.items():
+        existing = {index['name'] for index in inspector.get_indexes(table)}
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, columns, unique in indexes:
+                if name not in existing:
+                    batch_op.create_index(name, columns, unique=unique)
+
+
+def downgrade():
+    for table, indexes in INDEXES.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, _, _ in reversed(indexes):
+                batch_op.drop_index(name)
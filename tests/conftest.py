@@ -1,4 +1,5 @@
 import pytest
+from sqlalchemy import event
 
 from app import create_app
 from app.extensions import db
@@ -38,6 +39,7 @@ def test_client():
     # Establish an application context before running the tests.
     ctx = flask_app.app_context()
     ctx.push()
+    db.create_all()
 
     yield testing_client  # this is where the testing happens!
 
@@ -85,3 +87,18 @@ def init_database():
     yield db  # this is where the testing happens!
 
     db.drop_all()
+
+
+@pytest.fixture
+def query_counter(test_client):
+    """
+    Collect the SQL statements executed while a test runs.
+    """
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", count)
@@ -0,0 +1,195 @@
+import json
+import shutil
+import zipfile
+from pathlib import Path
+
+from flask import current_app
+
+from app.catalogs.routes import import_catalog_archive
+from app.extensions import db, job_queue
+from app.models.components import CatalogFile
+
+CATALOG = Path("tests/data/NIST_SP_800-53_rev5_TEST.json")
+TITLE = "NIST Special Publication 800-53 Revision 5 TEST"
+
+
+def test_catalog_import_archive(test_client, init_database, tmp_path):
+    """
+    GIVEN a zip archive with a Catalog and a file that is not one
+    WHEN it is imported
+    THEN the Catalog is created and each file's result is reported
+    """
+    archive = tmp_path.joinpath("catalogs.zip")
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        zip_file.write(CATALOG, f"rev5/{CATALOG.name}")
+        zip_file.writestr("broken.json", json.dumps({"catalog": {}}))
+        zip_file.writestr("README.md", "Not a catalog")
+
+    job = job_queue.submit(
+        "import_catalogs", import_catalog_archive, archive.as_posix()
+    )
+    job_queue.wait(job.id, timeout=60)
+    db.session.expire_all()
+
+    status = test_client.get(f"/jobs/{job.id}/status").get_json()
+    assert status["status"] == "finished", status["error"]
+    assert status["message"] == "Imported 1 of 2 catalog files."
+    assert not archive.exists()
+
+    page = test_client.get(f"/jobs/{job.id}")
+    assert b"broken.json" in page.data
+    assert b"imported" in page.data
+
+    catalog = CatalogFile.query.filter_by(title=TITLE).one()
+    assert catalog.source.startswith("urn:uuid:")
+    assert Path(catalog.filename).is_file()
+    shutil.rmtree("tests/data/catalogs")
+
+
+def test_catalog_import_command(test_client, init_database, tmp_path):
+    """
+    GIVEN a directory of Catalog files
+    WHEN they are imported with the CLI on a pool of processes
+    THEN new Catalogs are created and duplicates are skipped
+    """
+    rev4 = json.loads(CATALOG.read_text())
+    rev4["catalog"]["uuid"] = "9c9e4b1a-2b0c-4d7e-8f3a-5b6c7d8e9f00"
+    rev4["catalog"]["metadata"]["title"] = "Revision 4 TEST"
+    tmp_path.joinpath("rev4.json").write_text(json.dumps(rev4))
+    tmp_path.joinpath("rev4_copy.json").write_text(json.dumps(rev4))
+
+    runner = current_app.test_cli_runner()
+    result = runner.invoke(
+        args=["catalogs", "import", "--workers", "2", tmp_path.as_posix()]
+    )
+    assert result.exit_code == 0, result.output
+    assert "imported  rev4.json  Revision 4 TEST" in result.output
+    assert "skipped  rev4_copy.json  Revision 4 TEST: Catalog already exists." in (
+        result.output
+    )
+    assert CatalogFile.query.filter_by(title="Revision 4 TEST").count() == 1
+    shutil.rmtree("tests/data/catalogs")
+
+
+def test_duplicate_upload_shares_file(
+    test_client, init_database, monkeypatch, tmp_path
+):
+    """
+    GIVEN a Catalog file that is already uploaded
+    WHEN the same content is uploaded again and the Catalogs are deleted
+    THEN it is not validated again and the file is removed with its last Catalog
+    """
+    from app.catalogs.routes import import_catalog
+    from app.oscal.validator import OscalValidator
+    from app.storage import save_blob_file
+
+    shared = json.loads(CATALOG.read_text())
+    shared["catalog"]["uuid"] = "3d5b1c2e-7f4a-4b8c-9d0e-1f2a3b4c5d6e"
+    upload = tmp_path.joinpath("shared.json")
+    upload.write_text(json.dumps(shared))
+    upload_directory = Path(current_app.config["UPLOAD_FOLDER"]).joinpath("catalogs")
+    blob = save_blob_file(upload, upload_directory).as_posix()
+    first = job_queue.submit(
+        "import_catalog", import_catalog, "Shared One", "One", "https://one", blob
+    )
+    job_queue.wait(first.id, timeout=30)
+
+    def validate_file(self):
+        raise AssertionError("The file was validated again")
+
+    monkeypatch.setattr(OscalValidator, "validate_file", validate_file)
+    second = job_queue.submit(
+        "import_catalog", import_catalog, "Shared Two", "Two", "https://two", blob
+    )
+    job_queue.wait(second.id, timeout=30)
+    db.session.expire_all()
+    assert second.status.value == "finished", second.error
+
+    one = CatalogFile.query.filter_by(title="Shared One").one()
+    two = CatalogFile.query.filter_by(title="Shared Two").one()
+    assert one.filename == two.filename == blob
+
+    test_client.get(f"/catalogs/{one.id}/delete")
+    assert Path(blob).exists()
+    test_client.get(f"/catalogs/{two.id}/delete")
+    assert not Path(blob).exists()
+    shutil.rmtree("tests/data/catalogs")
+
+
+def test_catalog_profile_job(test_client, init_database, tmp_path):
+    """
+    GIVEN an OSCAL Profile of an imported Catalog
+    WHEN it is resolved, then resolved again with changes
+    THEN a Catalog of the selected controls is created, then refreshed in place
+    """
+    from app.catalogs.routes import resolve_catalog_profile
+
+    assert b"Resolve a Profile" in test_client.get("/catalogs/profile").data
+    profile = {
+        "profile": {
+            "uuid": "2e1a0a3f-59bc-4a3a-a2c4-1f1b7e0c8d11",
+            "metadata": {
+                "title": "TEST LOW baseline",
+                "last-modified": "2023-01-01T00:00:00+00:00",
+                "version": "1.0",
+                "oscal-version": "1.0.0",
+            },
+            "imports": [
+                {"href": "#catalog", "include-controls": [{"with-ids": ["ac-1"]}]}
+            ],
+        }
+    }
+
+    def resolve(title=None, overwrite=False, status="finished"):
+        upload = tmp_path.joinpath("profile.json")
+        upload.write_text(json.dumps(profile))
+        job = job_queue.submit(
+            "resolve_profile",
+            resolve_catalog_profile,
+            1,
+            title,
+            upload.as_posix(),
+            overwrite,
+        )
+        job_queue.wait(job.id, timeout=30)
+        db.session.expire_all()
+        assert job.status.value == status, job.error
+        assert not upload.exists()
+        return job
+
+    job = resolve()
+    assert job.message == "Catalog TEST LOW baseline created."
+    catalog = CatalogFile.query.filter_by(title="TEST LOW baseline").one()
+    assert catalog.source.startswith("urn:uuid:")
+    response = test_client.get(f"/catalogs/{catalog.id}")
+    assert b"ac-1" in response.data.lower()
+    assert b"ac-2" not in response.data.lower()
+
+    previous = catalog.filename
+    profile["profile"]["imports"][0]["include-controls"][0]["with-ids"].append("ac-2")
+    job = resolve("TEST LOW baseline")
+    assert job.message == "Catalog TEST LOW baseline refreshed."
+    db.session.refresh(catalog)
+    assert catalog.filename != previous
+    assert not Path(previous).exists()
+
+    assert resolve("TEST LOW baseline").message.endswith("unchanged.")
+
+    # A Catalog that was not resolved from the profile is only replaced on request.
+    job = resolve("Test Catalog Too", status="failed")
+    assert "was not resolved from this profile" in job.error
+    uploaded = CatalogFile.query.filter_by(title="Test Catalog Too").one()
+    assert uploaded.filename == "tests/data/NIST_SP_800-53_rev5_TEST.json"
+    profile["profile"]["metadata"]["title"] = "TEST MODERATE baseline"
+    job = resolve("TEST LOW baseline", status="failed")
+    assert "was not resolved from this profile" in job.error
+    job = resolve("Test Catalog Too", overwrite=True)
+    assert job.message == "Catalog Test Catalog Too refreshed."
+    db.session.refresh(uploaded)
+    assert uploaded.profile == "TEST MODERATE baseline"
+    assert Path("tests/data/NIST_SP_800-53_rev5_TEST.json").exists()
+    uploaded.filename = "tests/data/NIST_SP_800-53_rev5_TEST.json"
+    uploaded.profile = None
+    db.session.commit()
+    test_client.get(f"/catalogs/{catalog.id}/delete")
+    shutil.rmtree("tests/data/catalogs")
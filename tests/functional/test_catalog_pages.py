@@ -1,3 +1,11 @@
+import json
+import re
+
+from app.extensions import db
+from app.models.components import CatalogFile
+from app.storage import save_blob
+
+
 def test_catalog_list(test_client, init_database):
     """
     GIVEN a Flask application
@@ -50,3 +58,255 @@ def test_catalog_update_page(test_client, init_database):
     assert b"Update Catalog" in response.data
     assert b"Test Catalog" in response.data
     assert b"This is the description" in response.data
+
+
+def test_catalog_controls(test_client, init_database):
+    """
+    GIVEN a Flask application
+    WHEN the '/catalogs/1/controls' endpoint is requested (GET) with a list of ids
+    THEN check the resolved Controls are returned as JSON Lines
+    """
+    response = test_client.get("/catalogs/1/controls?ids=ac-1,ac-2,xx-99")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    controls = [json.loads(line) for line in response.data.splitlines()]
+    assert [c["id"] for c in controls] == ["ac-1", "ac-2"]
+    assert len(controls[1]["links"]["reference"]) == 3
+    assert "{{ insert: param" not in json.dumps(controls[1]["statement"])
+
+    response = test_client.get("/catalogs/1/controls?ids=IA-2(1), AC-02")
+    controls = [json.loads(line) for line in response.data.splitlines()]
+    assert [c["id"] for c in controls] == ["ac-2", "ia-2.1"]
+
+    response = test_client.get("/catalogs/1/controls?family=sr")
+    controls = [json.loads(line) for line in response.data.splitlines()]
+    assert controls
+    assert all(c["id"].startswith("sr-") for c in controls)
+
+
+def test_catalog_controls_filter(test_client, init_database):
+    """
+    GIVEN a Flask application
+    WHEN the catalog page and controls endpoint are requested with a filter
+    THEN check only the matching controls are listed, and invalid filters are reported
+    """
+    response = test_client.get("/catalogs/1?filter=family:ia type:enhancement")
+    assert response.status_code == 200
+    assert b"IA: Identification and Authentication" in response.data
+    assert b"AC: Access Control" not in response.data
+
+    response = test_client.get("/components/1/catalog/1?filter=baseline:2 family:sr")
+    assert b"SR: Supply Chain Risk Management" in response.data
+    assert b"AC: Access Control" not in response.data
+
+    response = test_client.get("/catalogs/1/controls?filter=family:ac OR id:sr-1")
+    controls = [json.loads(line) for line in response.data.splitlines()]
+    assert [c["id"] for c in controls] == ["ac-1", "ac-2", "ac-3", "sr-1"]
+
+    response = test_client.get("/catalogs/1/controls?filter=baseline:99")
+    assert response.status_code == 400
+
+    response = test_client.get("/catalogs/1?filter=color:red")
+    assert b"Unknown filter color:red" in response.data
+    assert b"AC: Access Control" in response.data
+    assert response.cache_control.no_store
+    assert "ETag" not in response.headers
+
+
+def test_catalog_coverage(test_client, init_database):
+    """
+    GIVEN a Flask application with Components
+    WHEN the '/catalogs/1/coverage' page is requested (GET)
+    THEN check the coverage of each Component and family and the gaps are listed
+    """
+    response = test_client.get("/catalogs/1/coverage")
+    assert response.status_code == 200
+    assert b"Test Component One" in response.data
+    assert b"AC: Access Control" in response.data
+    assert b"controls not implemented by any Component" in response.data
+    assert b"/catalogs/1/control/ac-3" in response.data
+    assert b"/catalogs/1/control/cp-1" not in response.data
+
+
+def test_catalog_diff(test_client, init_database, tmp_path):
+    """
+    GIVEN a Catalog and a new revision of it
+    WHEN the '/catalogs/1/diff' page is requested (GET) with the new revision
+    THEN check the changed controls and the Components they affect are listed
+    """
+    from app.catalogs.diff import hashes_path
+
+    revision = json.loads(open("tests/data/NIST_SP_800-53_rev5_TEST.json").read())
+    ac = revision["catalog"]["groups"][0]
+    ac["controls"][1]["props"].append({"name": "status", "value": "withdrawn"})
+    cp = next(group for group in revision["catalog"]["groups"] if group["id"] == "cp")
+    cp["controls"][0]["title"] = "Contingency Planning Policy"
+    filename = tmp_path.joinpath("revision.json")
+    filename.write_text(json.dumps(revision))
+    catalog = CatalogFile(
+        title="Test Catalog Revision",
+        description="A new revision",
+        source="https://pages.nist.gov/OSCAL/revision",
+        filename=filename.as_posix(),
+    )
+    db.session.add(catalog)
+    db.session.commit()
+
+    response = test_client.get("/catalogs/1/diff")
+    assert response.status_code == 200
+    assert b"Test Catalog Revision" in response.data
+
+    response = test_client.get(f"/catalogs/1/diff?to={catalog.id}")
+    assert response.status_code == 200
+    assert b"<b>1</b> changed" in response.data
+    assert b"<b>1</b> withdrawn" in response.data
+    assert b"Contingency Planning Policy" in response.data
+    assert re.search(
+        rb"Test Component One</a></td>\s*<td>\s*ac-2 \(withdrawn\)", response.data
+    )
+    assert b"cp-1 (changed)" in response.data
+    assert hashes_path(filename.as_posix()).exists()
+
+    db.session.delete(catalog)
+    db.session.commit()
+    hashes_path("tests/data/NIST_SP_800-53_rev5_TEST.json").unlink()
+
+
+def test_catalog_implementations(test_client, init_database):
+    """
+    GIVEN a Flask application with Components
+    WHEN the implementations of a Catalog are requested (GET) and exported
+    THEN check the narratives of the selected Components are listed by control
+    """
+    response = test_client.get("/catalogs/1/implementations?components=1")
+    assert response.status_code == 200
+    assert b"TC1 addresses cp-1" in response.data
+    assert b"Test Component Two" not in response.data
+
+    response = test_client.get("/catalogs/1/implementations/export")
+    assert response.mimetype == "application/x-ndjson"
+    controls = [json.loads(line) for line in response.data.splitlines()]
+    assert [c["control_id"] for c in controls] == ["ac-2", "au-1", "ca-1", "cp-1"]
+    assert controls[3]["implementations"][0]["component"] == "Test Component One"
+
+
+def test_catalog_view_not_modified(test_client, init_database):
+    """
+    GIVEN a Flask application
+    WHEN the '/catalogs/1' page is requested (GET) with a current ETag
+    THEN check a 304 Not Modified is returned with cache headers
+    """
+    response = test_client.get("/catalogs/1")
+    etag = response.headers["ETag"]
+    assert response.cache_control.public
+    assert response.cache_control.must_revalidate
+
+    response = test_client.get("/catalogs/1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.data == b""
+
+    response = test_client.get("/catalogs/2/control/ac-1")
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    version = test_client.application.config.get("APP_VERSION")
+    test_client.application.config["APP_VERSION"] = "next"
+    try:
+        response = test_client.get("/catalogs/1", headers={"If-None-Match": etag})
+    finally:
+        test_client.application.config["APP_VERSION"] = version
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_catalog_view_lazy(test_client, init_database):
+    """
+    GIVEN a Flask application
+    WHEN the '/catalogs/1?lazy=1' page and a group fragment are requested (GET)
+    THEN check the page only lists groups and the fragment lists the controls
+    """
+    response = test_client.get("/catalogs/1?lazy=1")
+    assert response.status_code == 200
+    assert b"AC: Access Control" in response.data
+    assert b"/catalogs/1/group/ac" in response.data
+    assert b"Policy and Procedures" not in response.data
+
+    response = test_client.get("/catalogs/1/group/ac")
+    assert response.status_code == 200
+    assert b"Policy and Procedures" in response.data
+    assert b"Supply Chain Risk Management Plan" not in response.data
+
+    response = test_client.get("/catalogs/1/group/xx")
+    assert response.status_code == 404
+
+
+def test_catalog_view_streamed(test_client, init_database):
+    """
+    GIVEN a Flask application
+    WHEN the '/catalogs/1' page is requested (GET)
+    THEN check the page is streamed with the layout header first
+    """
+    response = test_client.get("/catalogs/1", buffered=False)
+    assert response.is_streamed
+    chunks = list(response.iter_encoded())
+    assert chunks[0].startswith(b"<!doctype html>")
+    assert len(chunks) > 1
+    assert b"Establish SCRM Team" in b"".join(chunks)
+
+
+def test_catalog_list_pagination(test_client, init_database):
+    """
+    GIVEN a Flask application with a page size of one
+    WHEN the '/catalogs' pages are requested (GET)
+    THEN check each page has one Catalog and links to the next page
+    """
+    test_client.application.config["PAGE_SIZE"] = 1
+    response = test_client.get("/catalogs/?sort=-title")
+    assert b"Test Catalog Too" in response.data
+    assert b"This is the description" not in response.data
+    next_url = re.search(rb"href=(/catalogs/\?[^>\s]*after=[^>\s]+)", response.data)
+    assert next_url
+
+    response = test_client.get(next_url.group(1).decode().replace("&amp;", "&"))
+    assert response.status_code == 200
+    assert b"This is the description" in response.data
+    assert b"Test Catalog Too" not in response.data
+    assert b"Next page" not in response.data
+
+    response = test_client.get("/catalogs/?after=not-a-cursor")
+    assert response.status_code == 400
+    test_client.application.config["PAGE_SIZE"] = 50
+
+
+def test_catalog_download_compressed(test_client, init_database, tmp_path):
+    """
+    GIVEN a Catalog stored gzip compressed
+    WHEN it is downloaded
+    THEN it is sent as is to clients that accept gzip, and decompressed otherwise
+    """
+    with open("tests/data/NIST_SP_800-53_rev5_TEST.json", "rb") as f:
+        blob = save_blob(f, tmp_path, compression="gzip")
+    catalog = CatalogFile(
+        title="Compressed Catalog",
+        description="Stored compressed",
+        source="https://compressed",
+        filename=blob.as_posix(),
+    )
+    db.session.add(catalog)
+    db.session.commit()
+
+    assert test_client.get(f"/catalogs/{catalog.id}").status_code == 200
+
+    response = test_client.get(
+        f"/catalogs/{catalog.id}/download", headers={"Accept-Encoding": "gzip, br"}
+    )
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.data == blob.read_bytes()
+    response.close()
+
+    response = test_client.get(f"/catalogs/{catalog.id}/download")
+    assert "Content-Encoding" not in response.headers
+    assert "Compressed_Catalog.json" in response.headers["Content-Disposition"]
+    assert json.loads(response.data)["catalog"]["metadata"]["title"]
+    response.close()
@@ -0,0 +1,99 @@
+import gzip
+import shutil
+from pathlib import Path
+
+from flask import current_app
+
+from app.storage import write_variants
+
+
+def test_component_view(test_client, init_database):
+    """
+    GIVEN a Flask application
+    WHEN the '/components/1' page is requested (GET)
+    THEN check the response is valid and can be revalidated with its ETag
+    """
+    response = test_client.get("/components/1")
+    assert response.status_code == 200
+    assert b"Test Component One" in response.data
+    etag = response.headers["ETag"]
+
+    response = test_client.get("/components/1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_component_view_query_count(test_client, init_database, query_counter):
+    """
+    GIVEN a Flask application
+    WHEN the '/components/1' page is requested (GET) with Catalogs added
+    THEN check the number of queries does not grow with the number of Catalogs
+    """
+    test_client.get("/components/1/add/catalog/1")
+    test_client.get("/components/1")
+    query_counter.clear()
+
+    response = test_client.get("/components/1")
+    assert response.status_code == 200
+    assert b"Catalog: Test Catalog" in response.data
+    assert b"TC1 addresses cp-1" in response.data
+    # The Component, then every Catalog flagged with the ones it has.
+    single = len(query_counter)
+    assert single == 2
+
+    test_client.get("/components/1/add/catalog/2")
+    test_client.get("/components/1")
+    query_counter.clear()
+
+    response = test_client.get("/components/1")
+    assert b"Catalog: Test Catalog Too" in response.data
+    assert len(query_counter) == single
+
+
+def test_component_add_catalog_twice(test_client, init_database):
+    """
+    GIVEN a Component that has a Catalog
+    WHEN the Catalog is added again
+    THEN it is refused and the Component keeps one link to it
+    """
+    from app.models.components import ComponentFile
+
+    test_client.get("/components/2/add/catalog/1")
+    response = test_client.get("/components/2/add/catalog/1", follow_redirects=True)
+    assert b"already added to Test Component Two" in response.data
+    component = ComponentFile.query.get(2)
+    assert [catalog.id for catalog in component.catalogs] == [1]
+
+
+def test_component_file_download(test_client, init_database):
+    """
+    GIVEN a Component file with precompressed copies
+    WHEN it is downloaded
+    THEN the gzip copy is sent to clients that accept it, and ranges are supported
+    """
+    directory = Path(current_app.config["UPLOAD_FOLDER"]).joinpath("components")
+    directory.mkdir(exist_ok=True)
+    path = directory.joinpath("download.json")
+    shutil.copy("tests/data/component_one.json", path)
+    write_variants(path)
+
+    response = test_client.get(
+        "/components/download/download.json", headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(response.data) == path.read_bytes()
+    response.close()
+
+    response = test_client.get(
+        "/components/download/download.json", headers={"Range": "bytes=0-9"}
+    )
+    assert response.status_code == 206
+    assert "Content-Encoding" not in response.headers
+    assert response.data == path.read_bytes()[:10]
+    response.close()
+
+    assert test_client.get("/components/download/missing.json").status_code == 404
+    assert (
+        test_client.get("/components/download/../component_one.json").status_code == 404
+    )
+    shutil.rmtree(directory)
@@ -0,0 +1,321 @@
+import json
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from app.catalogs.routes import import_catalog, migrate_catalog_components
+from app.components.routes import (
+    import_component_narratives,
+    merge_component_definitions,
+)
+from app.extensions import db, job_queue
+from app.models.components import CatalogFile, ComponentFile
+from app.models.jobs import Job, JobStatusEnum
+from app.oscal.loader import load_component
+
+
+def job_id(response) -> int:
+    return int(response.headers["Location"].rsplit("/", 1)[1])
+
+
+def test_catalog_export_job(test_client, init_database):
+    """
+    GIVEN a Flask application with a Catalog
+    WHEN its controls are exported
+    THEN a job is returned immediately and its status links to the export
+    """
+    response = test_client.get("/catalogs/1/export")
+    assert response.status_code == 302
+    assert "/jobs/" in response.headers["Location"]
+    job = job_id(response)
+    job_queue.wait(job, timeout=30)
+
+    status = test_client.get(f"/jobs/{job}/status").get_json()
+    assert status["status"] == "finished"
+    assert status["progress"] == 100
+    assert status["result_url"] == f"/jobs/{job}/file"
+
+    response = test_client.get(status["result_url"])
+    assert response.status_code == 200
+    lines = response.data.decode().splitlines()
+    assert json.loads(lines[0])["id"] == "ac-1"
+    response.close()
+
+    page = test_client.get(f"/jobs/{job}")
+    assert b"finished" in page.data
+    assert b'http-equiv="refresh"' not in page.data
+    shutil.rmtree("tests/data/exports")
+
+
+def test_catalog_import_job_failure(test_client, init_database, tmp_path):
+    """
+    GIVEN an uploaded file that is not an OSCAL Catalog
+    WHEN it is imported
+    THEN the job fails with the validation error and the file is removed
+    """
+    upload = tmp_path.joinpath("catalog.json")
+    upload.write_text(json.dumps({"catalog": {}}))
+    job = job_queue.submit(
+        "import_catalog", import_catalog, "Bad", "Bad", "https://bad", upload.as_posix()
+    )
+    job_queue.wait(job.id, timeout=30)
+    # The test shares the session of the request that queued the job.
+    db.session.expire_all()
+
+    status = test_client.get(f"/jobs/{job.id}/status").get_json()
+    assert status["status"] == "failed"
+    assert "is not a valid OSCAL document" in status["error"]
+    assert status["result_url"] is None
+    assert not upload.exists()
+    assert test_client.get(f"/jobs/{job.id}/file").status_code == 404
+
+
+def test_component_add_group_job(test_client, init_database, tmp_path):
+    """
+    GIVEN a Component and a Catalog
+    WHEN every control of a group is added
+    THEN the job adds each control once
+    """
+    filename = tmp_path.joinpath("component.json")
+    shutil.copy(Path("tests/data/component_one.json"), filename)
+    component = ComponentFile(
+        title="Bulk Component",
+        description="A Component for bulk operations.",
+        type="software",
+        filename=filename.as_posix(),
+    )
+    db.session.add(component)
+    db.session.commit()
+
+    for _ in range(2):
+        response = test_client.get(f"/components/{component.id}/catalog/1/group/ac/add")
+        assert response.status_code == 302
+        job_queue.wait(job_id(response), timeout=30)
+
+    status = test_client.get(f"/jobs/{job_id(response)}/status").get_json()
+    assert status["status"] == "finished"
+    assert status["result_url"] == f"/components/{component.id}"
+
+    definition = load_component(filename)
+    implementations = [
+        ci
+        for ci in definition.component_definition.components[0].control_implementations
+        if ci.source == "https://pages.nist.gov/OSCAL/"
+    ]
+    assert len(implementations) == 1
+    control_ids = [ir.control_id for ir in implementations[0].implemented_requirements]
+    assert "ac-1" in control_ids
+    assert len(control_ids) == len(set(control_ids))
+
+
+def test_component_import_narratives_job(test_client, init_database, tmp_path):
+    """
+    GIVEN a Component with a Catalog
+    WHEN a CSV file of control narratives is uploaded
+    THEN the narratives are imported in a job and rows with errors are reported
+    """
+    filename = tmp_path.joinpath("component.json")
+    shutil.copy(Path("tests/data/component_one.json"), filename)
+    component = ComponentFile(
+        title="Narratives Component",
+        description="A Component for narratives.",
+        type="software",
+        filename=filename.as_posix(),
+    )
+    component.catalogs.append(CatalogFile.query.get(1))
+    db.session.add(component)
+    db.session.commit()
+
+    url = f"/components/{component.id}/catalog/1/narratives"
+    assert b"Import Narratives" in test_client.get(url).data
+    data = (
+        b"control_id,statement,narrative,responsibility\n"
+        b"CP-1,,Contingency planning policy.,shared\n"
+        b"AC-2,a,Account types are defined.,\n"
+        b"XX-1,,Not a control.,\n"
+    )
+    upload = tmp_path.joinpath("narratives.csv")
+    upload.write_bytes(data)
+    job = job_queue.submit(
+        "import_narratives",
+        import_component_narratives,
+        component.id,
+        1,
+        upload.as_posix(),
+    )
+    job_queue.wait(job.id, timeout=30)
+    db.session.expire_all()
+
+    status = test_client.get(f"/jobs/{job.id}/status").get_json()
+    assert status["status"] == "finished", status["error"]
+    assert status["message"] == "Imported 2 of 3 rows into 2 controls, 1 errors."
+    assert status["result_url"] == f"/components/{component.id}"
+    page = test_client.get(f"/jobs/{job.id}")
+    assert b"XX-1 is not a control of the catalog." in page.data
+
+    requirements = {
+        ir.control_id: ir
+        for ir in load_component(filename).component_definition.components[0].controls()
+    }
+    assert requirements["cp-1"].description == "Contingency planning policy."
+    assert requirements["cp-1"].responsibility == "shared"
+    assert requirements["ac-2"].statements[0].statement_id == "ac-2_smt.a"
+    assert not upload.exists()
+
+
+def test_catalog_migrate_components_job(test_client, init_database, tmp_path):
+    """
+    GIVEN Components implementing a Catalog and a new revision of the Catalog
+    WHEN the Components are migrated to the new revision with a crosswalk
+    THEN each Component file is rewritten once with the controls of the revision
+    """
+    revision = json.loads(Path("tests/data/NIST_SP_800-53_rev5_TEST.json").read_text())
+    ac_2 = revision["catalog"]["groups"][0]["controls"][1]
+    ac_2["props"].append({"name": "status", "value": "withdrawn"})
+    ac_2["links"] = [{"href": "#ac-1", "rel": "incorporated-into"}]
+    catalog_filename = tmp_path.joinpath("revision.json")
+    catalog_filename.write_text(json.dumps(revision))
+    target = CatalogFile(
+        title="Migration Revision",
+        description="A new revision",
+        source="https://pages.nist.gov/OSCAL/migration",
+        filename=catalog_filename.as_posix(),
+    )
+    components = []
+    for name in ("component_one.json", "component_two.json"):
+        filename = tmp_path.joinpath(name)
+        document = json.loads(Path(f"tests/data/{name}").read_text())
+        definition = document["component_definition"]
+        implementation = definition["components"][0]["control_implementations"][0]
+        implementation["source"] = "https://pages.nist.gov/OSCAL/"
+        filename.write_text(json.dumps(document))
+        component = ComponentFile(
+            title=f"Migrated {name}",
+            description="A Component to migrate.",
+            type="software",
+            filename=filename.as_posix(),
+        )
+        component.catalogs.append(CatalogFile.query.get(1))
+        components.append(component)
+    db.session.add_all([target, *components])
+    db.session.commit()
+
+    page = test_client.get(f"/catalogs/1/migrate?to={target.id}")
+    assert page.status_code == 200
+    assert f'<option selected value="{components[0].id}">'.encode() in page.data
+
+    crosswalk = tmp_path.joinpath("crosswalk.csv")
+    crosswalk.write_text("source,target\nca-1,ca-2\n")
+    job = job_queue.submit(
+        "migrate_components",
+        migrate_catalog_components,
+        1,
+        target.id,
+        [component.id for component in components],
+        crosswalk.as_posix(),
+    )
+    job_queue.wait(job.id, timeout=60)
+    db.session.expire_all()
+
+    status = test_client.get(f"/jobs/{job.id}/status").get_json()
+    assert status["status"] == "finished", status["error"]
+    assert status["message"] == "Migrated 2 of 2 components to Migration Revision."
+    assert b"migrated" in test_client.get(f"/jobs/{job.id}").data
+    assert not crosswalk.exists()
+
+    definition = load_component(components[0].filename)
+    implementations = definition.component_definition.components[
+        0
+    ].control_implementations
+    assert [ci.source for ci in implementations] == [target.source]
+    control_ids = [ir.control_id for ir in implementations[0].implemented_requirements]
+    assert control_ids == ["cp-1", "ca-2", "ac-1", "au-1"]
+    assert [catalog.id for catalog in components[0].catalogs] == [target.id]
+
+
+def test_component_merge_job(test_client, init_database, tmp_path):
+    """
+    GIVEN a Component, another Component and a vendor definition
+    WHEN they are merged into the Component
+    THEN the definitions are merged by key and the Component gets their Catalogs
+    """
+    filename = tmp_path.joinpath("component.json")
+    shutil.copy(Path("tests/data/component_one.json"), filename)
+    component = ComponentFile(
+        title="Merged Component",
+        description="A Component to merge into.",
+        type="software",
+        filename=filename.as_posix(),
+    )
+    db.session.add(component)
+    db.session.commit()
+    assert (
+        b"Merge Definitions"
+        in test_client.get(f"/components/{component.id}/merge").data
+    )
+
+    vendor = json.loads(Path("tests/data/component_one.json").read_text())
+    definition = vendor["component_definition"]
+    requirements = definition["components"][0]["control_implementations"][0][
+        "implemented_requirements"
+    ]
+    requirements[0]["description"] = "The vendor addresses cp-1"
+    requirements.append(dict(requirements[0], control_id="ac-3"))
+    upload = tmp_path.joinpath("vendor.json")
+    upload.write_text(json.dumps(vendor))
+
+    job = job_queue.submit(
+        "merge_components",
+        merge_component_definitions,
+        component.id,
+        [2],
+        [upload.as_posix()],
+        "combine",
+    )
+    job_queue.wait(job.id, timeout=30)
+    db.session.expire_all()
+
+    status = test_client.get(f"/jobs/{job.id}/status").get_json()
+    assert status["status"] == "finished", status["error"]
+    assert status["message"] == (
+        "Merged 2 definitions into Merged Component, 2 conflicts."
+    )
+    assert b"ac-2/description" not in test_client.get(f"/jobs/{job.id}").data
+    assert not upload.exists()
+
+    components = load_component(filename).component_definition.components
+    assert len(components) == 1
+    implementations = components[0].control_implementations
+    assert [ci.source for ci in implementations] == [
+        "https://pages.nist.gov/OSCAL/",
+        "https://pages.nist.gov/OSCAL/2",
+    ]
+    merged = {ir.control_id: ir for ir in implementations[0].implemented_requirements}
+    assert list(merged) == ["cp-1", "ca-1", "ac-2", "au-1", "ac-3"]
+    assert merged["cp-1"].description == (
+        "TC1 addresses cp-1\n\nThe vendor addresses cp-1"
+    )
+    assert sorted(catalog.id for catalog in component.catalogs) == [1, 2]
+
+
+def test_stale_job_failed(test_client, init_database):
+    """
+    GIVEN a running Job whose process stopped without renewing its lease
+    WHEN its status is read
+    THEN the Job is failed with an error, a recent Job is left running
+    """
+    stale = Job(kind="import_catalog", status=JobStatusEnum.running)
+    recent = Job(kind="import_catalog", status=JobStatusEnum.running)
+    db.session.add_all([stale, recent])
+    db.session.commit()
+    stale.updated_on = datetime.utcnow() - timedelta(seconds=job_queue.lease + 60)
+    db.session.commit()
+
+    status = test_client.get(f"/jobs/{stale.id}/status").get_json()
+    assert status["status"] == "failed"
+    assert "stopped before it finished" in status["error"]
+    assert test_client.get(f"/jobs/{recent.id}/status").get_json()["status"] == (
+        "running"
+    )
+    db.session.delete(recent)
+    db.session.commit()
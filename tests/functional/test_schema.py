@@ -0,0 +1,72 @@
+import pytest
+
+from app.extensions import db
+from app.models.components import CatalogFile
+
+
+def query_plan(sql: str, **params) -> str:
+    rows = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}"), params).all()
+    return " ".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize(
+    "sql, params, index",
+    [
+        (
+            "SELECT id FROM catalogs WHERE title = :v",
+            {"v": "Test"},
+            "ix_catalogs_title",
+        ),
+        (
+            "SELECT id FROM catalogs WHERE filename = :v",
+            {"v": "tests/data/NIST_SP_800-53_rev5_TEST.json"},
+            "ix_catalogs_filename",
+        ),
+        (
+            "SELECT id FROM catalogs WHERE source = :v",
+            {"v": "https://pages.nist.gov/OSCAL/"},
+            "ix_catalogs_source",
+        ),
+        (
+            "SELECT id FROM components WHERE title = :v",
+            {"v": "Test"},
+            "ix_components_title",
+        ),
+        (
+            "SELECT component_id FROM component_catalog WHERE catalog_id = :v",
+            {"v": 1},
+            "ix_component_catalog_catalog_id",
+        ),
+        (
+            "SELECT id, title FROM catalogs ORDER BY updated_on DESC LIMIT 10",
+            {},
+            "ix_catalogs_updated_on",
+        ),
+    ],
+)
+def test_queries_use_indexes(test_client, init_database, sql, params, index):
+    """
+    GIVEN the database schema
+    WHEN common lookups are explained
+    THEN check SQLite uses an index instead of a full scan
+    """
+    assert index in query_plan(sql, **params)
+
+
+def test_unique_title(test_client, init_database):
+    """
+    GIVEN the database schema
+    WHEN a second Catalog with the same title is added
+    THEN check the unique constraint rejects it
+    """
+    db.session.add(
+        CatalogFile(
+            title="Test Catalog",
+            description="Duplicate",
+            source="https://example.com/duplicate",
+            filename="tests/data/NIST_SP_800-53_rev5_TEST.json",
+        )
+    )
+    with pytest.raises(db.exc.IntegrityError):
+        db.session.commit()
+    db.session.rollback()
@@ -0,0 +1,64 @@
+import json
+import shutil
+
+from app.aggregate import Aggregator
+from app.models.components import CatalogFile, ComponentFile
+from app.oscal.catalog import CatalogModel
+
+SOURCE = "https://pages.nist.gov/OSCAL/"
+
+
+def test_aggregate(catalog, tmp_path, monkeypatch):
+    """
+    Implementations are grouped by control in catalog order, and only the
+    component files that changed are read again
+    """
+    model = CatalogModel.from_json(catalog.filename)
+    catalog_file = CatalogFile(id=1, source=SOURCE, filename=catalog.filename)
+    components = []
+    for id_, name in ((1, "component_one.json"), (2, "component_two.json")):
+        shutil.copy(f"tests/data/{name}", tmp_path.joinpath(name))
+        components.append(
+            ComponentFile(id=id_, title=name, filename=str(tmp_path.joinpath(name)))
+        )
+
+    # Both components implement the same catalog.
+    path = tmp_path.joinpath("component_two.json")
+    document = json.loads(path.read_text())
+    definition = document["component_definition"]
+    definition["components"][0]["control_implementations"][0]["source"] = SOURCE
+    path.write_text(json.dumps(document))
+
+    aggregator = Aggregator()
+    reads = []
+    read = Aggregator.read
+    monkeypatch.setattr(
+        Aggregator, "read", staticmethod(lambda c: reads.append(c.id) or read(c))
+    )
+
+    controls = aggregator.aggregate(catalog_file, model, components)
+    ids = [control["control_id"] for control in controls]
+    assert ids == sorted(ids, key=model.positions.get)
+    cp1 = next(control for control in controls if control["control_id"] == "cp-1")
+    assert cp1["title"] == "Policy and Procedures"
+    assert [i["component"] for i in cp1["implementations"]] == [
+        "component_one.json",
+        "component_two.json",
+    ]
+    assert aggregator.aggregate(catalog_file, model, components) is controls
+    assert sorted(reads) == [1, 2]
+
+    requirement = definition["components"][0]["control_implementations"][0][
+        "implemented_requirements"
+    ][0]
+    requirement["props"] = [
+        {"name": "security_control_type", "value": "shared"},
+        {"name": "provider", "value": "yes"},
+    ]
+    path.write_text(json.dumps(document))
+
+    controls = aggregator.aggregate(catalog_file, model, components)
+    assert sorted(reads) == [1, 2, 2]
+    control = next(c for c in controls if c["control_id"] == requirement["control_id"])
+    assert control["responsibilities"] == ["shared"]
+    assert control["providers"] == ["yes"]
@@ -0,0 +1,39 @@
+from app.cache import FragmentCache
+
+
+def test_fragment_cache_lru():
+    """
+    The in-memory tier evicts the least recently used fragment
+    """
+    cache = FragmentCache()
+    cache.maxsize = 2
+    first = cache.key(1, "first")
+    second = cache.key(1, "second")
+    third = cache.key(2, "third")
+    cache.set(first, "<p>1</p>")
+    cache.set(second, "<p>2</p>")
+    assert cache.get(first) == "<p>1</p>"
+    cache.set(third, "<p>3</p>")
+    assert cache.get(second) is None
+    assert cache.get(first) == "<p>1</p>"
+
+
+def test_fragment_cache_disk_tier_and_invalidate(tmp_path):
+    """
+    Fragments are read back from disk and invalidated per catalog
+    """
+    cache = FragmentCache()
+    cache.directory = tmp_path
+    one = cache.key(1, "body")
+    two = cache.key(2, "body")
+    cache.set(one, "<p>1</p>")
+    cache.set(two, "<p>2</p>")
+
+    other = FragmentCache()
+    other.directory = tmp_path
+    assert other.get(one) == "<p>1</p>"
+
+    cache.invalidate(1)
+    assert cache.get(one) is None
+    assert cache.get(two) == "<p>2</p>"
+    assert not list(tmp_path.glob("catalog-1-*"))
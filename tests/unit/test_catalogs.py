@@ -1,5 +1,5 @@
 from app.catalogs.routes import get_control_links, replace_odps
-from app.oscal.catalog import CatalogModel
+from app.oscal.catalog import CatalogModel, Control
 
 
 def test_new_catalog(catalog):
@@ -49,3 +49,30 @@ def test_odp_replacement():
     assert replaced[0].get("prose") == "Neil Armstrong was the first man on the moon."
     assert replaced[1].get("prose") == "David Bowie was the first Life on Mars."
     assert replaced[2].get("prose") == "Neil Armstrong was shorter than David Bowie."
+
+
+def test_odp_replacement_unknown():
+    """
+    replace_odps should keep placeholders without a parameter, and empty prose.
+    """
+    replaced = replace_odps(
+        [{"prose": "{{ insert: param, ac-1_prm_1 }} and {{ insert: param, x }}."}, {}],
+        {"ac-1_prm_1": "Policy", "ac-1_prm_10": "Unused"},
+    )
+    assert replaced[0]["prose"] == "Policy and {{ insert: param, x }}."
+    assert replaced[1] == {}
+
+
+def test_catalog_sort_keys(catalog):
+    """
+    Controls and enhancements sort in natural order, with or without a sort-id
+    """
+    catalog = CatalogModel.from_json(catalog.filename)
+    ia = catalog.get_group_by_id("ia")
+    ids = [c["control_id"] for c in catalog.get_group_controls(ia.controls[::-1])]
+    assert ids == ["ia-1", "ia-2", "ia-4"]
+    assert catalog.ordered_ids.index("ia-2.12") == catalog.positions["ia-2.8"] + 1
+    assert catalog.get_next(catalog.get_control("ia-2.8")) == "ia-2.12"
+
+    unsorted = [Control(id=control_id, title="") for control_id in ("ac-10", "ac-2")]
+    assert [c.id for c in catalog.sorted_controls(unsorted)] == ["ac-2", "ac-10"]
@@ -0,0 +1,98 @@
+import io
+
+import pytest
+
+from app.components.importer import Narratives, read_csv, schema_errors
+from app.oscal.component import ComponentModel
+
+CSV = b"""\xef\xbb\xbfControl ID,Statement,Narrative,Responsibility,Provider
+AC-1,,Policy is documented.,shared,yes
+ac-01,a,Part a is covered.,,
+IA-2(1),,MFA for privileged accounts.,inherited,no
+,,No control.,,
+XX-9,,Not in the catalog.,,
+AC-2,,,,
+
+AC-1,,Policy is reviewed yearly.,,
+"""
+
+
+def read(data: bytes, controls=None) -> Narratives:
+    narratives = Narratives(controls=controls)
+    narratives.read(read_csv(io.BytesIO(data)))
+    return narratives
+
+
+def test_read_narratives():
+    """
+    Rows are keyed by the normalized control and statement ids, later rows win
+    """
+    narratives = read(CSV, controls={"ac-1", "ac-2", "ia-2.1"})
+    assert narratives.rows == 7
+    assert narratives.duplicates == 1
+    assert list(narratives.requirements) == ["ac-1", "ia-2.1"]
+    assert narratives.requirements["ac-1"] == {
+        "description": "Policy is reviewed yearly.",
+        "statements": {"ac-1_smt.a": "Part a is covered."},
+        "props": {"security_control_type": "shared", "provider": "yes"},
+    }
+    assert [error["row"] for error in narratives.errors] == [5, 6, 7]
+    assert "XX-9 is not a control of the catalog." in narratives.errors[1]["error"]
+
+
+def test_read_narratives_statement_ids():
+    """
+    Full statement ids are kept, part labels and nested parts are appended
+    """
+    narratives = read(
+        b"control_id,statement_id,narrative\n"
+        b"AC-2,ac-2_smt.a,Accounts.\n"
+        b"AC-2,a.1,Account types.\n"
+        b"AC-2(1),(b)(2),Automated.\n",
+        controls={"ac-2", "ac-2.1"},
+    )
+    assert narratives.errors == []
+    assert narratives.requirements["ac-2"]["statements"] == {
+        "ac-2_smt.a": "Accounts.",
+        "ac-2_smt.a.1": "Account types.",
+    }
+    assert narratives.requirements["ac-2.1"]["statements"] == {
+        "ac-2.1_smt.b.2": "Automated."
+    }
+
+
+def test_read_narratives_header():
+    """
+    A file without control id and narrative columns is refused
+    """
+    with pytest.raises(ValueError, match="control_id and a narrative"):
+        read(b"id,text\nac-1,Policy\n")
+    with pytest.raises(ValueError, match="empty"):
+        read(b"")
+
+
+def test_apply_narratives():
+    """
+    Narratives update existing requirements and add new ones, the result is valid
+    """
+    definition = ComponentModel.from_json("tests/data/component_one.json")
+    implementation = definition.component_definition.components[
+        0
+    ].control_implementations[0]
+    count = len(implementation.implemented_requirements)
+
+    narratives = read(
+        b"control,part,narrative,responsibility\n"
+        b"cp-1,,Updated.,shared\ncp-1,b,Part b.,\nac-3,,New.,\n"
+    )
+    assert narratives.apply(implementation) == 1
+    assert narratives.apply(implementation) == 0
+
+    requirements = {ir.control_id: ir for ir in implementation.implemented_requirements}
+    assert len(requirements) == count + 1
+    assert requirements["cp-1"].description == "Updated."
+    assert requirements["cp-1"].responsibility == "shared"
+    assert len(requirements["cp-1"].props) == 1
+    assert [s.statement_id for s in requirements["cp-1"].statements] == ["cp-1_smt.b"]
+    assert requirements["ac-3"].description == "New."
+    assert schema_errors(definition) == []
@@ -1,5 +1,10 @@
+import pytest
+
+from app import create_app
 from app.components.routes import add_implemented_requirement
-from app.oscal.component import ImplementedRequirement
+from app.models.components import ComponentFile
+from app.oscal.component import ComponentModel, ImplementedRequirement
+from config import TestConfig
 
 
 def test_add_implemented_requirements():
@@ -13,3 +18,18 @@ def test_add_implemented_requirements():
     assert ir.control_id == "ac-1"
     assert hasattr(ir, "props")
     assert hasattr(ir, "set_parameters")
+
+
+def test_write_file_error(tmp_path):
+    """
+    Given a Component file that cannot be written
+    write_file should log and raise the error, outside of a request too
+    """
+    component = ComponentFile(
+        title="Unwritable", filename=tmp_path.joinpath("missing/c.json").as_posix()
+    )
+    with create_app(TestConfig).app_context():
+        with pytest.raises(IOError):
+            component.write_file(
+                ComponentModel.from_json("tests/data/component_one.json")
+            )
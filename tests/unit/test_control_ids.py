@@ -0,0 +1,56 @@
+import pytest
+
+from app.oscal.control_ids import (
+    control_to_statement_id,
+    natural_sort_key,
+    normalize_control_ids,
+    oscalize_control_id,
+)
+
+
+@pytest.mark.parametrize(
+    "control_id, oscal_id, statement_id",
+    [
+        ("3.1.1", "3.1.1", "3.1.1_smt"),
+        ("1.2.3.4", "1.2.3.4", "1.2.3.4_smt"),
+        ("AC-1", "ac-1", "ac-1_smt"),
+        (" ac-01 ", "ac-1", "ac-1_smt"),
+        ("AC-2(1)", "ac-2.1", "ac-2.1_smt"),
+        ("AC-2 (01)", "ac-2.1", "ac-2.1_smt"),
+        ("AC-1.a", "ac-1", "ac-1_smt.a"),
+        ("SC-7(10).c", "sc-7.10", "sc-7.10_smt.c"),
+        ("ia-5(1)(a)", "ia-5(1)(a)", "ia-5(1)(a)_smt"),
+        ("12", "12", "12_smt"),
+    ],
+)
+def test_normalize_control_id(control_id, oscal_id, statement_id):
+    """
+    Every 800-53 and 800-171 format is normalized, other ids are only lower-cased
+    """
+    assert oscalize_control_id(control_id) == oscal_id
+    assert control_to_statement_id(control_id) == statement_id
+
+
+def test_normalize_control_ids():
+    """
+    A column of ids is normalized in one call, including numeric cells
+    """
+    ids = normalize_control_ids(["AC-2(1)", 3.1, None, "AC-2(1)"])
+    assert [i.control_id for i in ids] == ["ac-2.1", "3.1", "", "ac-2.1"]
+    assert ids[0].statement_id == "ac-2.1_smt"
+
+
+def test_natural_sort_key():
+    """
+    Numbers sort by value and controls before their enhancements
+    """
+    ids = ["ac-10", "AC-2.1", "ac-02", "ac-1", "3.10.1", "3.2.1", "au-1"]
+    assert sorted(ids, key=natural_sort_key) == [
+        "3.2.1",
+        "3.10.1",
+        "ac-1",
+        "ac-02",
+        "AC-2.1",
+        "ac-10",
+        "au-1",
+    ]
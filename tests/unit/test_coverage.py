@@ -0,0 +1,86 @@
+import shutil
+
+from app.coverage import CoverageMatrix, document_controls
+from app.models.components import CatalogFile, ComponentFile
+from app.oscal.catalog import CatalogModel
+from app.oscal.component import ComponentModel
+
+SOURCE = "https://pages.nist.gov/OSCAL/"
+
+
+def test_document_controls():
+    """
+    Control ids are read from files with OSCAL or model field names
+    """
+    document = {
+        "component-definition": {
+            "components": [
+                {
+                    "control-implementations": [
+                        {
+                            "source": SOURCE,
+                            "implemented-requirements": [{"control-id": "ac-1"}],
+                        }
+                    ]
+                },
+                {
+                    "control_implementations": [
+                        {
+                            "source": SOURCE,
+                            "implemented_requirements": [{"control_id": "ac-2"}],
+                        }
+                    ]
+                },
+            ]
+        }
+    }
+    assert document_controls(document) == {SOURCE: {"ac-1", "ac-2"}}
+
+
+def test_coverage_matrix(catalog, tmp_path, monkeypatch):
+    """
+    Coverage is computed per component and follows edits without recomputing
+    """
+    model = CatalogModel.from_json(catalog.filename)
+    catalog_file = CatalogFile(id=1, source=SOURCE, filename=catalog.filename)
+    components = []
+    for id_, name in ((1, "component_one.json"), (2, "component_two.json")):
+        shutil.copy(f"tests/data/{name}", tmp_path.joinpath(name))
+        components.append(
+            ComponentFile(id=id_, title=name, filename=str(tmp_path.joinpath(name)))
+        )
+
+    matrix = CoverageMatrix()
+    monkeypatch.setattr("app.models.components.coverage_matrix", matrix)
+    coverage = matrix.coverage(catalog_file, model, components)
+    assert coverage.component_count(1) == 4
+    assert coverage.implemented_by("cp-1") == [1]
+    assert "cp-1" not in coverage.gaps
+    assert "ac-3" in coverage.gaps
+    ac = next(family for family in coverage.families() if family["family"] == "ac")
+    assert ac == {
+        "family": "ac",
+        "title": "Access Control",
+        "controls": 3,
+        "covered": 1,
+        "percent": 33.3,
+    }
+
+    # A component written by the app updates the matrix without reading it back.
+    definition = ComponentModel.from_json(components[0].filename)
+    implementation = definition.component_definition.components[
+        0
+    ].control_implementations[0]
+    implementation.implemented_requirements = implementation.implemented_requirements[
+        :1
+    ]
+    components[0].write_file(definition)
+    monkeypatch.setattr("app.coverage.open_blob", None)
+    coverage = matrix.coverage(catalog_file, model, components[:1])
+    assert coverage.component_count(1) == 1
+
+    # A file changed outside the app is read again.
+    monkeypatch.setattr("app.coverage.open_blob", open)
+    shutil.copy("tests/data/component_two.json", components[0].filename)
+    coverage = matrix.coverage(catalog_file, model, components)
+    assert coverage.component_count(1) == coverage.component_count(2)
@@ -0,0 +1,97 @@
+import copy
+import json
+
+import pytest
+
+from app.oscal.diff import (
+    catalog_controls,
+    catalog_hashes,
+    control_hash,
+    diff_catalogs,
+    field_changes,
+)
+
+CATALOG = "tests/data/NIST_SP_800-53_rev5_TEST.json"
+
+
+@pytest.fixture(scope="module")
+def catalogs():
+    with open(CATALOG) as file:
+        old = json.load(file)
+    new = copy.deepcopy(old)
+    groups = {group["id"]: group for group in new["catalog"]["groups"]}
+    ac_1, ac_2, ac_3 = groups["ac"]["controls"][:3]
+    ac_1["title"] = "Access Control Policy"
+    ac_1["params"][0]["values"] = ["all personnel"]
+    ac_1["parts"][1]["prose"] = "New guidance."
+    ac_2["props"].append({"name": "status", "value": "withdrawn"})
+    groups["ac"]["controls"].remove(ac_3)
+    groups["sr"]["controls"].append({"id": "sr-99", "title": "New Control"})
+    return old, new
+
+
+def test_control_hash():
+    """
+    The hash ignores the key order and the enhancements of a control
+    """
+    control = {"id": "ac-1", "title": "Policy", "props": [{"name": "a", "value": "b"}]}
+    reordered = {
+        "props": [{"value": "b", "name": "a"}],
+        "title": "Policy",
+        "id": "ac-1",
+        "controls": [{"id": "ac-1.1"}],
+    }
+    assert control_hash(control) == control_hash(reordered)
+    assert control_hash(control) != control_hash({**control, "title": "Policies"})
+
+
+def test_diff_catalogs(catalogs):
+    """
+    Controls are added, removed, withdrawn and changed, and only the changed
+    controls are loaded to diff their fields
+    """
+    old, new = catalogs
+    loads = []
+
+    def controls(catalog):
+        return lambda: loads.append(1) or catalog_controls(catalog)
+
+    diff = diff_catalogs(
+        catalog_hashes(old), catalog_hashes(new), controls(old), controls(new)
+    )
+    assert list(diff.changed) == ["ac-1"]
+    assert diff.withdrawn == ["ac-2"]
+    assert diff.removed == ["ac-3"]
+    assert diff.added == ["sr-99"]
+    assert diff.unchanged == len(catalog_controls(old)) - 3
+    assert diff.affected == {"ac-1", "ac-2", "ac-3"}
+    assert len(loads) == 2
+
+    same = diff_catalogs(
+        catalog_hashes(old), catalog_hashes(old), controls(old), controls(old)
+    )
+    assert not same.affected and same.unchanged == len(catalog_controls(old))
+    assert len(loads) == 2
+
+
+def test_field_changes(catalogs):
+    """
+    The title, params, props and parts of a changed control are compared by key
+    """
+    old, new = (catalog_controls(catalog) for catalog in catalogs)
+    changes = {
+        (change["field"], change["key"]): change
+        for change in field_changes(old["ac-1"], new["ac-1"])
+    }
+    assert set(changes) == {
+        ("title", "title"),
+        ("params", "ac-1_prm_1"),
+        ("parts", "ac-1_gdn"),
+    }
+    assert changes[("title", "title")]["new"] == "Access Control Policy"
+    assert changes[("params", "ac-1_prm_1")]["new"].endswith("all personnel")
+    assert changes[("parts", "ac-1_gdn")]["change"] == "changed"
+    assert changes[("parts", "ac-1_gdn")]["new"] == "New guidance."
+
+    changes = field_changes(old["ac-2"], new["ac-2"])
+    assert [(c["key"], c["change"]) for c in changes] == [("status", "added")]
@@ -0,0 +1,65 @@
+from flask import g, stream_with_context
+
+from app import create_app
+from app.extensions import db, engine_options, read_only
+from config import TestConfig
+
+
+def test_engine_options_pooled():
+    """
+    The pooled profile sizes the connection pool, other profiles leave it alone
+    """
+    options = engine_options({"DATABASE_PROFILE": "pooled", "DATABASE_POOL_SIZE": 5})
+    assert options["pool_size"] == 5
+    assert options["pool_pre_ping"] is True
+    assert engine_options({"DATABASE_PROFILE": "sqlite"}) == {}
+
+
+def test_sqlite_pragmas(test_client):
+    """
+    The sqlite profile puts the database in WAL mode on connect
+    """
+    with db.engine.connect() as connection:
+        journal_mode = connection.exec_driver_sql("PRAGMA journal_mode").scalar()
+        busy_timeout = connection.exec_driver_sql("PRAGMA busy_timeout").scalar()
+    assert journal_mode == "wal"
+    assert busy_timeout == 5000
+
+
+def test_lazy_migrate():
+    """
+    With LAZY_STARTUP Flask-Migrate is only registered when a flask db command runs
+    """
+
+    class LazyConfig(TestConfig):
+        LAZY_STARTUP = True
+
+    app = create_app(LazyConfig)
+    assert "migrate" not in app.extensions
+    result = app.test_cli_runner().invoke(args=["db", "heads"])
+    assert result.exit_code == 0, result.output
+    assert "migrate" in app.extensions
+
+
+def test_read_only_streamed():
+    """
+    A streamed read_only view stays on the replica until its body is rendered
+    """
+    app = create_app(TestConfig)
+    marks = []
+
+    @app.route("/streamed")
+    @read_only
+    def streamed():
+        def generate():
+            for chunk in ("a", "b"):
+                marks.append(g.get("read_only"))
+                yield chunk
+
+        return app.response_class(stream_with_context(generate()))
+
+    with app.app_context():
+        response = app.test_client().get("/streamed")
+        assert response.data == b"ab"
+        assert marks == [True, True]
+        assert "read_only" not in g
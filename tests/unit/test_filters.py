@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from app.oscal.catalog import CatalogModel
+from app.oscal.filters import FilterError, parse_filter
+
+
+@pytest.fixture(scope="module")
+def catalog(catalog) -> CatalogModel:
+    with open(catalog.filename) as file:
+        data = json.load(file)["catalog"]
+    for group in data["groups"]:
+        for control in group["controls"]:
+            for enhancement in control.get("controls", []):
+                if enhancement["id"] in ("ia-2.1", "ia-2.2"):
+                    enhancement["props"].append(
+                        {"name": "status", "value": "withdrawn"}
+                    )
+    return CatalogModel(**data)
+
+
+def test_parse_filter():
+    """
+    NOT binds tighter than AND, AND than OR, and adjacent terms are ANDed
+    """
+    assert parse_filter("family:AC type:control OR NOT id:AC-2(1)") == (
+        "or",
+        ("and", ("term", "family", "ac"), ("term", "type", "control")),
+        ("not", ("term", "id", "ac-2.1")),
+    )
+    assert parse_filter("(family:ac OR family:ia) AND prop:status") == (
+        "and",
+        ("or", ("term", "family", "ac"), ("term", "family", "ia")),
+        ("term", "prop", "status"),
+    )
+
+
+@pytest.mark.parametrize(
+    "expression", ["", "family:", "color:red", "family:ac AND", "(family:ac", "OR x"]
+)
+def test_parse_filter_errors(expression):
+    """
+    Invalid filters raise a FilterError
+    """
+    with pytest.raises(FilterError):
+        parse_filter(expression)
+
+
+def test_filter_index(catalog):
+    """
+    Filters select controls by family, type, prop and baseline, in sort order
+    """
+    index = catalog.filter_index
+    assert index.match("type:enhancement AND prop:status=Withdrawn") == [
+        "ia-2.1",
+        "ia-2.2",
+    ]
+    ia = index.match("family:ia AND NOT prop:status=withdrawn")
+    assert ia[:3] == ["ia-1", "ia-2", "ia-2.8"]
+    assert index.match("family:ac OR id:ia-2(12)") == [
+        "ac-1",
+        "ac-2",
+        "ac-3",
+        "ia-2.12",
+    ]
+    assert index.match("baseline:low family:ac", lambda value: ["ac-2", "ia-1"]) == [
+        "ac-2"
+    ]
+    with pytest.raises(FilterError):
+        index.match("baseline:low")
+    assert len(index.match("NOT family:xx")) == len(catalog.controls)
+
+
+def test_filtered_groups(catalog):
+    """
+    A filtered group tree keeps the controls of the selected enhancements
+    """
+    groups = catalog.get_groups(set(catalog.filter_index.match("prop:status")))
+    assert [group["group_id"] for group in groups] == ["ia"]
+    assert [c["control_id"] for c in groups[0]["controls"]] == ["ia-2"]
+    assert len(groups[0]["controls"][0]["enhancements"]) == 2
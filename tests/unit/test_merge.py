@@ -0,0 +1,113 @@
+import pytest
+
+from app.oscal.component import Component, Statement
+from app.oscal.enums import ConflictPolicyEnum
+from app.oscal.loader import load_component
+from app.oscal.merge import DefinitionMerger, MergeConflict, merge_definitions
+
+SOURCE = "https://pages.nist.gov/OSCAL/"
+
+
+def vendor_definition(narrative: str = "Vendor addresses ac-2"):
+    """
+    Component one with a narrative of its own for ac-2, a new control and a
+    statement.
+    """
+    model = load_component("tests/data/component_one.json")
+    component = model.component_definition.components[0]
+    requirements = component.control_implementations[0].implemented_requirements
+    requirements[2].description = narrative
+    requirements[2].statements = [Statement(statement_id="ac-2_smt.a")]
+    requirements.append(requirements[0].copy(update={"control_id": "ac-3"}))
+    return model
+
+
+def requirements(model, source: str = SOURCE) -> dict:
+    component = model.component_definition.components[0]
+    implementation = next(
+        ci for ci in component.control_implementations if ci.source == source
+    )
+    return {ir.control_id: ir for ir in implementation.implemented_requirements}
+
+
+def test_merge_definitions():
+    """
+    Components, control implementations, requirements and statements are merged
+    by key, and the first definition's values are kept
+    """
+    ours = load_component("tests/data/component_one.json")
+    theirs = load_component("tests/data/component_two.json")
+    merged, conflicts = merge_definitions([ours, vendor_definition(), theirs])
+    assert merged is ours
+    components = merged.component_definition.components
+    assert len(components) == 1
+    assert [ci.source for ci in components[0].control_implementations] == [
+        SOURCE,
+        f"{SOURCE}2",
+    ]
+    merged_requirements = requirements(merged)
+    assert list(merged_requirements) == ["cp-1", "ca-1", "ac-2", "au-1", "ac-3"]
+    assert merged_requirements["ac-2"].description == "TC1 addresses ac-2"
+    assert merged_requirements["ac-2"].statements[0].statement_id == "ac-2_smt.a"
+    assert [conflict["path"] for conflict in conflicts] == [
+        f"components/test component one/{SOURCE}/ac-2/description",
+        "components/test component one/description",
+    ]
+
+
+@pytest.mark.parametrize(
+    "policy, description",
+    [
+        (ConflictPolicyEnum.first, "TC1 addresses ac-2"),
+        (ConflictPolicyEnum.last, "Vendor two"),
+        (
+            ConflictPolicyEnum.combine,
+            "TC1 addresses ac-2\n\nVendor one\n\nVendor two",
+        ),
+    ],
+)
+def test_merge_policy(policy, description):
+    """
+    Values that differ are resolved with the conflict policy
+    """
+    merged, conflicts = merge_definitions(
+        [
+            load_component("tests/data/component_one.json"),
+            vendor_definition("Vendor one"),
+            vendor_definition("Vendor two"),
+        ],
+        policy,
+    )
+    assert requirements(merged)["ac-2"].description == description
+    assert len(conflicts) == 2
+
+
+def test_merge_policy_error():
+    """
+    The error policy raises with every conflict
+    """
+    merger = DefinitionMerger("error")
+    merger.add(load_component("tests/data/component_one.json"))
+    merger.add(vendor_definition())
+    with pytest.raises(MergeConflict, match="1 conflicts") as exc:
+        merger.result()
+    assert exc.value.conflicts[0]["other"] == "Vendor addresses ac-2"
+
+
+def test_duplicate_checks():
+    """
+    Adding a component, statement or property that is already there fails
+    """
+    definition = load_component("tests/data/component_one.json").component_definition
+    component = definition.components[0]
+    with pytest.raises(KeyError):
+        definition.add_component(component)
+    definition.add_component(
+        Component(title="Another", description="Another component")
+    )
+    assert len(definition.components) == 2
+
+    requirement = component.control_implementations[0].implemented_requirements[0]
+    requirement.add_statement(Statement(statement_id="cp-1_smt.a"))
+    with pytest.raises(KeyError, match="for cp-1"):
+        requirement.add_statement(Statement(statement_id="cp-1_smt.a"))
@@ -0,0 +1,165 @@
+import io
+import json
+
+from app.components.migration import (
+    Crosswalk,
+    migrate_file,
+    migrate_files,
+    migrate_implementations,
+    read_crosswalk,
+)
+from app.oscal.component import Statement
+from app.oscal.loader import load_component
+
+SOURCE = "https://pages.nist.gov/OSCAL/"
+TARGET = "https://pages.nist.gov/OSCAL/rev5"
+
+
+def withdrawn(control_id: str, *links: tuple) -> dict:
+    return {
+        "id": control_id,
+        "title": "Withdrawn",
+        "props": [{"name": "status", "value": "withdrawn"}],
+        "links": [{"href": f"#{href}", "rel": rel} for rel, href in links],
+    }
+
+
+CATALOG = {
+    "catalog": {
+        "groups": [
+            {
+                "id": "ac",
+                "controls": [
+                    {"id": "ac-1", "title": "Policy"},
+                    withdrawn(
+                        "ac-2", ("incorporated-into", "ac-1"), ("related", "ac-4")
+                    ),
+                    {"id": "ac-3", "title": "Enforcement"},
+                    withdrawn("ac-4"),
+                    withdrawn("ac-5", ("moved-to", "ac-2"), ("moved-to", "ac-3")),
+                ],
+            }
+        ]
+    }
+}
+
+
+def test_crosswalk_from_catalog():
+    """
+    Withdrawn controls map to the controls they were incorporated into or moved
+    to, and a crosswalk file takes precedence
+    """
+    crosswalk = Crosswalk.from_catalog(CATALOG)
+    assert crosswalk.targets("ac-1") == ["ac-1"]
+    assert crosswalk.targets("ac-2") == ["ac-1"]
+    assert crosswalk.targets("ac-4") == []
+    assert crosswalk.targets("ac-5") == ["ac-1", "ac-3"]
+    assert crosswalk.targets("zz-1") == []
+
+    crosswalk = Crosswalk.from_catalog(CATALOG, {"zz-1": ["ac-3"], "ac-1": []})
+    assert crosswalk.targets("zz-1") == ["ac-3"]
+    assert crosswalk.targets("ac-1") == []
+
+
+def test_read_crosswalk():
+    """
+    Crosswalk files are read from CSV and JSON, with normalized control ids
+    """
+    data = b"Rev4,Rev5\nAC-2(1),AC-2(1)\nAC-13,AC-2\nAC-13,AU-6\nAC-15,\n"
+    assert read_crosswalk(io.BytesIO(data), "crosswalk.csv") == {
+        "ac-2.1": ["ac-2.1"],
+        "ac-13": ["ac-2", "au-6"],
+        "ac-15": [],
+    }
+    data = json.dumps({"AC-13": ["AC-2"], "AC-2(1)": "ac-2.1", "ac-15": None})
+    assert read_crosswalk(io.BytesIO(data.encode()), "crosswalk.json") == {
+        "ac-13": ["ac-2"],
+        "ac-2.1": ["ac-2.1"],
+        "ac-15": [],
+    }
+
+
+def test_migrate_implementations():
+    """
+    Requirements are moved to the target source with their control and statement
+    ids replaced, merged when several controls map to one, and dropped when they
+    map to none
+    """
+    definition = load_component("tests/data/component_one.json")
+    component = definition.component_definition.components[0]
+    requirements = component.control_implementations[0].implemented_requirements
+    requirements[2].statements = [
+        Statement(statement_id="ac-2_smt.a", description="Accounts.")
+    ]
+    crosswalk = Crosswalk(
+        {"cp-1": ["cp-1"], "ac-2": ["au-1", "au-2"], "au-1": ["au-1"]}
+    )
+
+    result = migrate_implementations(component, SOURCE, TARGET, "Rev5", crosswalk)
+    assert result == {
+        "requirements": 4,
+        "remapped": 2,
+        "merged": 1,
+        "dropped": ["ca-1"],
+    }
+    assert [ci.source for ci in component.control_implementations] == [TARGET]
+    migrated = {
+        ir.control_id: ir
+        for ir in component.control_implementations[0].implemented_requirements
+    }
+    assert list(migrated) == ["cp-1", "au-1", "au-2"]
+    assert migrated["au-1"].description == (
+        "TC1 addresses ac-2\n\nAdd Control narrative"
+    )
+    assert [s.statement_id for s in migrated["au-1"].statements] == ["au-1_smt.a"]
+    assert [s.statement_id for s in migrated["au-2"].statements] == ["au-2_smt.a"]
+    assert migrated["au-1"].uuid != migrated["au-2"].uuid
+
+
+def test_migrate_file(tmp_path):
+    """
+    The migrated file is returned as valid JSON, and files without the source are
+    skipped
+    """
+    crosswalk = Crosswalk({"cp-1": ["cp-1"], "ac-2": ["ac-2"]})
+    filename = "tests/data/component_one.json"
+    result = migrate_file(filename, SOURCE, TARGET, "Rev5", crosswalk)
+    assert result["status"] == "migrated", result["error"]
+    assert result["dropped"] == ["au-1", "ca-1"]
+    document = json.loads(result["document"])
+    definition = document["component_definition"]
+    implementation = definition["components"][0]["control_implementations"][0]
+    assert implementation["source"] == TARGET
+
+    result = migrate_file(filename, "https://other", TARGET, "Rev5", crosswalk)
+    assert result["status"] == "skipped"
+    assert "document" not in result
+
+
+def test_migrate_files_pool():
+    """
+    Files migrated on a pool of worker processes give the same results, in order,
+    as the ones migrated in process
+    """
+    crosswalk = Crosswalk({"cp-1": ["cp-1"], "ac-2": ["ac-2"]})
+    filenames = ["tests/data/component_one.json", "tests/data/component_two.json"]
+    pooled = migrate_files(filenames, SOURCE, TARGET, "Rev5", crosswalk, workers=2)
+    in_process = migrate_files(filenames, SOURCE, TARGET, "Rev5", crosswalk, workers=1)
+    assert [result["filename"] for result in pooled] == filenames
+    assert pooled[0]["status"] == "migrated", pooled[0]["error"]
+
+    def requirements(result: dict) -> list:
+        # The new control implementations have new uuids.
+        if "document" not in result:
+            return []
+        definition = json.loads(result.pop("document"))["component_definition"]
+        return [
+            ci["implemented_requirements"]
+            for component in definition["components"]
+            for ci in component["control_implementations"]
+        ]
+
+    assert [requirements(result) for result in pooled] == [
+        requirements(result) for result in in_process
+    ]
+    assert pooled == in_process
@@ -0,0 +1,143 @@
+import json
+
+import pytest
+
+from app.oscal import profile as profile_module
+from app.oscal.catalog import CatalogModel
+from app.oscal.profile import ProfileResolver
+from app.oscal.validator import compiled_validator
+
+CATALOG = "tests/data/NIST_SP_800-53_rev5_TEST.json"
+
+
+def make_profile(value: str = "all personnel") -> dict:
+    return {
+        "profile": {
+            "uuid": "2e1a0a3f-59bc-4a3a-a2c4-1f1b7e0c8d11",
+            "metadata": {
+                "title": "TEST LOW baseline",
+                "last-modified": "2023-01-01T00:00:00+00:00",
+                "version": "1.0",
+                "oscal-version": "1.0.0",
+            },
+            "imports": [
+                {
+                    "href": "#catalog",
+                    "include-controls": [
+                        {"with-ids": ["ac-1", "ac-2", "ia-2.1", "sr-1"]},
+                        {"matching": [{"pattern": "cp-*"}]},
+                    ],
+                    "exclude-controls": [{"with-ids": ["cp-3"]}],
+                }
+            ],
+            "modify": {
+                "set-parameters": [{"param-id": "ac-1_prm_1", "values": [value]}],
+                "alters": [
+                    {
+                        "control-id": "ac-1",
+                        "adds": [{"props": [{"name": "priority", "value": "P1"}]}],
+                        "removes": [{"by-name": "guidance"}],
+                    }
+                ],
+            },
+        }
+    }
+
+
+@pytest.fixture(scope="module")
+def resolver():
+    with open(CATALOG) as file:
+        return ProfileResolver(json.load(file))
+
+
+def resolved_ids(resolved: dict) -> list:
+    ids = []
+    for group in resolved["catalog"]["groups"]:
+        for control in group["controls"]:
+            ids.append(control["id"])
+            ids.extend(c["id"] for c in control.get("controls") or [])
+    return ids
+
+
+def test_resolve_selection(resolver):
+    """
+    Controls are selected by id and pattern, excluded controls are left out and
+    the controls of selected enhancements are kept
+    """
+    ids = resolved_ids(resolver.resolve(make_profile()))
+    assert {"ac-1", "ac-2", "ia-2", "ia-2.1", "sr-1"} <= set(ids)
+    assert "cp-1" in ids and "cp-3" not in ids
+    assert "ac-3" not in ids and "ac-2.1" not in ids
+    assert "ia-2.2" not in ids
+
+
+def test_resolve_modifications(resolver):
+    """
+    Parameter settings and alterations are applied to a copy of the control
+    """
+    resolved = resolver.resolve(make_profile())
+    ac_1 = resolved["catalog"]["groups"][0]["controls"][0]
+    param = next(p for p in ac_1["params"] if p["id"] == "ac-1_prm_1")
+    assert param["values"] == ["all personnel"]
+    assert {"name": "priority", "value": "P1"} in ac_1["props"]
+    assert all(part["name"] != "guidance" for part in ac_1["parts"])
+    assert any(
+        part["name"] == "guidance" for part in resolver.controls["ac-1"]["parts"]
+    )
+
+
+def test_resolve_valid_and_deterministic(resolver):
+    """
+    The resolved catalog is valid OSCAL, loads as a Catalog and is the same for
+    the same profile and catalog
+    """
+    resolved = resolver.resolve(make_profile())
+    validator = compiled_validator("oscal_catalog_schema.json")
+    assert next(validator.iter_errors(resolved), None) is None
+    assert CatalogModel(**resolved["catalog"]).get_control("ia-2.1")
+    assert resolver.resolve(make_profile()) == resolved
+    other = resolver.resolve(make_profile("managers"))
+    assert other["catalog"]["uuid"] != resolved["catalog"]["uuid"]
+
+
+def test_resolve_last_modified(resolver):
+    """
+    The resolved catalog was last modified when the later of its inputs was
+    """
+    resolved = resolver.resolve(make_profile())
+    assert resolved["catalog"]["metadata"]["last-modified"] == (
+        "2023-01-01T00:00:00+00:00"
+    )
+    profile = make_profile()
+    profile["profile"]["metadata"]["last-modified"] = "2020-01-01T00:00:00-05:00"
+    assert resolver.resolve(profile)["catalog"]["metadata"]["last-modified"] == (
+        "2022-11-02T14:22:21.654826Z"
+    )
+
+
+def test_resolve_changed_profile(resolver, monkeypatch):
+    """
+    Only the controls whose modifications changed are resolved again
+    """
+    resolver.resolve(make_profile())
+    copies = []
+    deepcopy = profile_module.copy.deepcopy
+    monkeypatch.setattr(
+        profile_module.copy,
+        "deepcopy",
+        lambda value: copies.append(value["id"]) or deepcopy(value),
+    )
+    resolved = resolver.resolve(make_profile("system owners"))
+    assert copies == ["ac-1"]
+    ac_1 = resolved["catalog"]["groups"][0]["controls"][0]
+    assert ac_1["params"][0]["values"] == ["system owners"]
+
+
+def test_resolve_unknown_control(resolver):
+    """
+    Selecting or altering a control that is not in the catalog is an error
+    """
+    profile = make_profile()
+    profile["profile"]["imports"][0]["include-controls"][0]["with-ids"].append("zz-1")
+    with pytest.raises(ValueError, match="zz-1"):
+        resolver.resolve(profile)
@@ -0,0 +1,83 @@
+import io
+import os
+
+from app.storage import (
+    download_variants,
+    read_blob,
+    release_blob,
+    save_blob,
+    stored_encoding,
+    unpin_blob,
+    write_variants,
+)
+
+
+def test_save_blob_deduplicates(tmp_path):
+    """
+    The same content is stored once, at a path derived from its SHA-256
+    """
+    first = save_blob(io.BytesIO(b'{"catalog": {}}'), tmp_path)
+    second = save_blob(io.BytesIO(b'{"catalog": {}}'), tmp_path)
+    other = save_blob(io.BytesIO(b'{"catalog": []}'), tmp_path)
+    assert first == second != other
+    assert first.parent.name == first.stem[:2]
+    assert first.read_bytes() == b'{"catalog": {}}'
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_release_blob(tmp_path):
+    """
+    A stored file is only removed when nothing references it, with the files
+    derived from it
+    """
+    blob = save_blob(io.BytesIO(b"{}"), tmp_path)
+    derived = blob.with_name(f"{blob.name}.hashes.json")
+    derived.write_text("{}")
+    assert release_blob(blob.as_posix(), references=1) is False
+    assert blob.exists()
+    assert release_blob(blob.as_posix(), references=0) is True
+    assert not blob.exists()
+    assert not derived.exists()
+
+
+def test_release_pinned_blob(tmp_path):
+    """
+    A stored file is kept while an upload of the same content is pending, and the
+    references are counted once the file is locked
+    """
+    blob = save_blob(io.BytesIO(b"{}"), tmp_path, pin="first")
+    assert save_blob(io.BytesIO(b"{}"), tmp_path, pin="second") == blob
+    unpin_blob(blob, "first")
+    assert release_blob(blob.as_posix(), references=0) is False
+    assert blob.exists()
+    unpin_blob(blob, "second")
+    assert release_blob(blob.as_posix(), references=lambda: 1) is False
+    assert release_blob(blob.as_posix(), references=lambda: 0) is True
+    assert not blob.exists()
+    assert list(blob.parent.iterdir()) == []
+
+
+def test_save_blob_compressed(tmp_path):
+    """
+    Files compressed at rest are read back transparently and deduplicated with
+    uncompressed copies of the same content
+    """
+    blob = save_blob(io.BytesIO(b'{"catalog": {}}'), tmp_path, compression="gzip")
+    assert blob.name.endswith(".json.gz")
+    assert stored_encoding(blob) == "gzip"
+    assert read_blob(blob) == b'{"catalog": {}}'
+    assert save_blob(io.BytesIO(b'{"catalog": {}}'), tmp_path) == blob
+
+
+def test_write_variants(tmp_path):
+    """
+    Plain files get precompressed copies that are only used while they are fresh
+    """
+    path = tmp_path.joinpath("component.json")
+    path.write_bytes(b'{"component-definition": {}}')
+    write_variants(path)
+    variants = download_variants(path)
+    assert read_blob(variants["gzip"]) == path.read_bytes()
+
+    os.utime(variants["gzip"], ns=(0, 0))
+    assert "gzip" not in download_variants(path)
@@ -0,0 +1,47 @@
+from pathlib import Path
+
+from flask import current_app
+
+from app.oscal.loader import load_catalog
+from app.warmup import warmup
+
+
+def test_load_catalog_is_memoized():
+    """
+    GIVEN a Catalog file
+    WHEN it is loaded twice
+    THEN the parsed Catalog is reused
+    """
+    filename = "tests/data/NIST_SP_800-53_rev5_TEST.json"
+    assert load_catalog(filename) is load_catalog(filename)
+
+
+def test_warmup(test_client, init_database):
+    """
+    GIVEN a Flask application with Catalogs
+    WHEN it is warmed up
+    THEN every template, validator and Catalog file is loaded
+    """
+    app = current_app._get_current_object()
+    timings = warmup(app)
+
+    templates = list(Path(app.root_path, "templates").rglob("*.html"))
+    assert timings["templates"][0] == len(templates)
+    assert timings["validators"][0] == 2
+    # Both test Catalogs share a file.
+    assert timings["catalogs"][0] == 1
+    assert "catalogs/catalog_body.html" in {
+        template.name for template in app.jinja_env.cache.values()
+    }
+
+
+def test_warmup_command(test_client, init_database):
+    """
+    GIVEN a Flask application
+    WHEN the warmup command is run
+    THEN it reports what was loaded
+    """
+    runner = current_app.test_cli_runner()
+    result = runner.invoke(args=["warmup"])
+    assert result.exit_code == 0
+    assert "catalogs: 1" in result.output